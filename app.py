@@ -1,8 +1,19 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
-import plotly.express as px
-import unicodedata
+import plotly.io as pio
+
+from casanova.analytics import SNAPSHOT_MAX_AGE, Analytics, View, build_dataset, load_snapshots
+from casanova.anomalies import WINDOW as ANOMALY_WINDOW
+from casanova.charts import DAILY_KPI_CHARTS, anomaly_rows, chart_key, chart_spec, money_fmt, pct_fmt, render_json
+from casanova.columnar import BACKEND
+from casanova.compare import COMPARISONS, DELTAS, delta_labels
+from casanova.downsample import RESOLUTIONS
+from casanova.export import EXPORT_FORMATS, PAGE_SIZES, n_pages, page, write_export
+from casanova import perf
+from casanova.memo import Memo
+from casanova.perf import stage, timed
+from casanova.report import REPORT_DIR, read_latest
+from casanova.sources import load_sources
 
 # -----------------------------------------------------------------------------
 # CONFIG
@@ -108,112 +119,49 @@ button[role="tab"] { font-size: 1.02rem; }
 # -----------------------------------------------------------------------------
 # GOOGLE SHEETS SETTINGS
 # -----------------------------------------------------------------------------
-SHEET_ID = "1klKOjOawuBF8lBAFUwg3b6WjZ1fjuXUld2_xtbNjgTQ"
-GID_VENTAS = "0"           # ventas_bazar
-GID_RESUMEN = "281676852"  # resumen_diario
+# Planillas (tiendas / archivos anuales) en casanova/sources.py: por defecto SHEET_ID con
+# GID_VENTAS y GID_RESUMEN; más fuentes con CASANOVA_SOURCES o sources.json (los comparte el batch).
+INCREMENTAL_INGEST = True  # ventas_bazar: tipar sólo las filas nuevas que agrega n8n
+NOTES_SHOWN = 500          # Voice of Customer: filas de notas enviadas al navegador
+LAZY_TABS = True           # calcular sólo la pestaña abierta (las demás, al abrirlas)
 
 # -----------------------------------------------------------------------------
 # HELPERS
 # -----------------------------------------------------------------------------
-INK = "#1F1C1A"
-ACCENT = "#9B3E2A"   # ladrillo más contrastado
-GRID = "rgba(31,28,26,0.12)"
-AXIS_LINE = "rgba(31,28,26,0.25)"
-PLOT_BG = "rgba(255,255,255,0.70)"   # “papel” detrás del gráfico
-
-def strip_accents(text: str) -> str:
-    if not isinstance(text, str):
-        text = str(text)
-    return "".join(c for c in unicodedata.normalize("NFD", text) if unicodedata.category(c) != "Mn")
+@st.cache_data(ttl=300)
+def load_data(sources: tuple, force: bool = False):
+    # Todas las pestañas de todas las fuentes en paralelo: snapshot Parquet local + GET condicional
+    # (con reintentos y cobertura export/gviz); si Google falla, sirve el último snapshot.
+    # Con ingesta incremental sólo se procesan los pedidos agregados al final.
+    # Con el backend arrow la caché guarda sólo metadatos: las filas quedan en disco.
+    return load_snapshots(
+        sources,
+        max_age=0 if force else SNAPSHOT_MAX_AGE,
+        incremental=INCREMENTAL_INGEST,
+        lazy=BACKEND == "arrow",
+    )
 
-def normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.copy()
-    df.columns = [strip_accents(c).strip().lower().replace(" ", "_") for c in df.columns]
-    return df
+@st.cache_resource
+def get_memo() -> Memo:
+    # Un único memo por proceso: frames, agregados y figuras compartidos entre sesiones.
+    return Memo()
 
-def to_numeric_series(s: pd.Series) -> pd.Series:
-    return pd.to_numeric(s.astype(str).str.replace(",", ".", regex=False).str.strip(), errors="coerce")
+memo = get_memo()
 
-@st.cache_data(ttl=300)
-def load_sheet_csv(sheet_id: str, gid: str) -> pd.DataFrame:
-    url1 = f"https://docs.google.com/spreadsheets/d/{sheet_id}/export?format=csv&gid={gid}"
-    url2 = f"https://docs.google.com/spreadsheets/d/{sheet_id}/gviz/tq?tqx=out:csv&gid={gid}"
-    try:
-        return pd.read_csv(url1)
-    except Exception:
-        return pd.read_csv(url2)
-
-def money_fmt(x: float) -> str:
-    if x is None or (isinstance(x, float) and np.isnan(x)):
-        return "—"
-    return f"${x:,.0f}".replace(",", ".")
-
-def pct_fmt(x: float) -> str:
-    if x is None or (isinstance(x, float) and np.isnan(x)):
-        return "—"
-    return f"{x*100:.1f}%"
-
-def plotly_editorial(fig, title=None, height=460):
-    """Estilo editorial claro + máximo contraste para ejes/labels."""
-    fig.update_layout(
-        template="plotly_white",
-        paper_bgcolor="rgba(0,0,0,0)",
-        plot_bgcolor=PLOT_BG,
-        font=dict(color=INK, family="Montserrat", size=14),
-        margin=dict(l=18, r=18, t=70, b=30),
-        height=height,
-        title=dict(
-            text=title or "",
-            x=0.01,
-            xanchor="left",
-            font=dict(family="Playfair Display", size=20, color=INK),
-        ),
-        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
-    )
-    fig.update_xaxes(
-        gridcolor=GRID,
-        zerolinecolor=GRID,
-        tickfont=dict(color=INK, size=14),
-        title_font=dict(color=INK, size=14),
-        showline=True,
-        linewidth=1,
-        linecolor=AXIS_LINE,
-    )
-    fig.update_yaxes(
-        gridcolor=GRID,
-        zerolinecolor=GRID,
-        tickfont=dict(color=INK, size=14),
-        title_font=dict(color=INK, size=14),
-        showline=True,
-        linewidth=1,
-        linecolor=AXIS_LINE,
-    )
-    return fig
-
-def style_bars(fig, opacity=0.95):
-    """Fuerza color y bordes (evita barras 'lavadas' sobre fondo claro)."""
-    fig.update_traces(
-        marker=dict(
-            color=ACCENT,
-            opacity=opacity,
-            line=dict(width=1, color="rgba(31,28,26,0.18)")
-        )
-    )
-    return fig
-
-def style_hist(fig, opacity=0.90):
-    fig.update_traces(
-        marker=dict(
-            color=ACCENT,
-            opacity=opacity,
-            line=dict(width=1, color="rgba(31,28,26,0.18)")
-        )
-    )
-    return fig
+@st.cache_data(ttl=60)
+def load_prerendered(report_dir: str):
+    # Último reporte de `python -m casanova.report` (n8n / cron), si existe.
+    return read_latest(report_dir)
 
-def style_line(fig):
-    fig.update_traces(line=dict(width=4, color=ACCENT), marker=dict(size=8, color=ACCENT))
-    return fig
+def plotly_view(name: str):
+    """Figura ``name`` de la vista actual: del reporte pre-renderizado o del memo (se arma una vez)."""
+    with stage(f"chart:{name}"):
+        fig_json = prerendered.get(name)
+        if fig_json is None:
+            key = chart_key(name, an, view, use_resumen, resolution, compare)
+            fig_json = memo.get("fig", key, timed(f"figure:{name}", lambda: render_json(
+                chart_spec(name, an, view, use_resumen, resolution, compare))))
+        st.plotly_chart(pio.from_json(fig_json, skip_invalid=True), use_container_width=True)
 
 # -----------------------------------------------------------------------------
 # SIDEBAR
@@ -221,124 +169,120 @@ def style_line(fig):
 st.sidebar.markdown("### Controles")
 if st.sidebar.button("🔄 Actualizar datos"):
     st.cache_data.clear()
+    st.session_state["force_refresh"] = True
     st.rerun()
+force_refresh = st.session_state.pop("force_refresh", False)
 
 use_resumen = st.sidebar.toggle("Usar resumen_diario para tendencias", value=True)
+resumen_local = st.sidebar.toggle("Calcular resumen_diario en Python (sin n8n)", value=False)
+# Automática: diaria hasta ~13 meses, semanal hasta ~4 años, mensual después (ver casanova/downsample.py).
+resolution = st.sidebar.selectbox("Resolución de tendencias", list(RESOLUTIONS), format_func=RESOLUTIONS.get)
+# Deltas de los KPIs y línea punteada en las tendencias (ver casanova/compare.py).
+compare = st.sidebar.selectbox("Comparar con", list(COMPARISONS), format_func=COMPARISONS.get)
 
 with st.sidebar.expander("📌 Cómo leer este dashboard", expanded=False):
     st.markdown("""
-- **Overview**: KPIs, tendencia y alertas automáticas.
+- **Overview**: KPIs, tendencia, alertas automáticas y anomalías.
 - **Comercial**: canal/categoría/producto que explica ventas.
 - **Operación**: tiempos de entrega, cancelaciones, reseñas.
-- **Datos**: tabla filtrada + descarga CSV.
+- **Datos**: tabla filtrada paginada + descarga (CSV, CSV gzip o Parquet).
 """)
 
+with st.sidebar.expander("🧠 Caché compartida", expanded=False):
+    memo_stats = memo.stats()
+    st.caption(f"{memo_stats['entries']} entradas · {memo_stats['bytes'] / 2**20:.1f} / {memo_stats['max_bytes'] / 2**20:.0f} MB")
+    st.dataframe(
+        pd.DataFrame.from_dict(memo_stats["namespaces"], orient="index"),
+        use_container_width=True,
+    )
+
+# Medición por etapa (casanova/perf.py): apagada no cuesta nada; el detalle se completa al final.
+perf_panel = st.sidebar.expander("⏱️ Diagnóstico de rendimiento", expanded=False)
+profile_on = perf_panel.toggle("Medir etapas en cada corrida", value=perf.enabled_by_default())
+perf_run = perf.begin("rerun", profile_on, memo)
+
 # -----------------------------------------------------------------------------
 # LOAD DATA
 # -----------------------------------------------------------------------------
 try:
-    ventas_raw = load_sheet_csv(SHEET_ID, GID_VENTAS)
-    resumen_raw = load_sheet_csv(SHEET_ID, GID_RESUMEN)
+    sources = load_sources()
+except ValueError as e:
+    st.error(str(e))
+    st.stop()
+
+try:
+    with stage("load_data"):
+        snapshots = load_data(sources, force=force_refresh)
 except Exception as e:
     st.error("No pude leer Google Sheets. Revisá permisos: “Cualquier persona con el enlace → Lector”.")
     st.exception(e)
     st.stop()
 
-ventas = normalize_columns(ventas_raw)
-resumen = normalize_columns(resumen_raw)
+if any(s.workbook for s in sources):
+    st.sidebar.caption("Modo local: datos leídos del libro .xlsx (sin Google Sheets).")
+if BACKEND == "arrow":
+    st.sidebar.caption("Backend columnar: ventas en Parquet por mes, consultas con pyarrow (CASANOVA_BACKEND=arrow).")
 
-# Fechas
-if "fecha_pedido" in ventas.columns:
-    ventas["fecha_pedido"] = pd.to_datetime(ventas["fecha_pedido"], errors="coerce", dayfirst=True)
-if "fecha_analizada" in resumen.columns:
-    resumen["fecha_analizada"] = pd.to_datetime(resumen["fecha_analizada"], errors="coerce", dayfirst=True)
+for s in snapshots:
+    stale = [snap for snap in s.snapshots if snap.status == "stale"]
+    if stale:
+        fetched = pd.Timestamp(stale[0].meta.fetched_at, unit="s").strftime("%d/%m/%Y %H:%M")
+        origen = f" ({s.source.label})" if len(snapshots) > 1 else ""
+        st.sidebar.warning(f"No pude actualizar desde Google Sheets{origen}; uso el snapshot local del {fetched} (UTC).")
 
-# Numéricos ventas
-for col in ["unidades", "precio_unitario", "descuento_pct", "costo_envio", "dias_entrega", "resena", "reseña", "importe_total"]:
-    if col in ventas.columns:
-        ventas[col] = to_numeric_series(ventas[col])
-
-if "reseña" in ventas.columns and "resena" not in ventas.columns:
-    ventas["resena"] = ventas["reseña"]
-
-# Ventas netas por fila
-if "importe_total" in ventas.columns and ventas["importe_total"].notna().any():
-    ventas["ventas_netas"] = ventas["importe_total"]
-else:
-    ventas["ventas_netas"] = (
-        (ventas.get("unidades", 0).fillna(0) * ventas.get("precio_unitario", 0).fillna(0))
-        * (1 - ventas.get("descuento_pct", 0).fillna(0) / 100)
-    )
-
-# Numéricos resumen
-for col in ["ventas_netas_dia", "ticket_promedio_dia", "pct_cancelados_dia", "entrega_promedio_dias", "rating_promedio"]:
-    if col in resumen.columns:
-        resumen[col] = to_numeric_series(resumen[col])
-
-# Compat nombres alternativos
-if "canal_superior" in resumen.columns and "canal_top" not in resumen.columns:
-    resumen["canal_top"] = resumen["canal_superior"]
-if "categoria_superior" in resumen.columns and "categoria_top" not in resumen.columns:
-    resumen["categoria_top"] = resumen["categoria_superior"]
+# Normalización, índice por fecha y cubo por tienda y mes (ver casanova/analytics.py), por versión de datos.
+try:
+    with stage("build_dataset"):
+        data = build_dataset(snapshots, resumen_local=resumen_local, memo=memo)
+except ValueError as e:
+    st.error(str(e))
+    st.stop()
+an = Analytics(data, memo)
+resumen_fuente = "el motor local (Python)" if resumen_local else "n8n"
 
 # -----------------------------------------------------------------------------
 # FILTERS
 # -----------------------------------------------------------------------------
-ventas = ventas.dropna(subset=["fecha_pedido"])
-if ventas.empty:
-    st.error("No hay filas con fecha_pedido válida en ventas_bazar.")
-    st.stop()
-
-min_date = ventas["fecha_pedido"].min().date()
-max_date = ventas["fecha_pedido"].max().date()
-
 st.sidebar.markdown("### Rango de fechas")
-date_range = st.sidebar.date_input(" ", (min_date, max_date))
+date_range = st.sidebar.date_input(" ", (data.min_date, data.max_date))
 if isinstance(date_range, tuple) and len(date_range) == 2:
     start_date, end_date = date_range
 else:
-    start_date, end_date = min_date, max_date
+    start_date, end_date = data.min_date, data.max_date
 
-df = ventas[(ventas["fecha_pedido"].dt.date >= start_date) & (ventas["fecha_pedido"].dt.date <= end_date)].copy()
+filters = {}
 
 def multiselect_filter(col: str, label: str):
-    global df
-    if col in df.columns:
-        opts = sorted([x for x in df[col].dropna().unique()])
-        selected = st.sidebar.multiselect(label, opts, default=opts)
-        df = df[df[col].isin(selected)]
+    # Opciones en cascada: sólo valores presentes con los filtros anteriores.
+    if col in data.cube.dims:
+        with stage(f"options:{col}"):
+            opts = an.options(col, View.of(start_date, end_date, filters))
+        filters[col] = st.sidebar.multiselect(label, opts, default=opts)
 
 st.sidebar.markdown("### Filtros")
+multiselect_filter("tienda", "Tienda")
 multiselect_filter("canal", "Canal")
 multiselect_filter("categoria", "Categoría")
 multiselect_filter("provincia_envio", "Provincia")
 multiselect_filter("estado_pedido", "Estado")
 
-# -----------------------------------------------------------------------------
-# KPI CALCS
-# -----------------------------------------------------------------------------
-total_ventas = float(df["ventas_netas"].sum())
-pedidos = int(df["id_pedido"].nunique()) if "id_pedido" in df.columns else int(len(df))
-ticket = float(total_ventas / pedidos) if pedidos else 0
-
-cancelados = int((df["estado_pedido"].astype(str).str.lower() == "cancelado").sum()) if "estado_pedido" in df.columns else 0
-pct_cancel = (cancelados / pedidos) if pedidos else 0
+view = View.of(start_date, end_date, filters)
 
-entrega_avg = 0.0
-if "dias_entrega" in df.columns:
-    aux = df.loc[df["dias_entrega"] > 0, "dias_entrega"]
-    entrega_avg = float(aux.mean()) if len(aux) else 0.0
+# Vista por defecto ya renderizada por el batch: las figuras se sirven sin calcular nada.
+report = load_prerendered(str(REPORT_DIR))
+prerendered = report.figures if report is not None and report.matches(an, view, use_resumen, resolution, compare) else {}
 
-rating_avg = 0.0
-if "resena" in df.columns:
-    aux = df.loc[df["resena"] > 0, "resena"]
-    rating_avg = float(aux.mean()) if len(aux) else 0.0
+# -----------------------------------------------------------------------------
+# KPI CALCS (desde el cubo)
+# -----------------------------------------------------------------------------
+kpis = an.kpis(view)
+with stage("comparison"):
+    comparison = an.comparison(view, compare)   # O(1) sobre sumas acumuladas por día
+deltas = delta_labels(kpis, comparison) if comparison is not None else {}
 
-# Highlights
-top_channel = df.groupby("canal")["ventas_netas"].sum().sort_values(ascending=False).head(1).index[0] if "canal" in df.columns and len(df) else "—"
-top_category = df.groupby("categoria")["ventas_netas"].sum().sort_values(ascending=False).head(1).index[0] if "categoria" in df.columns and len(df) else "—"
-top_product = df.groupby("producto")["ventas_netas"].sum().sort_values(ascending=False).head(1).index[0] if "producto" in df.columns and len(df) else "—"
-last_date = df["fecha_pedido"].max().date() if len(df) else None
+def kpi_card(col, label: str, name: str, value: str):
+    # Cancelaciones y días de entrega: subir es malo (delta en rojo).
+    col.metric(label, value, delta=deltas.get(name), delta_color="inverse" if DELTAS[name][1] else "normal")
 
 # -----------------------------------------------------------------------------
 # HEADER
@@ -348,138 +292,123 @@ st.markdown("### Dashboard Ejecutivo — visión editorial del negocio")
 st.caption("Fuente: Google Sheets + automatización con n8n (dataset ficticio).")
 
 k1, k2, k3, k4, k5, k6 = st.columns([1.2, 0.9, 1.1, 0.95, 1.0, 0.9])
-k1.metric("Ventas netas", money_fmt(total_ventas))
-k2.metric("Pedidos", f"{pedidos}")
-k3.metric("Ticket promedio", money_fmt(ticket))
-k4.metric("% Cancelados", pct_fmt(pct_cancel))
-k5.metric("Entrega prom.", f"{entrega_avg:.1f} días" if entrega_avg else "—")
-k6.metric("Rating prom.", f"{rating_avg:.2f}" if rating_avg else "—")
+kpi_card(k1, "Ventas netas", "total_ventas", money_fmt(kpis.total_ventas))
+kpi_card(k2, "Pedidos", "pedidos", f"{kpis.pedidos}")
+kpi_card(k3, "Ticket promedio", "ticket", money_fmt(kpis.ticket))
+kpi_card(k4, "% Cancelados", "pct_cancel", pct_fmt(kpis.pct_cancel))
+kpi_card(k5, "Entrega prom.", "entrega_avg", f"{kpis.entrega_avg:.1f} días" if kpis.entrega_avg else "—")
+kpi_card(k6, "Rating prom.", "rating_avg", f"{kpis.rating_avg:.2f}" if kpis.rating_avg else "—")
+if comparison is not None:
+    if comparison["pedidos"]:
+        st.caption(f"Δ vs {COMPARISONS[compare].lower()}: {comparison['start']:%d/%m/%Y} – {comparison['end']:%d/%m/%Y} "
+                   f"({money_fmt(comparison['total_ventas'])}, {comparison['pedidos']} pedidos).")
+    else:
+        st.caption(f"Sin pedidos en {COMPARISONS[compare].lower()} ({comparison['start']:%d/%m/%Y} – "
+                   f"{comparison['end']:%d/%m/%Y}): no hay deltas.")
 
 st.markdown("<div class='hr'></div>", unsafe_allow_html=True)
 
 # -----------------------------------------------------------------------------
 # TABS
 # -----------------------------------------------------------------------------
-tab1, tab2, tab3, tab4 = st.tabs(["📈 Overview", "🛒 Comercial", "🚚 Operación", "🧾 Datos"])
+# Cada pestaña es una unidad aparte: con LAZY_TABS sólo corre la abierta, y cada gráfico/tabla
+# sale del memo con una clave que incluye sólo lo que usa (p. ej. resumen_diario ignora canal).
+tab1, tab2, tab3, tab4 = st.tabs(["📈 Overview", "🛒 Comercial", "🚚 Operación", "🧾 Datos"],
+                                 key="tab", on_change="rerun" if LAZY_TABS else "ignore")
+
+def render_tab(tab, name: str, body):
+    # ``open`` es None si no se sigue la pestaña elegida (todas se calculan).
+    if tab.open is False:
+        return
+    with tab, stage(f"tab:{name}"):
+        body()
 
 # ---------------------------
 # TAB 1: OVERVIEW
 # ---------------------------
-with tab1:
+def overview_tab():
     left, right = st.columns([2.2, 1.0], gap="large")
 
     with left:
         st.subheader("Tendencias de ventas")
         st.caption("Identifica picos/caídas. Luego cruza con canal/categoría/productos en Comercial.")
 
-        if use_resumen and "fecha_analizada" in resumen.columns and "ventas_netas_dia" in resumen.columns:
-            r = resumen.dropna(subset=["fecha_analizada"]).copy()
-            r = r[(r["fecha_analizada"].dt.date >= start_date) & (r["fecha_analizada"].dt.date <= end_date)]
-            r = r.sort_values("fecha_analizada")
-            trend_df = r.rename(columns={"fecha_analizada": "fecha", "ventas_netas_dia": "ventas_netas"})
-            note = "Tendencia basada en KPIs pre-calculados por n8n (resumen_diario)."
+        # Desde resumen_diario no depende de los filtros de canal/categoría (ver chart_key).
+        if an.trend_uses_resumen(use_resumen):
+            note = f"Tendencia basada en KPIs pre-calculados por {resumen_fuente} (resumen_diario)."
         else:
-            daily = df.groupby(df["fecha_pedido"].dt.date)["ventas_netas"].sum().reset_index()
-            daily.columns = ["fecha", "ventas_netas"]
-            trend_df = daily.sort_values("fecha")
             note = "Tendencia recalculada desde ventas_bazar (en tiempo real)."
-
-        fig = px.line(trend_df, x="fecha", y="ventas_netas", markers=True)
-        fig = style_line(fig)
-        fig = plotly_editorial(fig, title="Ventas netas por día", height=540)
-        st.plotly_chart(fig, use_container_width=True)
+        plotly_view("trend")
         st.caption(note)
 
     with right:
         st.subheader("Highlights")
         st.caption("Resumen editorial: quién tracciona ventas y qué mirar primero.")
         st.markdown(f"""
-- **Última fecha con datos:** `{last_date}`
-- **Canal líder:** **{top_channel}**
-- **Categoría líder:** **{top_category}**
-- **Producto líder:** *{top_product}*
+- **Última fecha con datos:** `{kpis.last_date}`
+- **Canal líder:** **{kpis.top_channel}**
+- **Categoría líder:** **{kpis.top_category}**
+- **Producto líder:** *{kpis.top_product}*
 """)
 
         st.markdown("#### ⚠️ Alertas")
-        if "observaciones" in resumen.columns and "fecha_analizada" in resumen.columns:
-            alerts = resumen.dropna(subset=["fecha_analizada"]).copy()
-            alerts = alerts[(alerts["fecha_analizada"].dt.date >= start_date) & (alerts["fecha_analizada"].dt.date <= end_date)]
-            alerts = alerts[alerts["observaciones"].astype(str).str.strip().str.upper() != "OK"]
+        if an.has_resumen and "observaciones" in data.resumen_columns:
+            alerts = an.alerts(view)
             if len(alerts):
-                st.dataframe(
-                    alerts[["fecha_analizada", "observaciones"]].sort_values("fecha_analizada", ascending=False),
-                    use_container_width=True,
-                    hide_index=True
-                )
-                st.caption("Se generan automáticamente en n8n (reglas sobre entrega, cancelación y rating).")
+                st.dataframe(alerts, use_container_width=True, hide_index=True)
+                st.caption(f"Se generan automáticamente en {resumen_fuente} (reglas sobre entrega, cancelación y rating).")
             else:
                 st.success("Sin alertas en el rango seleccionado.")
         else:
             st.info("No hay columna observaciones en resumen_diario.")
 
+        st.markdown("#### 🔎 Anomalías")
+        # Calculadas al ingerir (casanova/anomalies.py): acá sólo se filtra la tabla guardada.
+        anomalies = an.anomalies(view)
+        if len(anomalies):
+            st.dataframe(pd.DataFrame(anomaly_rows(anomalies)), use_container_width=True, hide_index=True, height=260)
+            st.caption(f"Picos y caídas contra la mediana de los {ANOMALY_WINDOW} días previos (total y por canal, categoría "
+                       "y provincia elegidos); ▲/▼ y el desvío robusto indican cuánto se apartó. Se calculan sobre "
+                       "todos los estados de pedido: no aplican el filtro de estado.")
+        else:
+            st.success("Sin anomalías en el rango seleccionado.")
+
     st.markdown("<div class='hr'></div>", unsafe_allow_html=True)
 
     st.subheader("KPIs diarios (calidad operativa)")
     st.caption("Ticket, cancelaciones y entrega: señales tempranas de fricción en la operación.")
 
-    if use_resumen and "fecha_analizada" in resumen.columns:
-        r2 = resumen.dropna(subset=["fecha_analizada"]).copy()
-        r2 = r2[(r2["fecha_analizada"].dt.date >= start_date) & (r2["fecha_analizada"].dt.date <= end_date)]
-        r2 = r2.sort_values("fecha_analizada")
-
-        cA, cB, cC = st.columns(3, gap="large")
-
-        if "ticket_promedio_dia" in r2.columns:
-            with cA:
-                fig = px.line(r2, x="fecha_analizada", y="ticket_promedio_dia", markers=True)
-                fig = style_line(fig)
-                fig = plotly_editorial(fig, title="Ticket promedio", height=400)
-                st.plotly_chart(fig, use_container_width=True)
-                st.caption("Si sube: mix más caro o más unidades por pedido.")
-
-        if "pct_cancelados_dia" in r2.columns:
-            with cB:
-                fig = px.line(r2, x="fecha_analizada", y="pct_cancelados_dia", markers=True)
-                fig = style_line(fig)
-                fig = plotly_editorial(fig, title="% Cancelaciones", height=400)
-                st.plotly_chart(fig, use_container_width=True)
-                st.caption("Si sube: revisar pagos, stock o promesas de entrega.")
-
-        if "entrega_promedio_dias" in r2.columns:
-            with cC:
-                fig = px.line(r2, x="fecha_analizada", y="entrega_promedio_dias", markers=True)
-                fig = style_line(fig)
-                fig = plotly_editorial(fig, title="Entrega promedio (días)", height=400)
-                st.plotly_chart(fig, use_container_width=True)
-                st.caption("Cuando sube, suele bajar satisfacción y recompra.")
+    if use_resumen and an.has_resumen:
+        captions = {
+            "ticket_promedio_dia": "Si sube: mix más caro o más unidades por pedido.",
+            "pct_cancelados_dia": "Si sube: revisar pagos, stock o promesas de entrega.",
+            "entrega_promedio_dias": "Cuando sube, suele bajar satisfacción y recompra.",
+        }
+        for col, name in zip(st.columns(3, gap="large"), DAILY_KPI_CHARTS):
+            if name in data.resumen_columns:
+                with col:
+                    plotly_view(name)
+                    st.caption(captions[name])
 
 # ---------------------------
 # TAB 2: COMERCIAL
 # ---------------------------
-with tab2:
+def comercial_tab():
     st.subheader("Distribución por canal y categoría")
     st.caption("Objetivo: entender dónde se genera la demanda y qué mix de productos explica las ventas.")
 
     a, b = st.columns(2, gap="large")
 
     with a:
-        if "canal" in df.columns:
-            by_channel = df.groupby("canal")["ventas_netas"].sum().sort_values(ascending=False).reset_index()
-            fig = px.bar(by_channel, x="canal", y="ventas_netas")
-            fig = style_bars(fig, opacity=0.96)
-            fig = plotly_editorial(fig, title="Ventas por canal", height=520)
-            st.plotly_chart(fig, use_container_width=True)
+        if "canal" in data.cube.dims:
+            plotly_view("by_channel")
             st.caption("Lectura: canales con mayor facturación. Cruza con cancelaciones en Operación.")
         else:
             st.info("No hay columna 'canal'.")
 
     with b:
-        if "categoria" in df.columns:
-            by_cat = df.groupby("categoria")["ventas_netas"].sum().sort_values(ascending=False).reset_index()
-            fig = px.bar(by_cat, x="categoria", y="ventas_netas")
-            fig = style_bars(fig, opacity=0.96)
-            fig = plotly_editorial(fig, title="Ventas por categoría", height=520)
-            st.plotly_chart(fig, use_container_width=True)
+        if "categoria" in data.cube.dims:
+            plotly_view("by_category")
             st.caption("Lectura: mix de ventas. Ideal para decidir stock y campañas.")
         else:
             st.info("No hay columna 'categoria'.")
@@ -488,30 +417,17 @@ with tab2:
 
     st.subheader("Top productos")
     st.caption("Top por ventas netas en el rango filtrado. Útil para priorizar reposición y creatividades.")
-    if "producto" in df.columns:
-        by_prod = df.groupby("producto")["ventas_netas"].sum().sort_values(ascending=False).head(12).reset_index()
-        fig = px.bar(by_prod, x="ventas_netas", y="producto", orientation="h")
-        fig = style_bars(fig, opacity=0.96)
-        fig = plotly_editorial(fig, title="Top 12 productos (ventas netas)", height=600)
-        st.plotly_chart(fig, use_container_width=True)
+    if "producto" in data.ventas_columns:
+        plotly_view("top_products")
 
     st.subheader("Día de la semana")
     st.caption("Planificación de publicaciones y promos: qué días convierten mejor.")
-    df["dia_semana"] = df["fecha_pedido"].dt.day_name()
-    by_dow = df.groupby("dia_semana")["ventas_netas"].sum().reset_index()
-    order = ["Monday","Tuesday","Wednesday","Thursday","Friday","Saturday","Sunday"]
-    by_dow["dia_semana"] = pd.Categorical(by_dow["dia_semana"], categories=order, ordered=True)
-    by_dow = by_dow.sort_values("dia_semana")
-
-    fig = px.bar(by_dow, x="dia_semana", y="ventas_netas")
-    fig = style_bars(fig, opacity=0.94)
-    fig = plotly_editorial(fig, title="Ventas por día de la semana", height=460)
-    st.plotly_chart(fig, use_container_width=True)
+    plotly_view("by_weekday")
 
 # ---------------------------
 # TAB 3: OPERACIÓN
 # ---------------------------
-with tab3:
+def operacion_tab():
     st.subheader("Logística, cancelaciones y calidad")
     st.caption("Objetivo: detectar fricciones operativas que impactan en reputación y ventas.")
 
@@ -519,25 +435,17 @@ with tab3:
 
     with c1:
         st.markdown("#### Estado de pedidos")
-        if "estado_pedido" in df.columns:
-            st.dataframe(
-                df["estado_pedido"].value_counts().rename_axis("estado").reset_index(name="conteo"),
-                use_container_width=True,
-                hide_index=True
-            )
+        if "estado_pedido" in data.cube.dims:
+            st.dataframe(an.order_states(view), use_container_width=True, hide_index=True)
             st.caption("Si sube “En tránsito”, revisar logística; si sube “Cancelado”, revisar pagos/stock.")
         else:
             st.info("No hay columna estado_pedido.")
 
     with c2:
         st.markdown("#### Entrega (días)")
-        if "dias_entrega" in df.columns:
-            aux = df[df["dias_entrega"] > 0].copy()
-            if len(aux):
-                fig = px.histogram(aux, x="dias_entrega", nbins=10)
-                fig = style_hist(fig, opacity=0.92)   # ← fuerza ladrillo
-                fig = plotly_editorial(fig, title="Distribución de días de entrega", height=470)
-                st.plotly_chart(fig, use_container_width=True)
+        if "dias_entrega" in data.ventas_columns:
+            if len(an.distribution("dias_entrega", view)):
+                plotly_view("hist_dias_entrega")
                 st.caption("Colas largas suelen indicar cuellos en correo o preparación.")
             else:
                 st.info("No hay días_entrega > 0 en el rango.")
@@ -546,13 +454,9 @@ with tab3:
 
     with c3:
         st.markdown("#### Reseñas")
-        if "resena" in df.columns:
-            aux = df[df["resena"] > 0].copy()
-            if len(aux):
-                fig = px.histogram(aux, x="resena", nbins=5)
-                fig = style_hist(fig, opacity=0.92)   # ← fuerza ladrillo
-                fig = plotly_editorial(fig, title="Distribución de rating", height=470)
-                st.plotly_chart(fig, use_container_width=True)
+        if "resena" in data.ventas_columns:
+            if len(an.distribution("resena", view)):
+                plotly_view("hist_resena")
                 st.caption("Si cae, revisar calidad, embalaje y tiempos.")
             else:
                 st.info("No hay reseñas > 0 en el rango.")
@@ -562,37 +466,99 @@ with tab3:
     st.markdown("<div class='hr'></div>", unsafe_allow_html=True)
 
     st.subheader("Notas de clientes (Voice of Customer)")
-    st.caption("Siguiente nivel: IA para etiquetar feedback (envío, calidad, atención).")
-    if "notas_cliente" in df.columns:
-        notes = df["notas_cliente"].dropna().astype(str)
-        if len(notes):
-            st.dataframe(notes.to_frame("notas_cliente"), use_container_width=True, hide_index=True)
-        else:
-            st.caption("No hay notas en el rango filtrado.")
+    st.caption("Etiquetas por reglas de palabras clave (envío, calidad, atención…); la búsqueda ignora tildes y mayúsculas.")
+    if "notas_cliente" in data.ventas_columns:
+        customer_notes(an, view)
     else:
         st.caption("No hay columna notas_cliente.")
 
+@st.fragment
+def customer_notes(an: Analytics, view: View):
+    # Fragmento: etiquetas y búsqueda sólo re-ejecutan este bloque, no la página.
+    with stage("notes"):
+        tag_counts = an.note_tags(view)
+        n1, n2 = st.columns([1, 2.2], gap="large")
+        with n1:
+            st.dataframe(
+                tag_counts.assign(pct=(tag_counts["pct"] * 100).round(1)).rename(columns={"pct": "% notas"}),
+                use_container_width=True, hide_index=True,
+            )
+        with n2:
+            f1, f2 = st.columns([1, 1.3])
+            note_tags = f1.multiselect("Etiquetas", tag_counts["etiqueta"].tolist(), default=[])
+            note_query = f2.text_input("Buscar en notas", placeholder="ej: demora correo")
+            notes = an.notes(view, tuple(note_tags), note_query)
+            if len(notes):
+                st.dataframe(notes.head(NOTES_SHOWN), use_container_width=True, hide_index=True)
+                shown = f" (se muestran las {NOTES_SHOWN} más recientes)" if len(notes) > NOTES_SHOWN else ""
+                st.caption(f"{len(notes):,} notas{shown}.".replace(",", "."))
+            else:
+                st.caption("No hay notas que coincidan en el rango filtrado.")
+
 # ---------------------------
 # TAB 4: DATOS
 # ---------------------------
-with tab4:
+def datos_tab():
     st.subheader("Dataset filtrado")
     st.caption("Vista transaccional para auditoría. Descargá CSV filtrado para análisis externo.")
+    dataset_table(an, view)
 
+@st.fragment
+def dataset_table(an: Analytics, view: View):
+    # Fragmento: ordenar, paginar o cambiar el formato no recalcula el resto del dashboard.
+    df = an.rows(view)
     cols_show = [c for c in [
-        "id_pedido","fecha_pedido","canal","sku","producto","categoria","subcategoria",
+        "tienda","id_pedido","fecha_pedido","canal","sku","producto","categoria","subcategoria",
         "unidades","precio_unitario","descuento_pct","ventas_netas","costo_envio",
         "metodo_pago","provincia_envio","ciudad_envio","tipo_cliente","estado_pedido",
         "dias_entrega","resena","notas_cliente"
     ] if c in df.columns]
 
-    st.dataframe(df[cols_show].sort_values("fecha_pedido", ascending=False), use_container_width=True, hide_index=True)
+    # Paginado del lado del servidor: se ordena una columna y se envía sólo la página visible.
+    p1, p2, p3, p4 = st.columns([1.3, 0.8, 0.8, 0.8])
+    sort_col = p1.selectbox("Ordenar por", cols_show, index=cols_show.index("fecha_pedido"))
+    descending = p2.toggle("Descendente", value=True)
+    page_size = p3.selectbox("Filas por página", PAGE_SIZES, index=1)
+    total_pages = n_pages(len(df), page_size)
+    page_number = p4.number_input(f"Página (de {total_pages})", min_value=1, max_value=total_pages, value=1, step=1)
+
+    st.dataframe(
+        page(df[cols_show], sort_col, not descending, int(page_number) - 1, page_size),
+        use_container_width=True,
+        hide_index=True
+    )
+    st.caption(f"{len(df):,} filas en el rango filtrado.".replace(",", "."))
 
+    # La exportación se genera recién al hacer clic (callable) y se escribe por bloques.
+    export_fmt = st.radio("Formato", list(EXPORT_FORMATS), horizontal=True)
+    ext, mime = EXPORT_FORMATS[export_fmt]
+    export_df = df[cols_show]
     st.download_button(
-        "⬇️ Descargar CSV (filtrado)",
-        data=df[cols_show].to_csv(index=False).encode("utf-8"),
-        file_name="casanova_ventas_filtrado.csv",
-        mime="text/csv"
+        "⬇️ Descargar (filtrado)",
+        data=lambda: write_export(export_df, export_fmt),
+        file_name=f"casanova_ventas_filtrado.{ext}",
+        mime=mime
     )
 
+render_tab(tab1, "overview", overview_tab)
+render_tab(tab2, "comercial", comercial_tab)
+render_tab(tab3, "operacion", operacion_tab)
+render_tab(tab4, "datos", datos_tab)
+
 st.caption("Tip: si n8n actualiza Google Sheets, tocá “Actualizar datos” para refrescar el dashboard.")
+
+perf_record = perf.end(perf_run, memo, tab=st.session_state.get("tab"))
+if perf_record is not None:
+    with perf_panel:
+        rss = perf_record["rss_bytes"]
+        st.caption(f"Corrida: {perf_record['seconds'] * 1000:.0f} ms" + (f" · RSS {rss / 2**20:.0f} MB" if rss else ""))
+        stages = pd.DataFrame(perf_record["stages"])
+        if len(stages):
+            stages["ms"] = (stages.pop("seconds") * 1000).round(1)
+            for col in ("rss_delta", "py_delta"):
+                stages[col] = (stages[col].astype("float64") / 2**20).round(2)
+            stages = stages.rename(columns={"rss_delta": "Δ RSS MB", "py_delta": "Δ Python MB"}).dropna(axis=1, how="all")
+            st.dataframe(stages.sort_values("ms", ascending=False), use_container_width=True, hide_index=True)
+        if perf_record["cache"]:
+            st.caption("Caché en esta corrida (todo el proceso)")
+            st.dataframe(pd.DataFrame.from_dict(perf_record["cache"], orient="index"), use_container_width=True)
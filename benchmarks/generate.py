@@ -0,0 +1,187 @@
+"""Generadores sintéticos de ventas_bazar / resumen_diario.
+
+Reproducen el formato de la hoja real (encabezados, fechas dd/mm/aaaa, coma
+decimal en ``dias_entrega``, notas vacías) con catálogo, canales y provincias
+tomados del dataset ficticio, para medir el pipeline a 10k–10M filas sin red.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from casanova.resumen import compute_resumen
+from casanova.transform import read_ventas_csv
+
+# producto -> (sku, categoria, subcategoria, precio)
+CATALOGO = {
+    "Taza cerámica blanca 330ml": ("BZ-MUG-001", "Cocina", "Tazas", 4500),
+    "Set 4 tazas colores pastel": ("BZ-MUG-002", "Cocina", "Tazas", 14500),
+    "Frasco hermético vidrio 1L": ("BZ-JAR-001", "Cocina", "Frascos", 5200),
+    "Set 3 frascos especieros": ("BZ-JAR-002", "Cocina", "Frascos", 6800),
+    "Set utensilios cocina silicona x5": ("BZ-KIT-001", "Cocina", "Utensilios", 18700),
+    "Set cuchillos cocina acero x6": ("BZ-KIT-002", "Cocina", "Utensilios", 21900),
+    "Set tablas de picar bambú x3": ("BZ-KIT-003", "Cocina", "Utensilios", 13400),
+    "Set 6 vasos de vidrio": ("BZ-GLS-001", "Mesa", "Vasos", 7800),
+    "Set 12 vasos de vidrio": ("BZ-GLS-002", "Mesa", "Vasos", 12800),
+    "Jarra de vidrio con tapa 1.5L": ("BZ-GLS-003", "Mesa", "Vasos", 11500),
+    "Mantel estampado 6 sillas": ("BZ-TXT-001", "Mesa", "Manteles", 11900),
+    "Camino de mesa lino": ("BZ-TXT-002", "Mesa", "Manteles", 8600),
+    "Juego de individuales x4": ("BZ-TXT-003", "Mesa", "Manteles", 6900),
+    "Set 4 bowls de cerámica": ("BZ-BWL-001", "Mesa", "Bowls", 14200),
+    "Set 2 toallas de mano": ("BZ-BTH-001", "Baño", "Toallas", 8300),
+    "Alfombra de baño antideslizante": ("BZ-BTH-002", "Baño", "Alfombras", 6900),
+    "Juego de toallas baño 3 piezas": ("BZ-BTH-003", "Baño", "Toallas", 15700),
+    "Vela aromática vainilla": ("BZ-DEC-001", "Decoración", "Velas", 5500),
+    "Jarrón decorativo minimalista": ("BZ-DEC-002", "Decoración", "Jarrones", 9800),
+    "Centro de mesa metálico negro": ("BZ-DEC-003", "Decoración", "Centros de mesa", 11200),
+    "Vela aromática frutos rojos": ("BZ-DEC-004", "Decoración", "Velas", 5900),
+    "Lámpara de mesa nórdica": ("BZ-DEC-005", "Decoración", "Iluminación", 18900),
+    "Organizador plástico apilable": ("BZ-ORG-001", "Organización", "Organizadores", 3900),
+    "Organizador cajones bambú": ("BZ-ORG-002", "Organización", "Organizadores", 6200),
+    "Caja organizadora tela con tapa": ("BZ-ORG-003", "Organización", "Organizadores", 5800),
+    "Perchero de pared 5 ganchos": ("BZ-ORG-004", "Organización", "Percheros", 9400),
+    "Botella térmica acero 600ml": ("BZ-STR-001", "Electrohogar pequeño", "Botellas térmicas", 15800),
+    "Termo eléctrico agua 1.8L": ("BZ-STR-002", "Electrohogar pequeño", "Pequeños electrodomésticos", 32500),
+    "Pava eléctrica 1.7L acero": ("BZ-STR-003", "Electrohogar pequeño", "Pequeños electrodomésticos", 28900),
+    "Licuadora de mano 500W": ("BZ-STR-004", "Electrohogar pequeño", "Pequeños electrodomésticos", 24500),
+    "Ventilador de mesa 12 pulgadas": ("BZ-STR-005", "Electrohogar pequeño", "Pequeños electrodomésticos", 38900),
+}
+
+# valor -> peso relativo (proporciones aproximadas del dataset ficticio)
+CANALES = {"Mercado Libre": 30, "TiendaNube": 24, "Instagram Shop": 22, "WhatsApp": 21, "Instagram DM": 15}
+METODOS_PAGO = {"Mercado Pago": 55, "Tarjeta crédito": 30, "Transferencia bancaria": 24, "Tarjeta débito": 3}
+TIPOS_CLIENTE = {"Nuevo": 82, "Recurrente": 30}
+ESTADOS = {"Entregado": 92, "En tránsito": 11, "Cancelado": 9}
+# provincia -> (peso, ciudades)
+PROVINCIAS = {
+    "Buenos Aires": (24, ["La Plata", "Morón", "Lomas de Zamora"]),
+    "CABA": (23, ["CABA"]),
+    "Córdoba": (11, ["Córdoba"]),
+    "Santa Fe": (11, ["Rosario"]),
+    "Mendoza": (11, ["Mendoza"]),
+    "Entre Ríos": (10, ["Paraná"]),
+    "Tucumán": (7, ["San Miguel de Tucumán"]),
+    "Neuquén": (6, ["Neuquén"]),
+    "Salta": (4, ["Salta"]),
+    "Río Negro": (2, ["General Roca"]),
+    "Chaco": (1, ["Resistencia"]),
+    "San Juan": (1, ["San Juan"]),
+    "San Luis": (1, ["San Luis"]),
+}
+NOTAS = [
+    "Pidió envolver para regalo",
+    "Hubo demora del correo",
+    "Dejó reseña positiva en Instagram",
+    "Pidió factura A",
+    "Compra por campaña de anuncios",
+    "Pago rechazado por el banco",
+    "Cliente comentó que el color parecía distinto",
+    "Envío demorado por alta demanda",
+    "Cliente valoró la calidad del vidrio",
+    "Canceló por error en la dirección de envío",
+    "Consultó por stock antes de comprar",
+    "Envío a sucursal pedido por el cliente",
+]
+PCT_NOTAS = 0.5
+DESCUENTOS = [0, 0, 0, 5, 10, 15, 20]
+COSTOS_ENVIO = [0, 2500, 3200, 3900, 4500]
+
+
+def _pick(rng: np.random.Generator, weights: dict, n: int) -> np.ndarray:
+    values = np.array(list(weights), dtype=object)
+    p = np.array(list(weights.values()), dtype="float64")
+    return values[rng.choice(len(values), size=n, p=p / p.sum())]
+
+
+def _comma(values: np.ndarray) -> np.ndarray:
+    """Números con coma decimal, como los exporta Google Sheets en es-AR."""
+    return np.char.replace(np.char.mod("%.1f", values), ".", ",")
+
+
+def generate_ventas(n_rows: int, seed: int = 0, start: str = "2024-01-01",
+                    days: int | None = None) -> pd.DataFrame:
+    """ventas_bazar crudo (columnas y formatos de la hoja), ordenado por fecha.
+
+    Por defecto el rango crece con el volumen (~300 pedidos por día, mínimo un
+    año) para que los cortes por fecha tengan un tamaño realista.
+    """
+    rng = np.random.default_rng(seed)
+    if days is None:
+        days = max(365, n_rows // 300)
+    offsets = np.sort(rng.integers(0, days, n_rows))
+    fechas = (pd.Timestamp(start) + pd.to_timedelta(offsets, unit="D")).strftime("%d/%m/%Y")
+
+    productos = np.array(list(CATALOGO), dtype=object)
+    idx = rng.integers(0, len(productos), n_rows)
+    sku, categoria, subcategoria, precio = (np.array(col, dtype=object) for col in zip(*CATALOGO.values()))
+    precio = precio.astype("int64")[idx]
+
+    provincias = _pick(rng, {k: w for k, (w, _) in PROVINCIAS.items()}, n_rows)
+    ciudades = np.empty(n_rows, dtype=object)
+    for prov, (_, opciones) in PROVINCIAS.items():
+        mask = provincias == prov
+        ciudades[mask] = np.array(opciones, dtype=object)[rng.integers(0, len(opciones), mask.sum())]
+
+    unidades = np.minimum(rng.geometric(0.6, n_rows), 6)
+    descuento = np.array(DESCUENTOS)[rng.integers(0, len(DESCUENTOS), n_rows)]
+    importe = np.round(unidades * precio * (1 - descuento / 100)).astype("int64")
+
+    estado = _pick(rng, ESTADOS, n_rows)
+    entregado = estado == "Entregado"
+    dias = np.where(estado == "Cancelado", 0.0, np.clip(rng.normal(3.6, 1.4, n_rows).round(), 1, 9))
+    resena = np.where(entregado & (rng.random(n_rows) < 0.9), rng.choice([3.0, 4.0, 4.0, 5.0, 5.0], n_rows), np.nan)
+    notas = np.where(rng.random(n_rows) < PCT_NOTAS, np.array(NOTAS, dtype=object)[rng.integers(0, len(NOTAS), n_rows)], None)
+
+    return pd.DataFrame({
+        "id_pedido": np.char.add("CNB-", np.char.zfill(np.arange(1, n_rows + 1).astype("U"), 8)),
+        "fecha_pedido": fechas,
+        "canal": _pick(rng, CANALES, n_rows),
+        "sku": sku[idx],
+        "producto": productos[idx],
+        "categoria": categoria[idx],
+        "subcategoria": subcategoria[idx],
+        "unidades": unidades,
+        "precio_unitario": precio,
+        "descuento_pct": descuento,
+        "importe_total": importe,
+        "costo_envio": np.array(COSTOS_ENVIO)[rng.integers(0, len(COSTOS_ENVIO), n_rows)],
+        "metodo_pago": _pick(rng, METODOS_PAGO, n_rows),
+        "provincia_envio": provincias,
+        "ciudad_envio": ciudades,
+        "tipo_cliente": _pick(rng, TIPOS_CLIENTE, n_rows),
+        "estado_pedido": estado,
+        "dias_entrega": _comma(dias),
+        "reseña": resena,
+        "notas_cliente": notas,
+    })
+
+
+def generate_resumen(ventas_csv: bytes) -> pd.DataFrame:
+    """resumen_diario crudo a partir del CSV de ventas (mismas reglas que el workflow)."""
+    out = compute_resumen(read_ventas_csv(ventas_csv))
+    out["fecha_analizada"] = out["fecha_analizada"].dt.strftime("%d/%m/%Y")
+    for col in ("ticket_promedio_dia", "pct_cancelados_dia", "entrega_promedio_dias", "rating_promedio"):
+        out[col] = _comma(out[col].to_numpy(dtype="float64"))
+    return out
+
+
+def write_standin(root: str, sheet_id: str, gid_ventas: str, gid_resumen: str,
+                  n_rows: int, seed: int = 0) -> dict:
+    """Escribe ``<root>/<sheet_id>/<gid>.csv`` (formato de ``CASANOVA_SHEETS_BASE_URL`` local).
+
+    Si los archivos ya existen se reutilizan: generar 10M filas lleva minutos.
+    """
+    folder = os.path.join(root, sheet_id)
+    os.makedirs(folder, exist_ok=True)
+    paths = {
+        "ventas": os.path.join(folder, f"{gid_ventas}.csv"),
+        "resumen": os.path.join(folder, f"{gid_resumen}.csv"),
+    }
+    if not all(os.path.exists(p) for p in paths.values()):
+        content = generate_ventas(n_rows, seed).to_csv(index=False).encode("utf-8")
+        generate_resumen(content).to_csv(paths["resumen"] + ".tmp", index=False)
+        with open(paths["ventas"] + ".tmp", "wb") as fh:
+            fh.write(content)
+        for p in paths.values():
+            os.replace(p + ".tmp", p)
+    return paths
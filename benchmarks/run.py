@@ -0,0 +1,331 @@
+"""Benchmark del pipeline del dashboard sobre datos sintéticos, sin red.
+
+Uso::
+
+    python -m benchmarks.run                         # 10k, 100k y 1M filas
+    python -m benchmarks.run --sizes 10k,10M --repeat 1 --out bench.json
+    python -m benchmarks.run --baseline bench.json   # compara contra otra corrida
+    python -m benchmarks.run --sizes "" --workbook   # sólo el libro data/CasaNova Bazar.xlsx
+
+Cada tamaño se genera una vez (y se reutiliza en ``--data-dir``); después se
+mide cada etapa por separado, tomando el mínimo de ``--repeat`` corridas.
+El resultado es un JSON con metadatos del entorno y segundos por etapa.
+"""
+import argparse
+import datetime as dt
+import gc
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+import plotly
+
+from benchmarks.generate import write_standin
+from casanova.analytics import Analytics, Dataset, SourceData, SourceSnapshots, View, build_dataset, snapshot_version
+from casanova.charts import bar_chart, hist_chart, line_chart
+from casanova.anomalies import daily_measures, detect, update_anomalies
+from casanova.columnar import ArrowCube, write_partitions
+from casanova.compare import kpi_values
+from casanova.cube import build_cube, filter_rows
+from casanova.ingest import INGEST_VERSION, RESUMEN_VERSION, parse_resumen, parse_ventas
+from casanova.resumen import compute_resumen
+from casanova.schema import VENTAS_SCHEMA, coerce_frame
+from casanova.shards import ShardedCube, build_shards
+from casanova.snapshots import SnapshotStore, load_sheet
+from casanova.sources import Source
+from casanova.transform import finish_ventas, index_by_date, normalize_columns
+from casanova.workbook import WORKBOOK, ArrowStore, load_workbook
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SHEET_ID = "bench"
+GID_VENTAS = "0"
+GID_RESUMEN = "1"
+DEFAULT_SIZES = "10k,100k,1M"
+SUFFIXES = {"k": 1_000, "m": 1_000_000}
+
+
+def parse_size(text: str) -> int:
+    text = text.strip().lower()
+    if text[-1] in SUFFIXES:
+        return int(float(text[:-1]) * SUFFIXES[text[-1]])
+    return int(text)
+
+
+def label(n: int) -> str:
+    for suffix, factor in (("M", 1_000_000), ("k", 1_000)):
+        if n >= factor and n % factor == 0:
+            return f"{n // factor}{suffix}"
+    return str(n)
+
+
+def peak_rss_mib() -> float:
+    # ru_maxrss: KiB en Linux, bytes en macOS.
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (2**20 if sys.platform == "darwin" else 2**10)
+
+
+def timed(fn, repeat: int):
+    """(resultado de la última corrida, segundos de cada corrida)."""
+    runs = []
+    result = None
+    for _ in range(repeat):
+        result = None
+        gc.collect()
+        t = time.perf_counter()
+        result = fn()
+        runs.append(time.perf_counter() - t)
+    return result, runs
+
+
+def default_filters(cube, start, end) -> dict:
+    # Selección típica: sin "Cancelado" y sin el último canal.
+    filters = {}
+    if "estado_pedido" in cube.dims:
+        filters["estado_pedido"] = [v for v in cube.options("estado_pedido", start, end, {}) if v != "Cancelado"]
+    if "canal" in cube.dims:
+        filters["canal"] = cube.options("canal", start, end, {})[:-1]
+    return filters
+
+
+def same_kpis(a, b) -> bool:
+    """KPIs y rankings iguales (las sumas en punto flotante pueden diferir en el último bit)."""
+    da, db = a.to_dict(), b.to_dict()
+    for key, value in da.items():
+        other = db[key]
+        if isinstance(value, dict):
+            if list(value) != list(other) or not np.allclose(list(value.values()), list(other.values()), rtol=1e-9):
+                return False
+        elif isinstance(value, float):
+            if not np.isclose(value, other, rtol=1e-9):
+                return False
+        elif value != other:
+            return False
+    return True
+
+
+def build_figures(an: Analytics, view: View) -> list[str]:
+    """Las figuras de los tabs con el estilo editorial, serializadas como en st.plotly_chart."""
+    kpis = an.kpis(view)
+    resumen = an.resumen_days(view)
+    figs = [
+        line_chart(an.trend(view, use_resumen=False), "fecha", "ventas_netas", "Ventas netas por día", height=540),
+        line_chart(resumen, "fecha_analizada", "ticket_promedio_dia", "Ticket promedio", height=400),
+        bar_chart(kpis.by_channel.reset_index(), "canal", "ventas_netas", "Ventas por canal", height=520),
+        bar_chart(kpis.by_category.reset_index(), "categoria", "ventas_netas", "Ventas por categoría", height=520),
+        bar_chart(kpis.by_product.head(12).reset_index(), "ventas_netas", "producto", "Top 12 productos",
+                  height=600, orientation="h"),
+        bar_chart(an.weekday_sales(view), "dia_semana", "ventas_netas", "Ventas por día de la semana", height=460),
+        hist_chart(an.distribution("dias_entrega", view), "dias_entrega", "Días de entrega", nbins=10, height=470),
+        hist_chart(an.distribution("resena", view), "resena", "Rating", nbins=5, height=470),
+    ]
+    return [fig.to_json() for fig in figs]
+
+
+def bench_size(n_rows: int, data_dir: str, repeat: int, seed: int) -> dict:
+    root = os.path.join(data_dir, f"{label(n_rows)}-s{seed}")
+    t = time.perf_counter()
+    paths = write_standin(root, SHEET_ID, GID_VENTAS, GID_RESUMEN, n_rows, seed)
+    generate_s = time.perf_counter() - t
+
+    stages: dict[str, list[float]] = {}
+
+    def stage(name, fn, times=repeat):
+        result, runs = timed(fn, times)
+        stages[name] = runs
+        return result
+
+    # Camino sin esquema (el de la app original), por partes.
+    raw = stage("read_csv", lambda: pd.read_csv(paths["ventas"]))
+    normalized = stage("normalize", lambda: normalize_columns(raw))
+    stage("coerce", lambda: finish_ventas(coerce_frame(normalized.copy(), VENTAS_SCHEMA)))
+    del raw, normalized
+
+    # Ingesta real: lectura tipada + snapshot Parquet, en un store vacío y con uno ya escrito.
+    with tempfile.TemporaryDirectory() as cache:
+        def ingest():
+            store = SnapshotStore(tempfile.mkdtemp(dir=cache))
+            return load_sheet(SHEET_ID, GID_VENTAS, store=store, base_url=root, max_age=0,
+                              name="ventas", parser=parse_ventas, parser_version=INGEST_VERSION)
+
+        snap = stage("load", ingest)
+        store = SnapshotStore(os.path.join(cache, "hit"))
+        load = lambda: load_sheet(SHEET_ID, GID_VENTAS, store=store, base_url=root, max_age=3600,  # noqa: E731
+                                  name="ventas", parser=parse_ventas, parser_version=INGEST_VERSION)
+        load()
+        stage("load_snapshot", load)
+        resumen_snap = load_sheet(SHEET_ID, GID_RESUMEN, store=store, base_url=root, max_age=0,
+                                  name="resumen", parser=parse_resumen, parser_version=RESUMEN_VERSION)
+    ventas_frame = snap.frame
+    frame_mib = ventas_frame.memory_usage(deep=True).sum() / 2**20
+
+    ventas = stage("index", lambda: index_by_date(ventas_frame, "fecha_pedido"))
+    stage("cube", lambda: build_cube(ventas))
+    source = Source("bench", "bench", SHEET_ID, GID_VENTAS, GID_RESUMEN, base_url=root)
+    cube = ShardedCube(stage("shards", lambda: build_shards(source.label, ventas)), [source.label])
+    # Mismos frames ya medidos, sin memo: cada consulta se calcula de nuevo.
+    part = SourceData(source, ventas, index_by_date(resumen_snap.frame, "fecha_analizada"),
+                      snapshot_version(snap), snapshot_version(resumen_snap))
+    an = Analytics(Dataset([part], cube, part.version, part.resumen_version, resumen_local=False))
+
+    start, end = ventas.index[0].date(), ventas.index[-1].date()
+    mid = start + (end - start) / 2
+    filters = default_filters(cube, start, end)
+    stage("filter_rows", lambda: filter_rows(ventas, mid, end, filters))
+    sel = stage("select", lambda: cube.select(mid, end, filters))
+    stage("kpis", sel.kpis)
+    stage("aggregations", lambda: (
+        sel.daily(), sel.by_weekday(), sel.by("estado_pedido", "filas"),
+        sel.distribution("dias_entrega"), sel.distribution("resena"),
+    ))
+    # Backend columnar: mismas consultas sobre Parquet por mes (cubo nuevo en cada corrida: sin caché).
+    with tempfile.TemporaryDirectory() as lake:
+        part = stage("columnar_write", lambda: write_partitions(source.key, source.label, ventas, lake), times=1)
+        arrow_select = lambda: ArrowCube([part], [source.label]).select(mid, end, filters)  # noqa: E731
+        arrow_kpis = stage("columnar_kpis", lambda: arrow_select().kpis())
+        stage("columnar_aggregations", lambda: (lambda s: (
+            s.daily(), s.by_weekday(), s.by("estado_pedido", "filas"),
+            s.distribution("dias_entrega"), s.distribution("resena"),
+        ))(arrow_select()))
+        parity = same_kpis(sel.kpis(), arrow_kpis)
+
+    # Comparación: sumas acumuladas por día (una vez por filtros) y consulta O(1) del otro período.
+    view = View.of(mid, end, filters)
+    prefix = stage("prefix_sums", lambda: an.prefix_sums(view))
+    other = an.comparison_view(view, "year")
+    stage("compare", lambda: kpi_values(prefix.totals(other.start, other.end)))
+    stage("resumen", lambda: compute_resumen(ventas))
+    # Anomalías: historia completa vs. el último día recién llegado (ingesta incremental).
+    daily = stage("anomalies_daily", lambda: daily_measures(ventas))
+    anomalies = stage("anomalies_detect", lambda: detect(daily))
+    stage("anomalies_update", lambda: update_anomalies(daily, anomalies, ventas, [end.isoformat()]))
+    figs = stage("figures", lambda: build_figures(an, View.of(mid, end, filters)))
+
+    return {
+        "rows": n_rows,
+        "label": label(n_rows),
+        "csv_mib": round(os.path.getsize(paths["ventas"]) / 2**20, 2),
+        "frame_mib": round(float(frame_mib), 2),
+        "cube_cells": cube.n_cells,
+        "figure_json_kib": round(sum(map(len, figs)) / 2**10, 1),
+        "columnar_parity": parity,
+        "generate_s": round(generate_s, 3),
+        "peak_rss_mib": round(peak_rss_mib(), 1),
+        "stages": {
+            name: {"min_s": round(min(runs), 6), "median_s": round(float(np.median(runs)), 6), "runs": len(runs)}
+            for name, runs in stages.items()
+        },
+    }
+
+
+def bench_workbook(path: str, repeat: int) -> dict:
+    """Libro .xlsx local: lectura con openpyxl, apertura de la tabla Arrow cacheada y pipeline completo."""
+    stages: dict[str, list[float]] = {}
+
+    def stage(name, fn):
+        result, runs = timed(fn, repeat)
+        stages[name] = runs
+        return result
+
+    with tempfile.TemporaryDirectory() as cache:
+        stage("xlsx_parse", lambda: load_workbook(path, store=ArrowStore(tempfile.mkdtemp(dir=cache))))
+        store = ArrowStore(os.path.join(cache, "hit"))
+        load_workbook(path, store=store)
+        snaps = stage("xlsx_mmap", lambda: load_workbook(path, store=store))
+        source = Source("xlsx", "xlsx", workbook=path)
+        data = stage("dataset", lambda: build_dataset(
+            [SourceSnapshots(source, snaps["ventas"], snaps.get("resumen"))], store=SnapshotStore(cache)))
+    an = Analytics(data)
+    view = an.default_view()
+    stage("kpis", lambda: an.kpis(view))
+    figs = stage("figures", lambda: build_figures(an, view))
+
+    return {
+        "rows": len(snaps["ventas"].frame),
+        "label": "xlsx",
+        "xlsx_kib": round(os.path.getsize(path) / 2**10, 1),
+        "cube_cells": data.cube.n_cells,
+        "figure_json_kib": round(sum(map(len, figs)) / 2**10, 1),
+        "peak_rss_mib": round(peak_rss_mib(), 1),
+        "stages": {
+            name: {"min_s": round(min(runs), 6), "median_s": round(float(np.median(runs)), 6), "runs": len(runs)}
+            for name, runs in stages.items()
+        },
+    }
+
+
+def environment() -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO,
+                                capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": dt.datetime.now(dt.timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "plotly": plotly.__version__,
+    }
+
+
+def compare(results: dict, baseline: dict) -> list[str]:
+    """Líneas ``tamaño etapa antes → ahora (ratio)`` para las etapas en común."""
+    before = {r["label"]: r["stages"] for r in baseline.get("results", [])}
+    lines = []
+    for r in results["results"]:
+        for name, now in r["stages"].items():
+            old = before.get(r["label"], {}).get(name)
+            if old and old["min_s"] > 0:
+                ratio = now["min_s"] / old["min_s"]
+                lines.append(f"{r['label']:>6} {name:<14} {old['min_s']:9.4f}s → {now['min_s']:9.4f}s  ×{ratio:.2f}")
+    return lines
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="tamaños separados por coma (10k, 1M, 10M…)")
+    parser.add_argument("--repeat", type=int, default=3, help="corridas por etapa (se reporta el mínimo)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--data-dir", default=os.path.join(REPO, ".cache", "bench"),
+                        help="dónde guardar los CSV sintéticos generados")
+    parser.add_argument("--out", help="archivo JSON de salida (por defecto, stdout)")
+    parser.add_argument("--baseline", help="JSON de una corrida anterior para comparar")
+    parser.add_argument("--workbook", nargs="?", const=str(WORKBOOK),
+                        help="medir también un libro .xlsx local (por defecto, el de data/)")
+    args = parser.parse_args(argv)
+
+    results = {"environment": environment(), "repeat": args.repeat, "seed": args.seed, "results": []}
+    for size in filter(None, args.sizes.split(",")):
+        n_rows = parse_size(size)
+        print(f"· {label(n_rows)} filas…", file=sys.stderr)
+        results["results"].append(bench_size(n_rows, args.data_dir, args.repeat, args.seed))
+    if args.workbook:
+        print(f"· {os.path.basename(args.workbook)}…", file=sys.stderr)
+        results["results"].append(bench_workbook(args.workbook, args.repeat))
+
+    text = json.dumps(results, indent=2, ensure_ascii=False)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as fh:
+            fh.write(text + "\n")
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as fh:
+            for line in compare(results, json.load(fh)):
+                print(line, file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+"""Servidor HTTP local que imita la exportación CSV de Google Sheets.
+
+Sirve ``<root>/<sheet_id>/<gid>.csv`` en las dos formas de URL que usa la app
+(``/<sheet_id>/export?format=csv&gid=…`` y ``/<sheet_id>/gviz/tq?tqx=out:csv&gid=…``),
+con ETag / Last-Modified y 304. Permite simular demoras y fallas por URL para
+probar reintentos y cobertura sin red::
+
+    python -m benchmarks.sheets_server --root .cache/bench/1M-s0 --port 8765 --export-delay 5
+    CASANOVA_SHEETS_BASE_URL=http://127.0.0.1:8765 streamlit run app.py
+"""
+import argparse
+import email.utils
+import hashlib
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+class SheetsHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"   # keep-alive, como Google
+    # Configuración por servidor (ver serve): root, delay, fail_rate, status por forma de URL.
+    server: "SheetsServer"
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        parts = url.path.strip("/").split("/")
+        gid = parse_qs(url.query).get("gid", [None])[0]
+        form = "export" if parts[-1] == "export" else "gviz" if parts[-2:] == ["gviz", "tq"] else None
+        self.server.hits[form] = self.server.hits.get(form, 0) + 1
+
+        delay = self.server.delay.get(form, 0)
+        if delay:
+            time.sleep(delay)
+        if form is None or gid is None:
+            return self._empty(404)
+        if form in self.server.fail or random.random() < self.server.fail_rate:
+            return self._empty(503)
+
+        path = os.path.join(self.server.root, parts[0], f"{gid}.csv")
+        if not os.path.exists(path):
+            return self._empty(404)
+        with open(path, "rb") as fh:
+            body = fh.read()
+        etag = '"' + hashlib.md5(body).hexdigest() + '"'
+        modified = email.utils.formatdate(os.path.getmtime(path), usegmt=True)
+        if self.headers.get("If-None-Match") == etag:
+            return self._empty(304, {"ETag": etag, "Last-Modified": modified})
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/csv; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", modified)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _empty(self, status: int, headers: dict | None = None):
+        self.send_response(status)
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+class SheetsServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, root: str, port: int = 0, delay: dict | None = None,
+                 fail: set | None = None, fail_rate: float = 0.0):
+        super().__init__(("127.0.0.1", port), SheetsHandler)
+        self.root = root
+        self.delay = delay or {}   # forma de URL ("export" / "gviz") -> segundos
+        self.fail = fail or set()  # formas de URL que responden 503
+        self.fail_rate = fail_rate
+        self.hits: dict = {}
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+def serve(root: str, port: int = 0, **kwargs) -> SheetsServer:
+    """Arranca el servidor en un hilo; usar ``server.base_url`` y ``server.shutdown()``."""
+    server = SheetsServer(root, port, **kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Stand-in local de la exportación CSV de Google Sheets.")
+    parser.add_argument("--root", required=True, help="directorio con <sheet_id>/<gid>.csv")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--export-delay", type=float, default=0, help="segundos de demora en /export")
+    parser.add_argument("--gviz-delay", type=float, default=0, help="segundos de demora en /gviz/tq")
+    parser.add_argument("--fail", action="append", choices=["export", "gviz"], default=[],
+                        help="forma de URL que responde 503 (repetible)")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="probabilidad de 503 en cualquier pedido")
+    args = parser.parse_args(argv)
+
+    server = SheetsServer(args.root, args.port, delay={"export": args.export_delay, "gviz": args.gviz_delay},
+                          fail=set(args.fail), fail_rate=args.fail_rate)
+    print(f"Sirviendo {args.root} en {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1 @@
+"""Núcleo de datos de CasaNova Bazar (sin dependencias de Streamlit)."""
@@ -0,0 +1,549 @@
+"""Capa analítica del dashboard, sin Streamlit.
+
+Todo entra explícito: snapshots de cada fuente → ``Dataset`` (frames
+indexados por fecha, cubo particionado por tienda y mes, y versión de datos) y
+una ``View`` (rango de fechas + filtros). Las consultas de ``Analytics``
+devuelven frames chicos o ``KpiResult``; la app, el batch y los benchmarks las
+usan igual. Con un ``Memo`` cada resultado se calcula una vez por versión de
+datos y vista.
+"""
+import datetime as dt
+import functools
+from dataclasses import dataclass
+from typing import Sequence
+
+import numpy as np
+import pandas as pd
+
+from casanova.anomalies import COLUMNS as ANOMALY_COLUMNS, TOTAL, anomaly_table
+from casanova.columnar import BACKEND, COLUMNAR_DIR, ArrowCube, ColumnarPart, columnar_root, open_partitions, write_partitions
+from casanova.compare import PrefixSums, align, comparison_range, kpi_values
+from casanova.cube import filter_rows
+from casanova.ingest import INGEST_VERSION, RESUMEN_VERSION, parse_resumen, parse_ventas
+from casanova.kpis import KpiResult
+from casanova.memo import Memo, freeze
+from casanova.notes import NOTES_COL, NoteIndex, notes_vocabulary, tokenize
+from casanova.perf import stage, timed
+from casanova.resumen import combine_resumen, local_resumen
+from casanova.schema import concat_typed
+from casanova.shards import TIENDA, ShardedCube, ShardedSlice, build_shards, fingerprint, month_parts
+from casanova.snapshots import SheetSnapshot, SnapshotStore, load_sheet, load_sheets
+from casanova.sources import Source, load_sources
+from casanova.transform import date_slice, index_by_date, prepare_ventas
+from casanova.workbook import load_workbook
+
+SNAPSHOT_MAX_AGE = 300   # segundos: snapshot local servido sin consultar Google
+# Filtros del sidebar, en el orden en que se encadenan sus opciones ("tienda" sólo con varias fuentes).
+FILTER_DIMS = [TIENDA, "canal", "categoria", "provincia_envio", "estado_pedido"]
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+
+def _ventas_job(sheet_id: str, gid: str, max_age: float, incremental: bool, store,
+                base_url: str | None = None) -> dict:
+    # ventas_bazar: snapshot ya tipado (incremental) o el CSV crudo de la hoja.
+    job = {"sheet_id": sheet_id, "gid": gid, "store": store, "max_age": max_age, "base_url": base_url}
+    if incremental:
+        job.update(name="ventas", parser=parse_ventas, parser_version=INGEST_VERSION)
+    return job
+
+
+def _resumen_job(sheet_id: str, gid: str, max_age: float, store, base_url: str | None = None) -> dict:
+    return {"sheet_id": sheet_id, "gid": gid, "store": store, "max_age": max_age, "base_url": base_url,
+            "name": "resumen", "parser": parse_resumen, "parser_version": RESUMEN_VERSION}
+
+
+def load_ventas_snapshot(sheet_id: str, gid: str, *, max_age: float = SNAPSHOT_MAX_AGE,
+                         incremental: bool = True, store: SnapshotStore | None = None) -> SheetSnapshot:
+    return load_sheet(**_ventas_job(sheet_id, gid, max_age, incremental, store))
+
+
+def load_resumen_snapshot(sheet_id: str, gid: str, *, max_age: float = SNAPSHOT_MAX_AGE,
+                          store: SnapshotStore | None = None) -> SheetSnapshot:
+    return load_sheet(**_resumen_job(sheet_id, gid, max_age, store))
+
+
+@dataclass
+class SourceSnapshots:
+    source: Source
+    ventas: SheetSnapshot
+    resumen: SheetSnapshot | None   # None si la fuente no declara resumen_diario
+
+    @property
+    def snapshots(self) -> list[SheetSnapshot]:
+        return [s for s in (self.ventas, self.resumen) if s is not None]
+
+
+def load_snapshots(sources: Sequence[Source] | None = None, *, max_age: float = SNAPSHOT_MAX_AGE,
+                   incremental: bool = True, store: SnapshotStore | None = None,
+                   lazy: bool = False) -> list[SourceSnapshots]:
+    """Pestañas de todas las fuentes (``load_sources()`` por defecto), descargadas en paralelo.
+
+    Con ``lazy`` los snapshots de ventas no traen el frame: ``build_dataset(backend="arrow")``
+    lo lee sólo si tiene que (re)armar particiones o tablas derivadas.
+    """
+    sources = list(sources) if sources is not None else list(load_sources())
+    jobs = {}
+    for s in sources:
+        if s.workbook:
+            continue
+        jobs[f"{s.key}/ventas"] = {**_ventas_job(s.sheet_id, s.gid_ventas, max_age, incremental, store, s.base_url),
+                                   "lazy": lazy}
+        if s.gid_resumen:
+            jobs[f"{s.key}/resumen"] = _resumen_job(s.sheet_id, s.gid_resumen, max_age, store, s.base_url)
+    snaps = load_sheets(jobs)
+    for s in sources:
+        if s.workbook:
+            # Libro local: tablas Arrow con memory-map mientras el .xlsx no cambie.
+            with stage(f"workbook:{s.key}"):
+                for name, snap in load_workbook(s.workbook, lazy=lazy).items():
+                    snaps[f"{s.key}/{name}"] = snap
+    return [SourceSnapshots(s, snaps[f"{s.key}/ventas"], snaps.get(f"{s.key}/resumen")) for s in sources]
+
+
+def snapshot_version(snap: SheetSnapshot) -> str:
+    return f"{snap.meta.sha256}:{snap.meta.parser_version}"
+
+
+def _memo(memo: Memo | None, namespace: str, key, compute, name: str | None = None):
+    # ``name``: etapa de casanova.perf; sólo se mide cuando hay que calcular (no en los aciertos).
+    if name is not None:
+        compute = timed(name, compute)
+    return compute() if memo is None else memo.get(namespace, key, compute)
+
+
+@dataclass(frozen=True)
+class View:
+    """Rango de fechas (días completos) + filtros por dimensión."""
+    start: dt.date
+    end: dt.date
+    filters: tuple = ()   # freeze({col: valores})
+
+    @classmethod
+    def of(cls, start: dt.date, end: dt.date, filters: dict | None = None) -> "View":
+        return cls(start, end, freeze(filters or {}))
+
+    @property
+    def filter_dict(self) -> dict:
+        return {col: list(values) for col, values in self.filters}
+
+
+@dataclass
+class SourceData:
+    source: Source
+    ventas: pd.DataFrame    # indexado por fecha_pedido (index_by_date)
+    resumen: pd.DataFrame   # indexado por fecha_analizada si la columna existe
+    version: str            # versión de ventas (hash del snapshot + parser)
+    resumen_version: str
+    notes: pd.DataFrame | None = None   # vocabulario de notas_cliente (casanova.notes)
+    columnar: ColumnarPart | None = None  # backend "arrow": filas en Parquet y ``ventas`` sin filas
+    anomalies: pd.DataFrame | None = None  # picos y caídas de los KPIs diarios (casanova.anomalies)
+
+    @property
+    def span(self) -> tuple[pd.Timestamp, pd.Timestamp] | None:
+        """Primer y último pedido (``None`` sin filas con fecha)."""
+        if self.columnar is not None:
+            return self.columnar.span
+        return (self.ventas.index[0], self.ventas.index[-1]) if len(self.ventas) else None
+
+    def rows(self, view: "View") -> pd.DataFrame:
+        """Filas crudas de la vista: recorte en memoria o lectura filtrada de Parquet."""
+        if self.columnar is not None:
+            return self.columnar.read(view.start, view.end, view.filter_dict)
+        return filter_rows(self.ventas, view.start, view.end, view.filter_dict)
+
+
+@dataclass
+class Dataset:
+    parts: list[SourceData]   # una por fuente con ventas, en el orden del registro
+    cube: ShardedCube | ArrowCube
+    version: str
+    resumen_version: str
+    resumen_local: bool       # resumen calculado en Python en vez de n8n
+
+    @property
+    def min_date(self) -> dt.date:
+        return min(p.span[0] for p in self.parts).date()
+
+    @property
+    def max_date(self) -> dt.date:
+        return max(p.span[1] for p in self.parts).date()
+
+    @property
+    def ventas_columns(self) -> set:
+        return set().union(*(p.ventas.columns for p in self.parts))
+
+    @property
+    def resumen_columns(self) -> set:
+        return set().union(*(p.resumen.columns for p in self.parts))
+
+    def parts_for(self, view: View) -> list[SourceData]:
+        """Fuentes elegidas en el filtro "tienda" (todas si no se filtra)."""
+        tiendas = dict(view.filters).get(TIENDA)
+        return [p for p in self.parts if tiendas is None or p.source.label in tiendas]
+
+    def full_view(self) -> View:
+        return View(self.min_date, self.max_date)
+
+
+def _source_data(snaps: SourceSnapshots, tienda: str | None, resumen_local: bool,
+                 memo: Memo | None, store: SnapshotStore | None, backend: str = "pandas") -> SourceData:
+    version = snapshot_version(snaps.ventas)
+
+    def ventas_frame():
+        # El snapshot incremental ya viene tipado; el CSV crudo se normaliza acá.
+        frame = snaps.ventas.frame
+        if snaps.ventas.meta.parser_version != INGEST_VERSION:
+            frame = prepare_ventas(frame)
+        if tienda is not None:
+            frame = frame.assign(**{TIENDA: pd.Categorical.from_codes(np.zeros(len(frame), dtype=np.int8), [tienda])})
+        return index_by_date(frame, "fecha_pedido")
+
+    columnar = None
+    if backend == "arrow":
+        # Las filas van a Parquet por mes y no quedan en el memo ni en el snapshot (``lazy``):
+        # el frame se arma sólo al ingerir una versión nueva o si hay que recalcular tablas derivadas.
+        full = functools.cache(ventas_frame)
+        # Las particiones van junto a los snapshots (el store pasado o el del propio snapshot).
+        base = store or snaps.ventas.store
+        root = columnar_root(base) if base is not None else COLUMNAR_DIR
+        columnar = _memo(memo, "frames", (version, "columnar", tienda),
+                         lambda: open_partitions(snaps.source.key, snaps.source.label, f"{version}:{tienda}", root)
+                         or write_partitions(snaps.source.key, snaps.source.label, full(), root,
+                                             version=f"{version}:{tienda}"),
+                         name=f"columnar:{snaps.source.key}")
+        ventas = columnar.empty
+    else:
+        ventas = _memo(memo, "frames", (version, "ventas", tienda), ventas_frame, name=f"ventas:{snaps.source.key}")
+        full = lambda: ventas  # noqa: E731
+
+    if resumen_local:
+        # Port del nodo de n8n: sólo recalcula los días con pedidos nuevos.
+        resumen_version = f"local:{version}"
+        resumen = _memo(memo, "frames", (version, "resumen_local"),
+                        lambda: index_by_date(local_resumen(snaps.ventas, full, store), "fecha_analizada"),
+                        name=f"resumen_local:{snaps.source.key}")
+    elif snaps.resumen is not None:
+        resumen_version = snapshot_version(snaps.resumen)
+        resumen = snaps.resumen.frame
+        if "fecha_analizada" in resumen.columns:
+            resumen = _memo(memo, "frames", (resumen_version, "resumen"),
+                            lambda: index_by_date(resumen, "fecha_analizada"),
+                            name=f"resumen:{snaps.source.key}")
+    else:
+        resumen_version, resumen = "none", pd.DataFrame()
+
+    notes = None
+    if NOTES_COL in ventas.columns:
+        # Sólo se tokenizan las notas que no estaban en la versión anterior.
+        notes = _memo(memo, "frames", (version, "notes"), lambda: notes_vocabulary(snaps.ventas, full, store),
+                      name=f"notes:{snaps.source.key}")
+
+    # Se guardan junto al snapshot: tras una ingesta incremental sólo se evalúan los días nuevos.
+    anomalies = _memo(memo, "frames", (version, "anomalies"), lambda: anomaly_table(snaps.ventas, full, store),
+                      name=f"anomalies:{snaps.source.key}")
+    return SourceData(snaps.source, ventas, resumen, version, resumen_version, notes, columnar, anomalies)
+
+
+def build_dataset(snapshots: Sequence[SourceSnapshots], *, resumen_local: bool = False,
+                  memo: Memo | None = None, store: SnapshotStore | None = None,
+                  backend: str = BACKEND) -> Dataset:
+    """Frames indexados + cubo particionado para los snapshots de cada fuente.
+
+    Las fuentes sin ninguna fecha_pedido válida se omiten; si no queda
+    ninguna, lanza ``ValueError``. Con ``backend="arrow"`` las ventas quedan en
+    Parquet y las consultas van a ``casanova.columnar`` (ver ``BACKENDS``).
+    """
+    multi = len(snapshots) > 1
+    parts = [_source_data(s, s.source.label if multi else None, resumen_local, memo, store, backend)
+             for s in snapshots]
+    parts = [p for p in parts if p.span is not None]
+    if not parts:
+        raise ValueError("No hay filas con fecha_pedido válida en ventas_bazar.")
+    if backend == "arrow":
+        return Dataset(parts, ArrowCube([p.columnar for p in parts], [p.source.label for p in parts]),
+                       *_versions(parts), resumen_local)
+
+    # Un cubo por tienda y mes: al cambiar la versión sólo se rearman los meses cuyas filas cambiaron.
+    shards = []
+    for p in parts:
+        if memo is None:
+            with stage(f"shards:{p.source.key}"):
+                shards += build_shards(p.source.label, p.ventas)
+            continue
+        prints = _memo(memo, "frames", (p.version, "fingerprints"),
+                       lambda p=p: {m: fingerprint(rows) for m, rows in month_parts(p.ventas)},
+                       name=f"fingerprints:{p.source.key}")
+        keys = {m: (p.source.key, m, fp) for m, fp in prints.items()}
+        cached = {m: cube for m, key in keys.items() if (cube := memo.peek("shards", key)) is not None}
+        with stage(f"shards:{p.source.key}"):
+            part_shards = build_shards(p.source.label, p.ventas, cached)
+        for shard in part_shards:
+            if shard.start not in cached:
+                memo.put("shards", keys[shard.start], shard.cube)
+        shards += part_shards
+    cube = ShardedCube(shards, [p.source.label for p in parts])
+    return Dataset(parts, cube, *_versions(parts), resumen_local)
+
+
+def _versions(parts: list[SourceData]) -> tuple[str, str]:
+    # Versión de ventas y de resumen_diario del dataset (una por tienda si hay varias).
+    if len(parts) > 1:
+        return ("|".join(f"{p.source.key}={p.version}" for p in parts),
+                "|".join(f"{p.source.key}={p.resumen_version}" for p in parts))
+    return parts[0].version, parts[0].resumen_version
+
+
+class Analytics:
+    """Consultas sobre un ``Dataset``; cada una depende sólo de sus entradas."""
+
+    def __init__(self, data: Dataset, memo: Memo | None = None):
+        self.data = data
+        self.memo = memo
+
+    def _get(self, name: str, key: tuple, compute):
+        return _memo(self.memo, "agg", (name,) + key, compute, name=f"agg:{name}")
+
+    def view_key(self, view: View) -> tuple:
+        """Clave de resultados que dependen de ventas: versión + rango + filtros."""
+        return (self.data.version, view)
+
+    def range_key(self, view: View) -> tuple:
+        """Clave de resultados de resumen_diario: versión + rango + tiendas (ignora el resto de los filtros)."""
+        return (self.data.resumen_version, view.start, view.end, dict(view.filters).get(TIENDA))
+
+    # --- ventas_bazar (cubo) ---
+    def options(self, col: str, view: View) -> list:
+        """Valores de ``col`` presentes con los filtros de ``view`` (filtros en cascada)."""
+        if col not in self.data.cube.dims:
+            return []
+        return self.data.cube.options(col, view.start, view.end, view.filter_dict)
+
+    def default_view(self, start: dt.date | None = None, end: dt.date | None = None) -> View:
+        """Vista con todos los valores seleccionados (lo que muestra la app al abrir)."""
+        start = start or self.data.min_date
+        end = end or self.data.max_date
+        filters = {}
+        for col in FILTER_DIMS:
+            if col in self.data.cube.dims:
+                filters[col] = self.options(col, View.of(start, end, filters))
+        return View.of(start, end, filters)
+
+    def selection(self, view: View) -> ShardedSlice:
+        return self.data.cube.select(view.start, view.end, view.filter_dict)
+
+    def _orders(self, view: View) -> pd.DataFrame:
+        """Pedidos de ``view`` contados sobre las filas (como el cubo: sin dimensiones vacías).
+
+        Para cuando el cubo sólo tiene la estimación HLL (pedidos repetidos entre celdas).
+        """
+        rows = self.rows(view)
+        dims = [d for d in self.data.cube.dims if d in rows.columns]
+        keys = ["id_pedido"] + ([TIENDA] if TIENDA in rows.columns else [])
+        rows = rows.loc[rows[dims].notna().all(axis=1)]
+        return rows[keys].assign(fecha=rows["fecha_pedido"].dt.normalize().to_numpy())
+
+    def kpis(self, view: View) -> KpiResult:
+        # Una sola pasada: KPIs del encabezado + rankings que reutilizan Highlights y Comercial.
+        def compute():
+            selection = self.selection(view)
+            if selection.exact:
+                return selection.kpis()
+            orders = self._orders(view)
+            return selection.kpis(len(orders.drop(columns="fecha").drop_duplicates()))
+        return self._get("kpis", self.view_key(view), compute)
+
+    def rows(self, view: View) -> pd.DataFrame:
+        """Filas crudas filtradas (tabla de Datos y Voice of Customer)."""
+        def compute():
+            # Sólo las fuentes elegidas; cada una se recorta (búsqueda binaria o lectura filtrada) antes de unirlas.
+            parts = [p.rows(view) for p in self.data.parts_for(view)]
+            return concat_typed(parts) if parts else self.data.parts[0].ventas.iloc[:0]
+        return self._get("rows", self.view_key(view), compute)
+
+    def daily_sales(self, view: View) -> pd.DataFrame:
+        return self._get("daily", self.view_key(view),
+                         lambda: self.selection(view).daily().rename_axis("fecha").reset_index())
+
+    def weekday_sales(self, view: View) -> pd.DataFrame:
+        def compute():
+            by_dow = self.selection(view).by_weekday().rename_axis("dia_semana").reset_index()
+            by_dow["dia_semana"] = pd.Categorical(by_dow["dia_semana"], categories=WEEKDAYS, ordered=True)
+            return by_dow.sort_values("dia_semana")
+        return self._get("weekday", self.view_key(view), compute)
+
+    def order_states(self, view: View) -> pd.DataFrame:
+        return self._get("estados", self.view_key(view), lambda: (
+            self.selection(view).by("estado_pedido", "filas").rename_axis("estado").reset_index(name="conteo")
+        ))
+
+    def distribution(self, col: str, view: View) -> pd.DataFrame:
+        """Conteo por valor de ``dias_entrega`` / ``resena`` (> 0) para histogramas."""
+        return self._get(f"dist_{col}", self.view_key(view), lambda: self.selection(view).distribution(col))
+
+    # --- notas_cliente ---
+    def note_index(self) -> NoteIndex:
+        """Índice invertido y etiquetas sobre las notas de todas las tiendas."""
+        return _memo(self.memo, "frames", (self.data.version, "note_index"),
+                     lambda: NoteIndex.build([p.notes for p in self.data.parts if p.notes is not None]),
+                     name="note_index")
+
+    def _note_ids(self, view: View) -> np.ndarray:
+        # Id de nota por fila filtrada: se calcula una vez por vista y lo reusan etiquetas y búsquedas.
+        return self._get("note_ids", self.view_key(view),
+                         lambda: self.note_index().ids_of(self.rows(view)[NOTES_COL]))
+
+    def note_tags(self, view: View) -> pd.DataFrame:
+        """Filas con nota por etiqueta (``etiqueta``, ``notas``, ``pct``), de mayor a menor."""
+        def compute():
+            index, ids = self.note_index(), self._note_ids(view)
+            with_note = int((ids >= 0).sum())
+            counts = pd.DataFrame({
+                "etiqueta": list(index.tags),
+                "notas": [int(index.mask(ids, tag_ids).sum()) for tag_ids in index.tags.values()],
+            })
+            counts["pct"] = (counts["notas"] / with_note).round(4) if with_note else 0.0
+            return counts.sort_values("notas", ascending=False, kind="stable", ignore_index=True)
+        return self._get("note_tags", self.view_key(view), compute)
+
+    def notes(self, view: View, tags: tuple = (), query: str = "") -> pd.DataFrame:
+        """Filas con nota que tienen alguna de ``tags`` y todas las palabras de ``query`` (sin tildes)."""
+        def compute():
+            index, ids = self.note_index(), self._note_ids(view)
+            mask = ids >= 0
+            if tags:
+                mask = mask & index.mask(ids, index.tagged(tags))
+            found = index.search(query)
+            if found is not None:
+                mask = mask & index.mask(ids, found)
+            rows = self.rows(view)
+            cols = [c for c in ("fecha_pedido", TIENDA, "canal", "producto", NOTES_COL) if c in rows.columns]
+            out = rows.loc[mask, cols].reset_index(drop=True)
+            out["etiquetas"] = index.labels(ids[mask])
+            return out.sort_values("fecha_pedido", ascending=False, kind="stable", ignore_index=True)
+        return self._get("notes", self.view_key(view) + (tuple(sorted(tags)), tuple(tokenize(query))), compute)
+
+    # --- resumen_diario ---
+    @property
+    def has_resumen(self) -> bool:
+        return "fecha_analizada" in self.data.resumen_columns
+
+    def trend_uses_resumen(self, use_resumen: bool) -> bool:
+        return use_resumen and self.has_resumen and "ventas_netas_dia" in self.data.resumen_columns
+
+    def trend(self, view: View, use_resumen: bool) -> pd.DataFrame:
+        """Ventas netas por día (``fecha``, ``ventas_netas``): resumen_diario o recalculadas."""
+        if not self.trend_uses_resumen(use_resumen):
+            return self.daily_sales(view)
+        return self._get("trend", self.range_key(view), lambda: (
+            self.resumen_days(view).rename(columns={"fecha_analizada": "fecha", "ventas_netas_dia": "ventas_netas"})
+        ))
+
+    def resumen_days(self, view: View) -> pd.DataFrame:
+        """Filas de resumen_diario en el rango (vista, sin copia con una sola tienda)."""
+        parts = [date_slice(p.resumen, view.start, view.end)
+                 for p in self.data.parts_for(view) if "fecha_analizada" in p.resumen.columns]
+        if len(parts) == 1:
+            return parts[0]
+        # Varias tiendas: un día por fila, sumando y ponderando sus métricas.
+        return self._get("resumen_days", self.range_key(view),
+                         lambda: index_by_date(combine_resumen(parts), "fecha_analizada"))
+
+    def alerts(self, view: View) -> pd.DataFrame:
+        """Días con observaciones distintas de OK, del más reciente al más viejo."""
+        def compute():
+            r = self.resumen_days(view)
+            r = r[r["observaciones"].astype(str).str.strip().str.upper() != "OK"]
+            return r[["fecha_analizada", "observaciones"]].iloc[::-1]
+        return self._get("alerts", self.range_key(view), compute)
+
+    # --- anomalías ---
+    def anomalies(self, view: View) -> pd.DataFrame:
+        """Picos y caídas en el rango, de la más reciente a la más vieja.
+
+        Siempre incluye las del total de cada tienda elegida; las de un canal,
+        categoría o provincia sólo si ese valor está seleccionado. Se detectan
+        al ingerir sobre todos los pedidos, así que ignoran ``estado_pedido``.
+        """
+        def compute():
+            filters = dict(view.filters)
+            start, end = pd.Timestamp(view.start), pd.Timestamp(view.end) + pd.Timedelta(days=1)
+            frames = []
+            for p in self.data.parts_for(view):
+                if p.anomalies is None or p.anomalies.empty:
+                    continue
+                a = p.anomalies
+                keep = (a["fecha"] >= start) & (a["fecha"] < end)
+                for col, selected in filters.items():
+                    keep &= (a["dimension"] != col) | a["valor"].isin(selected)
+                a = a[keep]
+                frames.append(a.assign(**{TIENDA: p.source.label}) if len(self.data.parts) > 1 else a)
+            if not frames:
+                return pd.DataFrame(columns=ANOMALY_COLUMNS)
+            out = pd.concat(frames, ignore_index=True)
+            order = out.assign(peso=out["desvio"].abs(), total=out["dimension"] == TOTAL)
+            order = order.sort_values(["fecha", "total", "peso"], ascending=False, kind="stable")
+            return out.loc[order.index].reset_index(drop=True)
+        return self._get("anomalies", self.view_key(view), compute)
+
+    # --- comparación de períodos ---
+    def prefix_sums(self, view: View) -> PrefixSums:
+        """Sumas acumuladas por día de toda la historia con los filtros de ``view`` (el rango no importa)."""
+        def compute():
+            cube = self.data.cube.select(self.data.min_date, self.data.max_date, view.filter_dict)
+            daily = cube.daily_totals()
+            if not cube.exact and len(daily):
+                # Mismo conteo exacto que el encabezado: el delta no mezcla estimadores.
+                orders = self._orders(View(self.data.min_date, self.data.max_date, view.filters))
+                per_day = orders.drop_duplicates().groupby("fecha").size()
+                daily["pedidos"] = per_day.reindex(daily.index, fill_value=0).to_numpy()
+            return PrefixSums.build(daily)
+        return self._get("prefix", (self.data.version, view.filters), compute)
+
+    def comparison_filters(self, view: View) -> tuple:
+        """Filtros de ``view`` para el período de comparación.
+
+        Una dimensión con todas las opciones del rango elegidas (como la arma
+        el sidebar, en cascada) no filtra: si no, los valores que sólo aparecen
+        en el otro período quedarían afuera de sus totales.
+        """
+        def compute():
+            filters = view.filter_dict
+            kept, prior = {}, {}
+            for col in sorted(filters, key=lambda c: FILTER_DIMS.index(c) if c in FILTER_DIMS else len(FILTER_DIMS)):
+                values = filters[col]
+                options = self.options(col, View.of(view.start, view.end, prior))
+                if not values or not set(options) <= set(values):
+                    kept[col] = values
+                prior[col] = values
+            return freeze(kept)
+        return self._get("comparison_filters", self.view_key(view), compute)
+
+    def comparison_view(self, view: View, mode: str) -> View | None:
+        """Misma vista sobre el período de comparación (``None`` sin comparación)."""
+        span = comparison_range(view.start, view.end, mode)
+        return None if span is None else View(*span, self.comparison_filters(view))
+
+    def comparison(self, view: View, mode: str) -> dict | None:
+        """KPIs del encabezado en el período de comparación (``start``, ``end`` y los de ``KpiResult``)."""
+        other = self.comparison_view(view, mode)
+        if other is None:
+            return None
+        return {"start": other.start, "end": other.end, **kpi_values(self.prefix_sums(other).totals(other.start, other.end))}
+
+    def trend_comparison(self, view: View, use_resumen: bool, mode: str) -> pd.DataFrame | None:
+        """Tendencia del período de comparación corrida sobre las fechas de ``view``."""
+        other = self.comparison_view(view, mode)
+        if other is None:
+            return None
+        if self.trend_uses_resumen(use_resumen):
+            frame = self.trend(other, use_resumen)
+        else:
+            frame = self.prefix_sums(other).daily(other.start, other.end)[["fecha", "ventas_netas"]]
+        return align(frame, "fecha", view.start, view.end, mode)
+
+    def resumen_comparison(self, view: View, mode: str) -> pd.DataFrame | None:
+        """Filas de resumen_diario del período de comparación corridas sobre las fechas de ``view``."""
+        other = self.comparison_view(view, mode)
+        if other is None:
+            return None
+        return align(self.resumen_days(other), "fecha_analizada", view.start, view.end, mode)
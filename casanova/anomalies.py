@@ -0,0 +1,192 @@
+"""Anomalías en los KPIs diarios: total y por canal, categoría y provincia.
+
+Por día se agregan ventas, pedidos, cancelados, entrega y reseñas de cada
+serie (el total de la tienda y cada valor de ``DIMS``). Cada día se compara
+con la mediana y la MAD de los ``WINDOW`` días anteriores: si el desvío
+robusto supera ``THRESHOLD`` es un pico o una caída. Las medidas diarias y
+las anomalías se guardan junto al snapshot de ventas; tras una ingesta
+incremental sólo se reagregan los días con pedidos nuevos y se evalúan de
+nuevo los días desde el primero de ellos (los anteriores no cambian: cada
+día sólo mira hacia atrás).
+"""
+import time
+import warnings
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from casanova.cube import is_cancelado
+from casanova.snapshots import SheetSnapshot, SnapshotMeta, SnapshotStore
+from casanova.transform import date_slice
+
+ENGINE_VERSION = "anomalias-1"
+
+DIMS = ["canal", "categoria", "provincia_envio"]
+TOTAL = "total"
+SERIES = {TOTAL: "Total", "canal": "Canal", "categoria": "Categoría", "provincia_envio": "Provincia"}
+WINDOW = 28          # días de historia con los que se compara cada día
+MIN_HISTORY = 14     # días con dato dentro de la ventana para evaluar
+MIN_ORDERS = 10      # pedidos (entregas, reseñas) del día para evaluar una tasa o un promedio
+THRESHOLD = 3.5      # |valor - mediana| / (1.4826 · MAD)
+# KPI -> (etiqueta, piso del desvío absoluto, piso relativo a la mediana)
+KPIS = {
+    "ventas": ("Ventas netas", 0.0, 0.1),
+    "pct_cancel": ("% Cancelados", 0.02, 0.0),
+    "entrega": ("Entrega prom. (días)", 0.25, 0.0),
+    "rating": ("Rating prom.", 0.1, 0.0),
+}
+SUMS = ["pedidos", "ventas_netas", "cancelados", "entrega_sum", "entrega_n", "resena_sum", "resena_n"]
+DAILY_COLUMNS = ["fecha", "dimension", "valor", *SUMS]
+COLUMNS = ["fecha", "dimension", "valor", "kpi", "actual", "esperado", "desvio"]
+
+
+def daily_measures(rows: pd.DataFrame) -> pd.DataFrame:
+    """Sumas por día del total y de cada valor de ``DIMS`` (formato largo, pedidos distintos por serie)."""
+    if rows.empty or "fecha_pedido" not in rows.columns:
+        return pd.DataFrame({c: pd.Series(dtype="datetime64[us]" if c == "fecha" else "str" if c in ("dimension", "valor")
+                                          else "float64") for c in DAILY_COLUMNS})
+    entrega = rows["dias_entrega"].astype("float64") if "dias_entrega" in rows.columns else pd.Series(0.0, index=rows.index)
+    resena = rows["resena"].astype("float64") if "resena" in rows.columns else pd.Series(0.0, index=rows.index)
+    aux = pd.DataFrame({
+        "fecha": rows["fecha_pedido"].dt.normalize().to_numpy(),
+        "id_pedido": rows["id_pedido"].to_numpy() if "id_pedido" in rows.columns else np.arange(len(rows)),
+        "ventas_netas": rows["ventas_netas"].astype("float64").to_numpy(),
+        "cancelados": (is_cancelado(rows["estado_pedido"]).astype("int64").to_numpy()
+                       if "estado_pedido" in rows.columns else 0),
+        "entrega_sum": entrega.where(entrega > 0, 0.0).to_numpy(),
+        "entrega_n": (entrega > 0).astype("int64").to_numpy(),
+        "resena_sum": resena.where(resena > 0, 0.0).to_numpy(),
+        "resena_n": (resena > 0).astype("int64").to_numpy(),
+    })
+    agg = {"pedidos": ("id_pedido", "nunique"), **{m: (m, "sum") for m in SUMS if m != "pedidos"}}
+    frames = [aux.groupby("fecha").agg(**agg).reset_index().assign(dimension=TOTAL, valor="")]
+    for dim in DIMS:
+        if dim not in rows.columns:
+            continue
+        g = aux.assign(valor=rows[dim].to_numpy()).groupby(["fecha", "valor"], observed=True).agg(**agg).reset_index()
+        frames.append(g.assign(dimension=dim, valor=g["valor"].astype("str")))
+    out = pd.concat(frames, ignore_index=True)[DAILY_COLUMNS]
+    return out.astype({m: "float64" for m in SUMS})
+
+
+def _wide(daily: pd.DataFrame, first: pd.Series, start: pd.Timestamp) -> dict[str, pd.DataFrame]:
+    # Días × series de cada KPI desde ``start``; NaN donde no hay dato suficiente para evaluar.
+    days = pd.date_range(start, daily["fecha"].max(), freq="D")
+    part = daily[daily["fecha"] >= start]
+    wide = part.set_index(["fecha", "dimension", "valor"])[SUMS].unstack(["dimension", "valor"])
+    columns = pd.MultiIndex.from_tuples([(s, *series) for s in SUMS for series in first.index])
+    wide = wide.reindex(index=days, columns=columns, fill_value=0.0).fillna(0.0)
+    m = {s: wide[s] for s in SUMS}
+    # Sin pedidos un día la serie vende 0, salvo antes de su primer pedido.
+    started = pd.DataFrame(days.to_numpy()[:, None] >= first.to_numpy()[None, :], index=days, columns=first.index)
+    return {
+        "ventas": m["ventas_netas"].where(started),
+        "pct_cancel": (m["cancelados"] / m["pedidos"]).where(m["pedidos"] >= MIN_ORDERS),
+        "entrega": (m["entrega_sum"] / m["entrega_n"]).where(m["entrega_n"] >= MIN_ORDERS),
+        "rating": (m["resena_sum"] / m["resena_n"]).where(m["resena_n"] >= MIN_ORDERS),
+    }
+
+
+def _score(values: np.ndarray, floor_abs: float, floor_rel: float) -> tuple[np.ndarray, np.ndarray]:
+    """Mediana de los ``WINDOW`` días previos y desvío robusto de cada día (NaN si no se evalúa)."""
+    n, k = values.shape
+    padded = np.vstack([np.full((WINDOW, k), np.nan), values])
+    windows = sliding_window_view(padded[:-1], WINDOW, axis=0)   # fila i: values[i - WINDOW:i]
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)   # ventanas sin datos
+        median = np.nanmedian(windows, axis=-1)
+        mad = np.nanmedian(np.abs(windows - median[..., None]), axis=-1)
+    history = np.count_nonzero(~np.isnan(windows), axis=-1)
+    scale = np.maximum(1.4826 * mad, np.maximum(floor_abs, floor_rel * np.abs(median)))
+    ok = (history >= MIN_HISTORY) & (scale > 0) & ~np.isnan(values)
+    z = np.full((n, k), np.nan)
+    np.divide(values - median, scale, out=z, where=ok)
+    return median, z
+
+
+def detect(daily: pd.DataFrame, since=None) -> pd.DataFrame:
+    """Anomalías de ``daily`` (``daily_measures``) desde ``since`` (todas si es ``None``)."""
+    if daily.empty:
+        return pd.DataFrame({c: pd.Series(dtype="datetime64[us]" if c == "fecha" else "str" if c in ("dimension", "valor", "kpi")
+                                          else "float64") for c in COLUMNS})
+    first = daily.groupby(["dimension", "valor"])["fecha"].min()
+    since = daily["fecha"].min() if since is None else max(pd.Timestamp(since), daily["fecha"].min())
+    # Sólo hace falta la ventana previa a ``since``.
+    wide = _wide(daily, first, since - pd.Timedelta(days=WINDOW))
+    frames = []
+    for kpi, (_, floor_abs, floor_rel) in KPIS.items():
+        values = wide[kpi]
+        median, z = _score(values.to_numpy(dtype="float64"), floor_abs, floor_rel)
+        day, col = np.nonzero(np.nan_to_num(np.abs(z)) > THRESHOLD)
+        keep = values.index[day] >= since
+        day, col = day[keep], col[keep]
+        series = values.columns[col]
+        frames.append(pd.DataFrame({
+            "fecha": values.index[day],
+            "dimension": series.get_level_values(0),
+            "valor": series.get_level_values(1),
+            "kpi": kpi,
+            "actual": values.to_numpy()[day, col],
+            "esperado": median[day, col],
+            "desvio": z[day, col].round(2),
+        }))
+    out = pd.concat(frames, ignore_index=True)
+    return out.sort_values(["fecha", "dimension", "valor", "kpi"], kind="stable", ignore_index=True)[COLUMNS]
+
+
+def update_anomalies(daily: pd.DataFrame, anomalies: pd.DataFrame, ventas: pd.DataFrame,
+                     days: list) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Reagrega sólo ``days`` desde ``ventas`` (indexado por fecha) y reevalúa desde el primero."""
+    days = sorted(pd.Timestamp(d) for d in days)
+    if not days:
+        return daily, anomalies
+    fresh = daily_measures(pd.concat([date_slice(ventas, d, d) for d in days]))
+    daily = pd.concat([daily[~daily["fecha"].isin(days)], fresh], ignore_index=True)
+    daily = daily.sort_values(["fecha", "dimension", "valor"], kind="stable", ignore_index=True)
+    anomalies = pd.concat([anomalies[anomalies["fecha"] < days[0]], detect(daily, days[0])], ignore_index=True)
+    return daily, anomalies
+
+
+def anomaly_table(ventas_snap: SheetSnapshot, ventas: pd.DataFrame | Callable[[], pd.DataFrame],
+                  store: SnapshotStore | None = None) -> pd.DataFrame:
+    """Anomalías para la versión de ``ventas_snap``, guardadas junto al snapshot.
+
+    Tras una ingesta incremental sobre la versión ya evaluada sólo se tocan
+    los días con pedidos nuevos; si no, se recalcula toda la historia.
+    """
+    store = store or SnapshotStore()
+    key = f"{ventas_snap.meta.key}_anomalias"
+    meta, daily_meta = store.read_meta(key), store.read_meta(f"{key}_dias")
+    if meta is not None and (meta.parser_version != ENGINE_VERSION or daily_meta is None
+                             or daily_meta.sha256 != meta.sha256):
+        meta = None
+    if meta is not None and meta.sha256 == ventas_snap.meta.sha256:
+        return store.read_frame(key)
+
+    ventas = ventas() if callable(ventas) else ventas
+    extra = ventas_snap.meta.extra
+    if (
+        meta is not None
+        and extra.get("mode") == "incremental"
+        and extra.get("base_sha256") == meta.sha256
+        and extra.get("days") is not None
+    ):
+        daily, anomalies = update_anomalies(store.read_frame(f"{key}_dias"), store.read_frame(key), ventas, extra["days"])
+        mode = "incremental"
+    else:
+        daily = daily_measures(ventas)
+        anomalies = detect(daily)
+        mode = "full"
+
+    for name, frame in ((f"{key}_dias", daily), (key, anomalies)):
+        store.write(frame, SnapshotMeta(
+            key=name,
+            sha256=ventas_snap.meta.sha256,
+            rows=len(frame),
+            fetched_at=time.time(),
+            parser_version=ENGINE_VERSION,
+            extra={"mode": mode},
+        ))
+    return anomalies
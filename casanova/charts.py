@@ -0,0 +1,234 @@
+"""Estilo editorial de los gráficos y armado de las figuras del dashboard.
+
+Sin Streamlit: cada figura se arma a partir de los resultados de
+``casanova.analytics`` y se puede serializar (``fig.to_json()``) para
+cachearla o embeberla en un reporte.
+"""
+import numpy as np
+import plotly.express as px
+import plotly.graph_objects as go
+
+from casanova.anomalies import KPIS as ANOMALY_KPIS, SERIES, TOTAL
+from casanova.compare import COMPARISONS
+from casanova.downsample import prepare_series
+from casanova.shards import TIENDA
+
+INK = "#1F1C1A"
+ACCENT = "#9B3E2A"   # ladrillo más contrastado
+GRID = "rgba(31,28,26,0.12)"
+AXIS_LINE = "rgba(31,28,26,0.25)"
+PLOT_BG = "rgba(255,255,255,0.70)"   # “papel” detrás del gráfico
+COMPARE = "rgba(31,28,26,0.45)"     # período de comparación: tinta tenue, punteada
+MARKERS_MAX_POINTS = 400   # más puntos: sólo la línea
+WEBGL_POINTS = 1000        # más puntos: Scattergl (WebGL) en vez de SVG
+RESOLUTION_TITLES = {"W": "semana", "M": "mes"}
+
+
+def money_fmt(x: float) -> str:
+    if x is None or (isinstance(x, float) and np.isnan(x)):
+        return "—"
+    return f"${x:,.0f}".replace(",", ".")
+
+
+def pct_fmt(x: float) -> str:
+    if x is None or (isinstance(x, float) and np.isnan(x)):
+        return "—"
+    return f"{x*100:.1f}%"
+
+
+# KPI de casanova.anomalies -> formato del valor
+ANOMALY_FORMATS = {
+    "ventas": money_fmt,
+    "pct_cancel": pct_fmt,
+    "entrega": lambda x: f"{x:.1f} días",
+    "rating": lambda x: f"{x:.2f}",
+}
+
+
+def anomaly_rows(frame) -> list[dict]:
+    """Anomalías (``Analytics.anomalies``) como filas de texto para tablas."""
+    rows = []
+    for r in frame.to_dict("records"):
+        fmt = ANOMALY_FORMATS[r["kpi"]]
+        serie = SERIES[TOTAL] if r["dimension"] == TOTAL else f"{SERIES.get(r['dimension'], r['dimension'])}: {r['valor']}"
+        rows.append({
+            "fecha": r["fecha"].date().isoformat(),
+            **({TIENDA: r[TIENDA]} if TIENDA in r else {}),
+            "serie": serie,
+            "kpi": ANOMALY_KPIS[r["kpi"]][0],
+            "tipo": "▲ pico" if r["desvio"] > 0 else "▼ caída",
+            "valor": fmt(r["actual"]),
+            "esperado": fmt(r["esperado"]),
+            "desvio": f"{r['desvio']:+.1f}",
+        })
+    return rows
+
+
+def plotly_editorial(fig, title=None, height=460):
+    """Estilo editorial claro + máximo contraste para ejes/labels."""
+    fig.update_layout(
+        template="plotly_white",
+        paper_bgcolor="rgba(0,0,0,0)",
+        plot_bgcolor=PLOT_BG,
+        font=dict(color=INK, family="Montserrat", size=14),
+        margin=dict(l=18, r=18, t=70, b=30),
+        height=height,
+        title=dict(
+            text=title or "",
+            x=0.01,
+            xanchor="left",
+            font=dict(family="Playfair Display", size=20, color=INK),
+        ),
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+    )
+    fig.update_xaxes(
+        gridcolor=GRID,
+        zerolinecolor=GRID,
+        tickfont=dict(color=INK, size=14),
+        title_font=dict(color=INK, size=14),
+        showline=True,
+        linewidth=1,
+        linecolor=AXIS_LINE,
+    )
+    fig.update_yaxes(
+        gridcolor=GRID,
+        zerolinecolor=GRID,
+        tickfont=dict(color=INK, size=14),
+        title_font=dict(color=INK, size=14),
+        showline=True,
+        linewidth=1,
+        linecolor=AXIS_LINE,
+    )
+    return fig
+
+
+def style_bars(fig, opacity=0.95):
+    """Fuerza color y bordes (evita barras 'lavadas' sobre fondo claro)."""
+    fig.update_traces(
+        marker=dict(
+            color=ACCENT,
+            opacity=opacity,
+            line=dict(width=1, color="rgba(31,28,26,0.18)")
+        )
+    )
+    return fig
+
+
+def style_hist(fig, opacity=0.90):
+    fig.update_traces(
+        marker=dict(
+            color=ACCENT,
+            opacity=opacity,
+            line=dict(width=1, color="rgba(31,28,26,0.18)")
+        )
+    )
+    return fig
+
+
+def style_line(fig):
+    fig.update_traces(line=dict(width=4, color=ACCENT), marker=dict(size=8, color=ACCENT))
+    return fig
+
+
+def line_chart(frame, x: str, y: str, title: str, height: int, resolution: str = "auto",
+               compare=None, compare_label: str = "Comparación"):
+    """Serie de tiempo; con rangos largos se agrega por semana/mes y se reduce con LTTB (ver casanova.downsample).
+
+    ``compare``: la misma serie en el período de comparación, ya corrida sobre
+    las fechas de ``frame``; se dibuja punteada con la misma resolución.
+    """
+    frame, res = prepare_series(frame, x, y, resolution)
+    if res in RESOLUTION_TITLES:
+        unit = RESOLUTION_TITLES[res]
+        title = title.replace("por día", f"por {unit}") if "por día" in title else f"{title} (por {unit})"
+    n = len(frame)
+    webgl = n > WEBGL_POINTS
+    fig = px.line(frame, x=x, y=y, markers=n <= MARKERS_MAX_POINTS, render_mode="webgl" if webgl else "svg")
+    fig = style_line(fig)
+    if compare is not None and len(compare):
+        compare, _ = prepare_series(compare, x, y, res)
+        trace = go.Scattergl if webgl else go.Scatter
+        fig.add_trace(trace(x=compare[x], y=compare[y], mode="lines", name=compare_label,
+                            line=dict(width=2, color=COMPARE, dash="dash")))
+        fig.data[0].update(name="Período actual", showlegend=True)
+    return plotly_editorial(fig, title=title, height=height)
+
+
+def bar_chart(frame, x: str, y: str, title: str, height: int, opacity: float = 0.96, orientation: str = "v"):
+    fig = px.bar(frame, x=x, y=y, orientation=orientation)
+    fig = style_bars(fig, opacity=opacity)
+    return plotly_editorial(fig, title=title, height=height)
+
+
+def hist_chart(frame, x: str, title: str, nbins: int, height: int):
+    """Histograma pre-binneado: ``frame`` trae ``x`` y su ``conteo``."""
+    fig = px.histogram(frame, x=x, y="conteo", histfunc="sum", nbins=nbins)
+    fig.update_yaxes(title_text="count")
+    fig = style_hist(fig, opacity=0.92)   # ← fuerza ladrillo
+    return plotly_editorial(fig, title=title, height=height)
+
+
+# Gráficos de resumen_diario: dependen sólo del rango, no de los filtros.
+DAILY_KPI_CHARTS = {
+    "ticket_promedio_dia": "Ticket promedio",
+    "pct_cancelados_dia": "% Cancelaciones",
+    "entrega_promedio_dias": "Entrega promedio (días)",
+}
+CHARTS = ["trend", *DAILY_KPI_CHARTS, "by_channel", "by_category", "top_products", "by_weekday",
+          "hist_dias_entrega", "hist_resena"]
+
+
+LINE_CHARTS = {"trend", *DAILY_KPI_CHARTS}
+
+
+def chart_key(name: str, an, view, use_resumen: bool, resolution: str = "auto", compare: str = "none") -> tuple:
+    """Clave de caché de la figura ``name``: rango para resumen_diario, vista completa para ventas."""
+    key = (resolution, compare) if name in LINE_CHARTS else ()
+    if name in DAILY_KPI_CHARTS or (name == "trend" and an.trend_uses_resumen(use_resumen)):
+        return (name,) + key + an.range_key(view)
+    return (name,) + key + an.view_key(view)
+
+
+def chart_spec(name: str, an, view, use_resumen: bool, resolution: str = "auto", compare: str = "none"):
+    """``(builder, args, kwargs)`` de la figura ``name`` o ``None`` si faltan datos.
+
+    Los argumentos son frames chicos ya agregados, así que la figura se puede
+    armar en otro proceso. ``compare`` (ver ``casanova.compare.COMPARISONS``)
+    superpone el período de comparación en las series de tiempo.
+    """
+    data = an.data
+    overlay = {"compare_label": COMPARISONS.get(compare, compare)}
+    if name == "trend":
+        overlay["compare"] = an.trend_comparison(view, use_resumen, compare)
+        return line_chart, (an.trend(view, use_resumen), "fecha", "ventas_netas", "Ventas netas por día"), {
+            "height": 540, "resolution": resolution, **overlay}
+    if name in DAILY_KPI_CHARTS:
+        if not (use_resumen and an.has_resumen and name in data.resumen_columns):
+            return None
+        overlay["compare"] = an.resumen_comparison(view, compare)
+        return line_chart, (an.resumen_days(view), "fecha_analizada", name, DAILY_KPI_CHARTS[name]), {
+            "height": 400, "resolution": resolution, **overlay}
+    if name == "by_channel" and "canal" in data.cube.dims:
+        return bar_chart, (an.kpis(view).by_channel.reset_index(), "canal", "ventas_netas", "Ventas por canal"), {"height": 520}
+    if name == "by_category" and "categoria" in data.cube.dims:
+        return bar_chart, (an.kpis(view).by_category.reset_index(), "categoria", "ventas_netas", "Ventas por categoría"), {"height": 520}
+    if name == "top_products" and "producto" in data.ventas_columns:
+        return bar_chart, (an.kpis(view).by_product.head(12).reset_index(), "ventas_netas", "producto",
+                           "Top 12 productos (ventas netas)"), {"height": 600, "orientation": "h"}
+    if name == "by_weekday":
+        return bar_chart, (an.weekday_sales(view), "dia_semana", "ventas_netas", "Ventas por día de la semana"), {"height": 460, "opacity": 0.94}
+    if name == "hist_dias_entrega" and "dias_entrega" in data.ventas_columns:
+        aux = an.distribution("dias_entrega", view)
+        if len(aux):
+            return hist_chart, (aux, "dias_entrega", "Distribución de días de entrega"), {"nbins": 10, "height": 470}
+    if name == "hist_resena" and "resena" in data.ventas_columns:
+        aux = an.distribution("resena", view)
+        if len(aux):
+            return hist_chart, (aux, "resena", "Distribución de rating"), {"nbins": 5, "height": 470}
+    return None
+
+
+def render_json(spec) -> str:
+    """Figura de un ``chart_spec`` serializada (lo que cachea la app y embebe el reporte)."""
+    builder, args, kwargs = spec
+    return builder(*args, **kwargs).to_json()
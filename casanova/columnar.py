@@ -0,0 +1,409 @@
+"""Backend columnar opcional: ventas en Parquet particionado, consultas con Acero (pyarrow).
+
+Con ``CASANOVA_BACKEND=arrow`` las filas de cada tienda se escriben una vez por
+mes en ``<cache>/columnar/<tienda>/mes=AAAA-MM/<huella>.parquet`` (sólo los
+meses cuya huella cambió) y dejan de vivir en memoria. Cada consulta es un
+plan de Acero en streaming: el rango y las tiendas podan carpetas y row groups,
+los filtros se aplican al escanear y a pandas sólo llegan resultados
+agregados (celdas con el mismo formato que ``casanova.cube``, rankings,
+histogramas). Las filas crudas se leen sólo para la tabla de Datos, ya
+filtradas. Los pedidos distintos son exactos (``count_distinct``).
+
+El backend por defecto (``pandas``) es el cubo en memoria de ``casanova.shards``.
+"""
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from functools import cached_property
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from casanova.cube import DIMS
+from casanova.kpis import MEASURES, KpiResult, compute_kpis
+from casanova.memo import freeze
+from casanova.schema import encode
+from casanova.shards import TIENDA, fingerprint, month_parts
+from casanova.snapshots import CACHE_DIR, SnapshotStore
+from casanova.transform import index_by_date
+
+BACKENDS = {"pandas": "Cubo en memoria (pandas)", "arrow": "Parquet + Acero (pyarrow)"}
+BACKEND = os.environ.get("CASANOVA_BACKEND", "pandas").strip().lower()
+COLUMNAR_DIR = CACHE_DIR / "columnar"
+MONTH = "mes"                 # partición Hive: mes=AAAA-MM
+ROW_GROUP_ROWS = 65_536       # row groups chicos: el rango poda también dentro del mes
+SLICE_CACHE = 16              # selecciones recientes (con sus agregados) por cubo
+STALE_SECONDS = 3600          # archivos de versiones viejas: se borran pasado este margen
+
+
+@dataclass
+class ColumnarPart:
+    """Ventas de una tienda en disco: un archivo Parquet por mes."""
+    source: str                 # label de la fuente (valor del filtro "tienda")
+    root: Path
+    files: list[Path]
+    empty: pd.DataFrame         # cero filas con el esquema de ventas (indexado por fecha)
+    span: tuple[pd.Timestamp, pd.Timestamp] | None
+    rows: int
+
+    @property
+    def columns(self) -> set:
+        """Columnas guardadas en Parquet."""
+        return set(self.empty.columns) - {TIENDA}
+
+    @property
+    def dims(self) -> list[str]:
+        return [d for d in DIMS if d in self.columns]
+
+    @cached_property
+    def dataset(self):
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+
+        partitioning = ds.partitioning(pa.schema([(MONTH, pa.string())]), flavor="hive")
+        return ds.dataset([str(f) for f in self.files], format="parquet", partitioning=partitioning,
+                          partition_base_dir=str(self.root))
+
+    def overlaps(self, start, end) -> bool:
+        return self.span[0] < pd.Timestamp(end) + pd.Timedelta(days=1) and self.span[1] >= pd.Timestamp(start)
+
+    def where(self, start, end, filters: dict, required=()) -> tuple[object, set]:
+        """Expresión de rango (partición + fecha_pedido) y filtros, y las columnas que lee."""
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+
+        lo, hi = pd.Timestamp(start), pd.Timestamp(end)
+        expr = (
+            (ds.field(MONTH) >= f"{lo:%Y-%m}") & (ds.field(MONTH) <= f"{hi:%Y-%m}")
+            & (ds.field("fecha_pedido") >= lo) & (ds.field("fecha_pedido") < hi + pd.Timedelta(days=1))
+        )
+        used = {"fecha_pedido"}
+        for col, values in filters.items():
+            if col in self.columns:
+                # Con tipo explícito: una selección vacía no deja pasar nada (en vez de fallar).
+                expr = expr & ds.field(col).isin(pa.array([str(v) for v in values], type=pa.string()))
+                used.add(col)
+        for col in required:
+            expr = expr & ds.field(col).is_valid()
+            used.add(col)
+        return expr, used
+
+    def aggregate(self, where: tuple, projection: dict, aggregates: list, keys=(), columns=()) -> pd.DataFrame:
+        """scan → filter → project → aggregate en Acero; sólo el resultado pasa a pandas."""
+        import pyarrow.acero as ac
+
+        expr, used = where
+        scanned = sorted((used | set(columns)) & self.columns) + [MONTH]
+        plan = ac.Declaration.from_sequence([
+            ac.Declaration("scan", ac.ScanNodeOptions(self.dataset, filter=expr, columns=scanned)),
+            ac.Declaration("filter", ac.FilterNodeOptions(expr)),
+            ac.Declaration("project", ac.ProjectNodeOptions(list(projection.values()), list(projection))),
+            ac.Declaration("aggregate", ac.AggregateNodeOptions(aggregates, keys=list(keys))),
+        ])
+        return plan.to_table().to_pandas()
+
+    def read(self, start, end, filters: dict) -> pd.DataFrame:
+        """Filas crudas del rango + filtros (tabla de Datos y Voice of Customer)."""
+        expr, _ = self.where(start, end, filters)
+        stored = [c for c in self.empty.columns if c != TIENDA]
+        frame = self.dataset.to_table(filter=expr, columns=stored).to_pandas()
+        for col, dtype in self.empty.dtypes.items():
+            if isinstance(dtype, pd.CategoricalDtype) and col != TIENDA:
+                frame[col] = encode(frame[col])   # un diccionario por archivo: se unifican y ordenan
+        if TIENDA in self.empty.columns:
+            frame[TIENDA] = pd.Categorical.from_codes(np.zeros(len(frame), dtype=np.int8), [self.source])
+        return index_by_date(frame.sort_values("fecha_pedido", kind="stable", ignore_index=True), "fecha_pedido")
+
+
+def _manifest(base: Path, version: str) -> Path:
+    # Un manifiesto por versión de datos: qué archivos forman esa versión.
+    return base / f"{hashlib.blake2b(version.encode(), digest_size=12).hexdigest()}.json"
+
+
+def columnar_root(store: SnapshotStore) -> Path:
+    """Directorio de particiones junto a los snapshots de ``store``."""
+    return Path(store.root) / "columnar"
+
+
+def open_partitions(key: str, label: str, version: str, root: str | Path = COLUMNAR_DIR) -> ColumnarPart | None:
+    """Particiones ya escritas para ``version`` (``None`` si falta el manifiesto o algún archivo).
+
+    No lee filas: el esquema sale del primer archivo Parquet.
+    """
+    import pyarrow.parquet as pq
+
+    base = Path(root) / key
+    try:
+        manifest = json.loads(_manifest(base, version).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    files = [base / f for f in manifest["files"]]
+    if not files or not all(f.exists() for f in files):
+        return None
+    empty = pq.read_schema(files[0]).empty_table().to_pandas()
+    if manifest["tienda"]:
+        empty[TIENDA] = pd.Categorical([], categories=[label])
+    span = tuple(pd.Timestamp(t) for t in manifest["span"])
+    return ColumnarPart(label, base, files, index_by_date(empty, "fecha_pedido"), span, manifest["rows"])
+
+
+def write_partitions(key: str, label: str, ventas: pd.DataFrame, root: str | Path = COLUMNAR_DIR,
+                     version: str | None = None) -> ColumnarPart:
+    """Escribe los meses de ``ventas`` (indexado por fecha) que no estén en disco con la misma huella.
+
+    La columna "tienda" no se guarda (es el label de la parte). Con ``version``
+    deja un manifiesto para que ``open_partitions`` las abra sin el frame. Los
+    archivos de versiones anteriores se borran después de ``STALE_SECONDS``
+    (otra sesión todavía puede estar leyéndolos).
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    base = Path(root) / key
+    files = []
+    for month, rows in month_parts(ventas):
+        path = base / f"{MONTH}={month:%Y-%m}" / f"{fingerprint(rows)}.parquet"
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".parquet.tmp")
+            table = pa.Table.from_pandas(rows.drop(columns=[TIENDA], errors="ignore"), preserve_index=False)
+            pq.write_table(table, tmp, row_group_size=ROW_GROUP_ROWS)
+            tmp.replace(path)
+        files.append(path)
+    span = (ventas.index[0], ventas.index[-1]) if len(ventas) else None
+    keep = set(files)
+    if version is not None and files:
+        manifest = _manifest(base, version)
+        tmp = manifest.with_suffix(".json.tmp")
+        tmp.write_text(json.dumps({
+            "files": [str(f.relative_to(base)) for f in files],
+            "span": [t.isoformat() for t in span],
+            "rows": len(ventas),
+            "tienda": TIENDA in ventas.columns,
+        }), encoding="utf-8")
+        tmp.replace(manifest)
+        keep.add(manifest)
+    now = time.time()
+    for old in [*base.glob(f"{MONTH}=*/*.parquet"), *base.glob("*.json")]:
+        if old not in keep and now - old.stat().st_mtime > STALE_SECONDS:
+            old.unlink(missing_ok=True)
+    return ColumnarPart(label, base, files, ventas.iloc[:0], span, len(ventas))
+
+
+def _day():
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+
+    return pc.floor_temporal(ds.field("fecha_pedido"), unit="day")
+
+
+def _measures_plan(part: ColumnarPart, keys: tuple, distinct: bool = True) -> tuple[dict, list, list, set]:
+    # Mismas medidas que build_cube, calculadas al escanear y agrupadas por ``keys``.
+    # Con ``distinct=False`` los pedidos se cuentan por fila (sin count_distinct).
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+
+    cols = part.columns
+    null = pc.scalar(pa.scalar(None, pa.float64()))
+    projection = {"fecha": _day(), **{d: ds.field(d).cast(pa.string()) for d in keys if d != "fecha"}}
+    projection["ventas_netas"] = ds.field("ventas_netas").cast(pa.float64())
+    if distinct and "id_pedido" in cols:
+        projection["id_pedido"] = ds.field("id_pedido").cast(pa.string())
+    projection["cancelado"] = (
+        (pc.utf8_lower(ds.field("estado_pedido").cast(pa.string())) == "cancelado").cast(pa.int64())
+        if "estado_pedido" in cols else pc.scalar(0)
+    )
+    for col, name in (("dias_entrega", "entrega"), ("resena", "resena")):
+        value = ds.field(col).cast(pa.float64())
+        projection[name] = pc.if_else(value > 0, value, null) if col in cols else null
+    fn = (lambda name: f"hash_{name}") if keys else (lambda name: name)   # noqa: E731
+    every, valid = pc.CountOptions("all"), pc.CountOptions("only_valid")
+    aggregates = [
+        ("ventas_netas", fn("sum"), None, "ventas_netas"),
+        ("ventas_netas", fn("count"), every, "filas"),
+        # Sin id_pedido cada fila es un pedido (como build_cube).
+        ("id_pedido", fn("count_distinct"), None, "pedidos") if distinct and "id_pedido" in cols
+        else ("ventas_netas", fn("count"), every, "pedidos"),
+        ("cancelado", fn("sum"), None, "cancelados"),
+        ("entrega", fn("sum"), None, "entrega_sum"),
+        ("entrega", fn("count"), valid, "entrega_n"),
+        ("resena", fn("sum"), None, "resena_sum"),
+        ("resena", fn("count"), valid, "resena_n"),
+    ]
+    if "fecha" not in keys:
+        aggregates.append(("fecha", fn("max"), None, "fecha"))   # último día (KpiResult.last_date)
+    columns = {"fecha_pedido", *keys, "ventas_netas", "id_pedido", "estado_pedido", "dias_entrega", "resena"}
+    return projection, aggregates, list(keys), columns - {"fecha"}
+
+
+COUNTS = ["filas", "pedidos", "cancelados", "entrega_n", "resena_n"]
+SUMS = ["ventas_netas", "entrega_sum", "resena_sum"]
+
+
+def _categorical(frame: pd.DataFrame, cols) -> pd.DataFrame:
+    for col in cols:
+        if col in frame.columns:
+            frame[col] = encode(frame[col])
+    return frame
+
+
+@dataclass
+class ArrowSlice:
+    """Misma interfaz que ``ShardedSlice``: cada agrupación es una consulta y queda en la selección."""
+    parts: list[ColumnarPart]   # tiendas que se solapan con el rango (puede estar vacía)
+    dims: list[str]
+    start: object
+    end: object
+    filters: dict
+    _cache: dict = field(init=False, default_factory=dict, repr=False)
+
+    def _where(self, part: ColumnarPart, required=()):
+        # Como en el cubo: filas con alguna dimensión vacía no pasan.
+        return part.where(self.start, self.end, self.filters, [*part.dims, *required])
+
+    def measures(self, keys: tuple = (), distinct: bool = True) -> pd.DataFrame:
+        """Medidas del cubo (``MEASURES`` + ``filas``) agrupadas por ``keys`` (``"fecha"`` y/o dimensiones).
+
+        Los pedidos distintos son exactos dentro de cada grupo (``distinct=False``
+        los cuenta por fila, para quien no los usa); sin ``keys``, una fila con
+        los totales de la selección.
+        """
+        if (keys, distinct) in self._cache:
+            return self._cache[keys, distinct]
+        frames = [part.aggregate(self._where(part), *_measures_plan(part, keys, distinct))
+                  for part in self.parts if all(k == "fecha" or k in part.dims for k in keys)]
+        frames = [f for f in frames if len(f) and f["filas"].sum()]
+        if not frames:
+            out = pd.DataFrame({"fecha": pd.Series(dtype="datetime64[us]"),
+                                **{k: pd.Series(dtype="str") for k in keys if k != "fecha"},
+                                **{m: pd.Series(dtype="float64") for m in [*SUMS, *COUNTS]}})
+        elif len(frames) == 1:
+            out = frames[0]
+        else:
+            # Varias tiendas: un pedido pertenece a una sola, así que los distintos se suman.
+            out = pd.concat(frames, ignore_index=True)
+            agg = {c: "sum" for c in [*SUMS, *COUNTS]} | ({"fecha": "max"} if "fecha" not in keys else {})
+            out = out.groupby(list(keys), as_index=False).agg(agg) if keys else out.agg(agg).to_frame().T
+        # Suma de un grupo sin valores (p. ej. sin reseñas): nula en Acero, 0 en pandas.
+        out = out.fillna({c: 0 for c in [*SUMS, *COUNTS]}).astype({c: "int64" for c in COUNTS} | {c: "float64" for c in SUMS})
+        out["fecha"] = pd.to_datetime(out["fecha"])
+        out = _categorical(out, [k for k in keys if k != "fecha"])
+        self._cache[keys, distinct] = out = out.sort_values(list(keys), kind="stable", ignore_index=True) if keys else out
+        return out
+
+    exact = True   # count_distinct: los pedidos nunca son una estimación
+
+    def pedidos(self) -> int:
+        totals = self.measures()
+        return int(totals["pedidos"].sum()) if len(totals) else 0
+
+    def kpis(self, pedidos: int | None = None) -> KpiResult:
+        # Una agrupación por canal × categoría alcanza para totales y rankings; los pedidos
+        # distintos salen de la consulta total (compute_kpis no usa los de cada celda).
+        cells = self.measures(tuple(d for d in ("canal", "categoria") if d in self.dims), distinct=False)
+        return compute_kpis(cells, self.products(), pedidos=self.pedidos() if pedidos is None else pedidos)
+
+    def by(self, col: str, measure: str = "ventas_netas") -> pd.Series:
+        return self.measures((col,)).groupby(col, observed=True)[measure].sum().sort_values(ascending=False)
+
+    def daily(self) -> pd.Series:
+        return self.measures(("fecha",)).set_index("fecha")["ventas_netas"]
+
+    def daily_totals(self) -> pd.DataFrame:
+        """Medidas de los KPIs por día (pedidos distintos exactos por día)."""
+        return self.measures(("fecha",)).set_index("fecha")[MEASURES]
+
+    def by_weekday(self) -> pd.Series:
+        days = self.measures(("fecha",))
+        return days.groupby(days["fecha"].dt.day_name())["ventas_netas"].sum()
+
+    @cached_property
+    def _products(self) -> pd.DataFrame:
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+
+        frames = []
+        for part in self.parts:
+            if "producto" not in part.columns:
+                continue
+            projection = {"producto": ds.field("producto").cast(pa.string()),
+                          "ventas_netas": ds.field("ventas_netas").cast(pa.float64())}
+            frames.append(part.aggregate(self._where(part, ["producto"]), projection,
+                                         [("ventas_netas", "hash_sum", None, "ventas_netas")], ["producto"],
+                                         {"producto", "ventas_netas"}))
+        if not frames:
+            return pd.DataFrame()
+        products = pd.concat(frames, ignore_index=True).groupby("producto", as_index=False)["ventas_netas"].sum()
+        return _categorical(products, ["producto"])
+
+    def products(self) -> pd.DataFrame:
+        return self._products
+
+    def distribution(self, col: str) -> pd.DataFrame:
+        """Conteo por valor de ``col`` (> 0) para histogramas pre-binneados."""
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        import pyarrow.dataset as ds
+
+        frames = []
+        for part in self.parts:
+            if col not in part.columns:
+                continue
+            value = ds.field(col).cast(pa.float64())
+            expr, used = self._where(part)
+            frames.append(part.aggregate((expr & (value > 0), used), {col: value},
+                                         [(col, "hash_count", pc.CountOptions("all"), "conteo")], [col], {col}))
+        out = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=[col, "conteo"])
+        out = out.groupby(col, as_index=False)["conteo"].sum()
+        return out.astype({col: "float64", "conteo": "int64"}).sort_values(col, ignore_index=True)
+
+
+@dataclass
+class ArrowCube:
+    """Misma interfaz que ``ShardedCube`` sobre las particiones Parquet de cada tienda."""
+    parts: list[ColumnarPart]
+    sources: list[str]                            # labels, en el orden del registro
+    dims: list[str] = field(init=False)
+    _slices: OrderedDict = field(init=False, default_factory=OrderedDict, repr=False)
+
+    def __post_init__(self):
+        present = [d for d in DIMS if any(d in p.dims for p in self.parts)]
+        self.dims = ([TIENDA] if len(self.sources) > 1 else []) + present
+
+    @property
+    def n_rows(self) -> int:
+        return sum(p.rows for p in self.parts)
+
+    def _pick(self, start, end, filters: dict) -> tuple[list[ColumnarPart], dict]:
+        tiendas = filters.get(TIENDA)
+        rest = {col: values for col, values in filters.items() if col != TIENDA}
+        parts = [p for p in self.parts if p.overlaps(start, end) and (tiendas is None or p.source in tiendas)]
+        return parts, rest
+
+    def options(self, col: str, start, end, filters: dict) -> list:
+        """Valores de ``col`` presentes con los filtros ya aplicados (filtros en cascada)."""
+        if col == TIENDA:
+            parts, rest = self._pick(start, end, filters)
+            present = {p.source for p in parts if ArrowSlice([p], p.dims, start, end, rest).pedidos()}
+            return [src for src in self.sources if src in present]
+        if col not in self.dims:
+            return []
+        return sorted(self.select(start, end, filters).measures((col,), distinct=False)[col].astype(str).tolist())
+
+    def select(self, start, end, filters: dict) -> ArrowSlice:
+        # Las consultas de una vista (KPIs, series, histogramas) reusan la misma selección.
+        key = (pd.Timestamp(start), pd.Timestamp(end), freeze(filters))
+        if key in self._slices:
+            self._slices.move_to_end(key)
+            return self._slices[key]
+        parts, rest = self._pick(start, end, filters)
+        dims = [d for d in self.dims if d != TIENDA]
+        sliced = self._slices[key] = ArrowSlice(parts, dims, start, end, rest)
+        if len(self._slices) > SLICE_CACHE:
+            self._slices.popitem(last=False)
+        return sliced
@@ -0,0 +1,119 @@
+"""Comparación contra otro período (anterior o mismo período del año pasado).
+
+Por cada selección de filtros se arman, una sola vez, las sumas acumuladas por
+día de las medidas de los KPIs (ventas, pedidos, cancelados, suma y cantidad
+de días de entrega y de reseñas) sobre toda la historia. Los totales de
+cualquier rango son una resta de dos filas, así que el rango actual y el de
+comparación cuestan lo mismo sin importar cuántos años de datos haya.
+"""
+import datetime as dt
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from casanova.kpis import MEASURES, KpiResult
+
+COMPARISONS = {"none": "Sin comparación", "previous": "Período anterior", "year": "Mismo período del año anterior"}
+# KPI -> (formato del delta, True si subir es malo)
+DELTAS = {
+    "total_ventas": ("rel", False),
+    "pedidos": ("rel", False),
+    "ticket": ("rel", False),
+    "pct_cancel": ("pp", True),
+    "entrega_avg": ("dias", True),
+    "rating_avg": ("abs", False),
+}
+
+
+def comparison_range(start: dt.date, end: dt.date, mode: str) -> tuple[dt.date, dt.date] | None:
+    """Rango con el que se compara ``[start, end]`` (``None`` sin comparación)."""
+    if mode == "previous":
+        days = (end - start).days + 1
+        return start - dt.timedelta(days=days), start - dt.timedelta(days=1)
+    if mode == "year":
+        year = pd.DateOffset(years=1)
+        return (pd.Timestamp(start) - year).date(), (pd.Timestamp(end) - year).date()
+    return None
+
+
+def align(frame: pd.DataFrame, x: str, start: dt.date, end: dt.date, mode: str) -> pd.DataFrame:
+    """Serie del período de comparación corrida sobre las fechas del período actual."""
+    if mode == "previous":
+        offset = pd.Timedelta(days=(end - start).days + 1)
+    else:
+        offset = pd.DateOffset(years=1)
+    return frame.assign(**{x: frame[x] + offset})
+
+
+@dataclass
+class PrefixSums:
+    first: pd.Timestamp | None   # día de la fila 1 (None si no hay datos)
+    columns: list[str]
+    sums: np.ndarray             # (días + 1, medidas); la fila 0 son ceros
+
+    @classmethod
+    def build(cls, daily: pd.DataFrame) -> "PrefixSums":
+        """``daily``: medidas por día (índice de fechas), p. ej. ``ShardedSlice.daily_totals()``."""
+        columns = [m for m in MEASURES if m in daily.columns]
+        if daily.empty:
+            return cls(None, columns, np.zeros((1, len(columns))))
+        days = pd.date_range(daily.index.min(), daily.index.max(), freq="D")
+        block = daily[columns].reindex(days, fill_value=0).to_numpy(dtype="float64")
+        sums = np.vstack([np.zeros((1, len(columns))), np.cumsum(block, axis=0)])
+        return cls(days[0], columns, sums)
+
+    def _span(self, start, end) -> tuple[int, int]:
+        if self.first is None:
+            return 0, 0
+        n = len(self.sums) - 1
+        i = (pd.Timestamp(start) - self.first).days
+        j = (pd.Timestamp(end) - self.first).days + 1
+        return min(max(i, 0), n), min(max(j, 0), n)
+
+    def totals(self, start, end) -> dict[str, float]:
+        """Suma de cada medida en ``[start, end]`` (O(1))."""
+        i, j = self._span(start, end)
+        row = self.sums[j] - self.sums[i] if j > i else np.zeros(len(self.columns))
+        return dict(zip(self.columns, row.tolist()))
+
+    def daily(self, start, end) -> pd.DataFrame:
+        """Medidas por día en ``[start, end]``, sólo los días con pedidos (columna ``fecha``)."""
+        i, j = self._span(start, end)
+        if j <= i:
+            return pd.DataFrame(columns=["fecha", *self.columns])
+        out = pd.DataFrame(np.diff(self.sums[i:j + 1], axis=0), columns=self.columns)
+        out.insert(0, "fecha", pd.date_range(self.first + pd.Timedelta(days=i), periods=j - i, freq="D"))
+        return out[out["pedidos"] > 0].reset_index(drop=True) if "pedidos" in out.columns else out
+
+
+def kpi_values(totals: dict) -> dict:
+    """Los seis KPIs del encabezado a partir de totales (mismas fórmulas que ``compute_kpis``)."""
+    ventas, pedidos = totals.get("ventas_netas", 0.0), int(round(totals.get("pedidos", 0.0)))
+    entrega_n, resena_n = totals.get("entrega_n", 0.0), totals.get("resena_n", 0.0)
+    return {
+        "total_ventas": float(ventas),
+        "pedidos": pedidos,
+        "ticket": float(ventas / pedidos) if pedidos else 0.0,
+        "pct_cancel": totals.get("cancelados", 0.0) / pedidos if pedidos else 0.0,
+        "entrega_avg": float(totals.get("entrega_sum", 0.0) / entrega_n) if entrega_n else 0.0,
+        "rating_avg": float(totals.get("resena_sum", 0.0) / resena_n) if resena_n else 0.0,
+    }
+
+
+def delta_labels(current: KpiResult, previous: dict) -> dict[str, str | None]:
+    """Texto del delta de cada KPI (``None`` si el período de comparación no tiene ese dato)."""
+    out = {}
+    for name, (kind, _) in DELTAS.items():
+        now, before = float(getattr(current, name)), float(previous[name])
+        if not previous["pedidos"] or (kind != "pp" and not before) or (kind in ("dias", "abs") and not now):
+            out[name] = None
+        elif kind == "rel":
+            out[name] = f"{(now - before) / before:+.1%}"
+        elif kind == "pp":
+            out[name] = f"{(now - before) * 100:+.1f} pp"
+        elif kind == "dias":
+            out[name] = f"{now - before:+.1f} días"
+        else:
+            out[name] = f"{now - before:+.2f}"
+    return out
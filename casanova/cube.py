@@ -0,0 +1,234 @@
+"""Cubo diario pre-agregado para los filtros del sidebar.
+
+Granularidad: fecha × canal × categoria × provincia_envio × estado_pedido.
+Cada celda guarda sumas y conteos (ventas, filas, cancelados, suma/cantidad
+de días de entrega y reseñas > 0) y los pedidos distintos. Los KPIs y los
+gráficos se responden sumando celdas; las filas crudas sólo hacen falta para
+la tabla de Datos y las notas de clientes.
+
+Pedidos distintos: si cada id_pedido cae en una sola celda (lo normal: un
+pedido tiene una fecha, canal, provincia y estado) los conteos por celda son
+aditivos. Si no, se guarda un sketch HyperLogLog por celda y se estima la
+unión con el máximo de registros. Cuesta 2**HLL_P bytes por celda (~1 KB con
+``HLL_P=10``): con 100.000 celdas son ~100 MB, varias veces el resto del cubo
+(~100 bytes por celda). Por eso la app sólo lo usa como respaldo: el
+encabezado y la comparación de períodos cuentan los pedidos exactos sobre las
+filas (``Analytics._orders``).
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from casanova.kpis import MEASURES, KpiResult, compute_kpis
+from casanova.transform import date_slice, index_by_date
+
+DIMS = ["canal", "categoria", "provincia_envio", "estado_pedido"]
+HLL_P = 10  # 1024 registros uint8 por celda (~1 KB de sketch por celda), error típico ~3%
+
+
+def is_cancelado(s: pd.Series) -> pd.Series:
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        flags = np.asarray(s.cat.categories.astype(str).str.lower() == "cancelado")
+        codes = s.cat.codes.to_numpy()
+        return pd.Series(np.where(codes >= 0, flags[np.maximum(codes, 0)] if len(flags) else False, False), index=s.index)
+    return s.astype(str).str.lower() == "cancelado"
+
+
+def _hll_registers(ids: pd.Series, cell: np.ndarray, n_cells: int) -> np.ndarray:
+    h = pd.util.hash_pandas_object(ids.astype(str), index=False).to_numpy()
+    bucket = (h >> np.uint64(64 - HLL_P)).astype(np.int64)
+    rest = h & np.uint64((1 << (64 - HLL_P)) - 1)
+    bits = np.zeros(len(rest), dtype=np.int64)
+    nz = rest > 0
+    bits[nz] = np.floor(np.log2(rest[nz].astype(np.float64))).astype(np.int64) + 1
+    rank = (64 - HLL_P) - bits + 1
+    registers = np.zeros((n_cells, 1 << HLL_P), dtype=np.uint8)
+    np.maximum.at(registers, (cell, bucket), rank.astype(np.uint8))
+    return registers
+
+
+def _hll_estimate(registers: np.ndarray) -> float:
+    m = registers.shape[-1]
+    alpha = 0.7213 / (1 + 1.079 / m)
+    est = alpha * m * m / np.sum(np.power(2.0, -registers.astype(np.float64)))
+    zeros = int(np.count_nonzero(registers == 0))
+    if est <= 2.5 * m and zeros:
+        est = m * np.log(m / zeros)
+    return float(est)
+
+
+def codes_mask(s: pd.Series, selected) -> np.ndarray:
+    """Filas de ``s`` con valor en ``selected``; en columnas ``category``, tabla de verdad por código."""
+    if not isinstance(s.dtype, pd.CategoricalDtype):
+        return s.isin(selected).to_numpy()
+    hit = s.cat.categories.get_indexer(pd.Index(list(selected), dtype=s.cat.categories.dtype))
+    wanted = np.zeros(len(s.cat.categories) + 1, dtype=bool)   # posición extra (-1): nulos, nunca pasan
+    wanted[hit[hit >= 0]] = True
+    return wanted[s.cat.codes.to_numpy()]
+
+
+def _dim_mask(frame: pd.DataFrame, filters: dict) -> np.ndarray:
+    mask = np.ones(len(frame), dtype=bool)
+    for col, selected in filters.items():
+        if col in frame.columns:
+            mask = mask & codes_mask(frame[col], selected)
+    return mask
+
+
+def select(frame: pd.DataFrame, start, end, filters: dict) -> pd.DataFrame:
+    """Rango de fechas por búsqueda binaria + filtros de dimensión.
+
+    ``frame`` debe estar indexado por fecha (``index_by_date``). Sirve tanto
+    para las tablas del cubo como para las filas crudas de ventas.
+    """
+    part = date_slice(frame, start, end)
+    if not filters:
+        return part
+    return part[_dim_mask(part, filters)]
+
+
+def filter_rows(ventas: pd.DataFrame, start, end, filters: dict) -> pd.DataFrame:
+    """Filas crudas del rango + filtros (sólo para Datos y Voice of Customer)."""
+    return select(ventas, start, end, filters)
+
+
+@dataclass
+class Cube:
+    cells: pd.DataFrame
+    products: pd.DataFrame
+    entrega: pd.DataFrame
+    resena: pd.DataFrame
+    dims: list[str]
+    orders_additive: bool
+    sketches: np.ndarray | None = None   # HLL (celdas × 2**HLL_P uint8): ~1 KB por celda, sólo si no son aditivos
+
+    def options(self, col: str, start, end, filters: dict) -> list:
+        """Valores de ``col`` presentes con los filtros ya aplicados (filtros en cascada)."""
+        values = select(self.cells, start, end, filters)[col]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            codes = np.unique(values.cat.codes.to_numpy())
+            return sorted(values.cat.categories[codes[codes >= 0]].tolist())
+        return sorted(values.dropna().unique().tolist())
+
+    def select(self, start, end, filters: dict) -> "CubeSlice":
+        return CubeSlice(self, select(self.cells, start, end, filters), start, end, filters)
+
+
+@dataclass
+class CubeSlice:
+    cube: Cube
+    cells: pd.DataFrame
+    start: object
+    end: object
+    filters: dict
+
+    @property
+    def exact(self) -> bool:
+        """``False`` si los pedidos distintos de la selección son una estimación HLL."""
+        return self.cube.orders_additive or self.cube.sketches is None
+
+    def pedidos(self) -> int:
+        if self.exact:
+            return int(self.cells["pedidos"].sum())
+        if not len(self.cells):
+            return 0
+        rows = self.cells["cell"].to_numpy()
+        return int(round(_hll_estimate(self.cube.sketches[rows].max(axis=0))))
+
+    def kpis(self, pedidos: int | None = None) -> KpiResult:
+        """KPIs del encabezado + rankings de canal/categoría/producto en una pasada.
+
+        ``pedidos`` reemplaza el conteo del cubo (p. ej. el exacto, contado sobre las filas).
+        """
+        if pedidos is None and not self.exact:
+            pedidos = self.pedidos()
+        return compute_kpis(self.cells, self.products(), pedidos=pedidos)
+
+    def by(self, col: str, measure: str = "ventas_netas") -> pd.Series:
+        return self.cells.groupby(col, observed=True)[measure].sum().sort_values(ascending=False)
+
+    def daily(self) -> pd.Series:
+        return self.cells.groupby("fecha")["ventas_netas"].sum().sort_index()
+
+    def daily_totals(self) -> pd.DataFrame:
+        """Medidas de los KPIs por día (pedidos distintos por día con HLL si no son aditivos)."""
+        out = self.cells.groupby("fecha")[MEASURES].sum().sort_index()
+        if not self.cube.orders_additive and self.cube.sketches is not None and len(out):
+            by_day = self.cells.groupby("fecha")["cell"]
+            out["pedidos"] = [round(_hll_estimate(self.cube.sketches[c.to_numpy()].max(axis=0))) for _, c in by_day]
+        return out
+
+    def by_weekday(self) -> pd.Series:
+        return self.cells.groupby(self.cells["fecha"].dt.day_name())["ventas_netas"].sum()
+
+    def products(self) -> pd.DataFrame:
+        p = self.cube.products
+        if p.empty:
+            return p
+        return select(p, self.start, self.end, self.filters)
+
+    def distribution(self, col: str) -> pd.DataFrame:
+        """Conteo por valor de ``col`` (> 0) para histogramas pre-binneados."""
+        d = getattr(self.cube, "entrega" if col == "dias_entrega" else "resena")
+        d = select(d, self.start, self.end, self.filters)
+        return d.groupby(col, as_index=False)["conteo"].sum()
+
+
+def build_cube(ventas: pd.DataFrame) -> Cube:
+    """Agrega ``ventas`` (ya tipado y con fecha_pedido válida) en el cubo diario.
+
+    Todas las tablas quedan ordenadas e indexadas por fecha (``index_by_date``).
+    """
+    dims = [d for d in DIMS if d in ventas.columns]
+    f = pd.DataFrame({"fecha": ventas["fecha_pedido"].dt.normalize()})
+    for d in dims:
+        f[d] = ventas[d]
+    keys = ["fecha"] + dims
+    f["ventas_netas"] = ventas["ventas_netas"].to_numpy(dtype="float64")
+    f["cancelado"] = is_cancelado(ventas["estado_pedido"]).astype("int64") if "estado_pedido" in ventas.columns else 0
+    for col, name in (("dias_entrega", "entrega"), ("resena", "resena")):
+        values = ventas[col].astype("float64") if col in ventas.columns else pd.Series(np.nan, index=ventas.index)
+        f[name] = values.where(values > 0)
+    ids = ventas["id_pedido"] if "id_pedido" in ventas.columns else pd.Series(np.arange(len(ventas)), index=ventas.index)
+    f["id_pedido"] = ids
+
+    g = f.groupby(keys, observed=True, sort=True)
+    cells = g.agg(
+        ventas_netas=("ventas_netas", "sum"),
+        filas=("ventas_netas", "size"),
+        pedidos=("id_pedido", "nunique"),
+        cancelados=("cancelado", "sum"),
+        entrega_sum=("entrega", "sum"),
+        entrega_n=("entrega", "count"),
+        resena_sum=("resena", "sum"),
+        resena_n=("resena", "count"),
+    ).reset_index()
+    cells["cell"] = np.arange(len(cells))
+
+    # Filas con alguna dimensión vacía no pasan los filtros del sidebar: quedan fuera del cubo.
+    in_cube = f[keys].notna().all(axis=1)
+    orders_additive = int(cells["pedidos"].sum()) == int(ids[in_cube].nunique())
+    sketches = None
+    if not orders_additive:
+        cell = g.ngroup().to_numpy()
+        ok = cell >= 0
+        sketches = _hll_registers(ids[ok], cell[ok], len(cells))
+
+    products = pd.DataFrame()
+    if "producto" in ventas.columns:
+        f["producto"] = ventas["producto"].astype("category")
+        products = f.groupby(keys + ["producto"], observed=True)["ventas_netas"].sum().reset_index()
+        products = index_by_date(products, "fecha")
+
+    dists = {}
+    for col, name in (("dias_entrega", "entrega"), ("resena", "resena")):
+        sub = f[f[name].notna()]
+        dists[name] = (
+            sub.groupby(keys + [name], observed=True).size()
+            .reset_index(name="conteo").rename(columns={name: col})
+        )
+        dists[name] = index_by_date(dists[name], "fecha")
+
+    cells = index_by_date(cells, "fecha")
+    return Cube(cells, products, dists["entrega"], dists["resena"], dims, orders_additive, sketches)
@@ -0,0 +1,106 @@
+"""Resolución automática de las series de tiempo (tendencia y KPIs diarios).
+
+Según el largo del rango, los puntos diarios se agregan por semana o por mes:
+montos y conteos se suman, ticket y % de cancelación se recalculan como
+cocientes, y entrega y rating se promedian ponderando por pedidos. Si aun así
+quedan más de ``MAX_POINTS`` (p. ej. datos intradiarios), LTTB (Largest
+Triangle Three Buckets) elige los puntos que conservan la forma de la curva,
+picos y valles incluidos.
+"""
+import numpy as np
+import pandas as pd
+
+RESOLUTIONS = {"auto": "Automática", "D": "Diaria", "W": "Semanal", "M": "Mensual"}
+AUTO_RAW_MAX_DAYS = 3        # rangos más cortos: puntos tal cual (intradiario)
+AUTO_DAILY_MAX_DAYS = 400
+AUTO_WEEKLY_MAX_DAYS = 1500
+MAX_POINTS = 1500
+
+ADDITIVE = {"ventas_netas", "ventas_netas_dia", "pedidos_dia", "cancelados_dia"}
+RATIOS = {  # métrica -> (numerador, denominador) en resumen_diario
+    "ticket_promedio_dia": ("ventas_netas_dia", "pedidos_dia"),
+    "pct_cancelados_dia": ("cancelados_dia", "pedidos_dia"),
+}
+WEIGHT = "pedidos_dia"
+
+
+def pick_resolution(times: pd.Series) -> str | None:
+    """``None`` (sin agregar), ``"D"``, ``"W"`` o ``"M"`` según el rango que cubre ``times``."""
+    if times.empty:
+        return None
+    span = (times.max() - times.min()) / pd.Timedelta(days=1)
+    if span <= AUTO_RAW_MAX_DAYS:
+        return None
+    if span <= AUTO_DAILY_MAX_DAYS:
+        return "D"
+    if span <= AUTO_WEEKLY_MAX_DAYS:
+        return "W"
+    return "M"
+
+
+def _bucket(times: pd.Series, resolution: str) -> pd.Series:
+    day = times.dt.normalize()
+    if resolution == "W":
+        return day - pd.to_timedelta(day.dt.weekday, unit="D")   # semanas de lunes a domingo
+    if resolution == "M":
+        return day - pd.to_timedelta(day.dt.day - 1, unit="D")
+    return day
+
+
+def resample(frame: pd.DataFrame, x: str, y: str, resolution: str | None) -> pd.DataFrame:
+    """``frame`` con un punto por día/semana/mes en ``x`` (``[x, y]``); sin cambios si ya tiene esa resolución."""
+    if resolution is None or frame.empty:
+        return frame
+    bucket = _bucket(frame[x], resolution)
+    if resolution == "D" and bucket.is_unique and bucket.equals(frame[x]):
+        return frame
+    g = frame.groupby(bucket.rename(x))
+    if y in ADDITIVE:
+        values = g[y].sum()
+    elif y in RATIOS and set(RATIOS[y]) <= set(frame.columns):
+        num, den = (g[c].sum() for c in RATIOS[y])
+        values = (num / den).where(den > 0, 0.0)
+    elif WEIGHT in frame.columns:
+        # 0 = el día no tuvo datos (sin entregas o sin reseñas): no pesa.
+        weight = frame[WEIGHT].astype("float64").where(frame[y] > 0, 0.0)
+        total = weight.groupby(bucket).sum()
+        values = ((frame[y].astype("float64") * weight).groupby(bucket).sum() / total).where(total > 0, 0.0)
+        values.index.name = x
+    else:
+        values = g[y].mean()
+    return values.rename(y).reset_index()
+
+
+def lttb(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """Índices de los ``n_out`` puntos que elige Largest Triangle Three Buckets (incluye extremos)."""
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    every = (n - 2) / (n_out - 2)
+    out = np.empty(n_out, dtype=np.int64)
+    out[0], out[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+        # Área del triángulo (punto elegido antes, candidato, promedio del bucket siguiente).
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(np.nan_to_num(area, nan=-1.0)))
+        out[i + 1] = a
+    return out
+
+
+def prepare_series(frame: pd.DataFrame, x: str, y: str, resolution: str = "auto",
+                   max_points: int = MAX_POINTS) -> tuple[pd.DataFrame, str | None]:
+    """Serie lista para graficar y la resolución aplicada (``None`` = puntos originales)."""
+    if not pd.api.types.is_datetime64_any_dtype(frame[x]):
+        return frame, None
+    res = pick_resolution(frame[x]) if resolution == "auto" else resolution
+    out = resample(frame, x, y, res)
+    if len(out) > max_points:
+        xs = out[x].to_numpy(dtype="datetime64[ns]").astype("int64").astype("float64")
+        out = out.iloc[lttb(xs, out[y].to_numpy(dtype="float64"), max_points)]
+    return out, res
@@ -0,0 +1,74 @@
+"""Paginado del lado del servidor y exportación diferida del tab Datos.
+
+La tabla nunca ordena ni envía el frame completo: se ordena sólo la columna
+elegida (o, para ``fecha_pedido``, se aprovecha que las filas ya vienen
+ordenadas por fecha) y se manda una página. La exportación se arma recién
+cuando alguien la pide, convirtiendo el frame por bloques a un buffer en
+memoria (``st.download_button`` igual termina leyendo todo a ``bytes``).
+"""
+import gzip
+import io
+import math
+
+import numpy as np
+import pandas as pd
+
+PAGE_SIZES = [50, 100, 250, 500]
+CHUNK_ROWS = 100_000
+
+# etiqueta -> (extensión, mime)
+EXPORT_FORMATS = {
+    "CSV": ("csv", "text/csv"),
+    "CSV (gzip)": ("csv.gz", "application/gzip"),
+    "Parquet": ("parquet", "application/vnd.apache.parquet"),
+}
+
+
+def n_pages(n_rows: int, page_size: int) -> int:
+    return max(1, math.ceil(n_rows / page_size))
+
+
+def sort_positions(frame: pd.DataFrame, col: str, ascending: bool) -> np.ndarray:
+    """Posiciones de ``frame`` ordenado por ``col`` (nulos al final)."""
+    s = frame[col].reset_index(drop=True)
+    if isinstance(s.dtype, pd.CategoricalDtype) and not s.cat.categories.is_monotonic_increasing:
+        # Diccionario sin ordenar (p. ej. tras unir tiendas): se ordena por valor, no por código.
+        s = s.cat.reorder_categories(s.cat.categories.sort_values())
+    return s.sort_values(ascending=ascending, kind="stable", na_position="last").index.to_numpy()
+
+
+def page(frame: pd.DataFrame, col: str, ascending: bool, number: int, page_size: int) -> pd.DataFrame:
+    """Página ``number`` (desde 0) del frame ordenado por ``col``."""
+    start = number * page_size
+    # Filas ya ordenadas por fecha (index_by_date): la página es un corte directo.
+    if col == "fecha_pedido" and isinstance(frame.index, pd.DatetimeIndex) and frame.index.is_monotonic_increasing:
+        n = len(frame)
+        if ascending:
+            return frame.iloc[start:start + page_size]
+        return frame.iloc[max(n - start - page_size, 0):max(n - start, 0)].iloc[::-1]
+    return frame.iloc[sort_positions(frame, col, ascending)[start:start + page_size]]
+
+
+def write_export(frame: pd.DataFrame, fmt: str, chunk_rows: int = CHUNK_ROWS) -> io.BytesIO:
+    """Buffer (posicionado al inicio) con ``frame`` en el formato pedido.
+
+    ``BytesIO`` es uno de los tipos que acepta la descarga diferida de Streamlit.
+    """
+    out = io.BytesIO()
+    if fmt == "Parquet":
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        schema = pa.Schema.from_pandas(frame, preserve_index=False)
+        with pq.ParquetWriter(out, schema) as writer:
+            for i in range(0, len(frame), chunk_rows):
+                writer.write_table(pa.Table.from_pandas(frame.iloc[i:i + chunk_rows], schema=schema, preserve_index=False))
+    else:
+        sink = gzip.GzipFile(fileobj=out, mode="wb") if fmt == "CSV (gzip)" else out
+        for i in range(0, max(len(frame), 1), chunk_rows):
+            chunk = frame.iloc[i:i + chunk_rows].to_csv(index=False, header=(i == 0))
+            sink.write(chunk.encode("utf-8"))
+        if sink is not out:
+            sink.close()
+    out.seek(0)
+    return out
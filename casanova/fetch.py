@@ -0,0 +1,108 @@
+"""Descarga de las pestañas de Google Sheets.
+
+Una sola ``requests.Session`` por proceso (conexiones keep-alive reutilizadas
+entre pestañas y refrescos), timeouts de conexión y lectura por pedido, y
+reintentos con backoff exponencial ante errores de red y 429/5xx. Cada pestaña
+tiene dos URLs equivalentes (``export`` y ``gviz``): se pide la primera y, si
+no respondió en ``HEDGE_DELAY`` segundos o falló, se lanza la segunda en
+paralelo; gana la primera respuesta válida.
+"""
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+FETCH_TIMEOUT = 30        # segundos de lectura por pedido
+CONNECT_TIMEOUT = 5
+FETCH_RETRIES = 2         # reintentos por URL (además del primer intento)
+FETCH_BACKOFF = 0.5       # 0.5 s, 1 s, 2 s…
+RETRY_STATUS = (429, 500, 502, 503, 504)
+HEDGE_DELAY = float(os.environ.get("CASANOVA_HEDGE_DELAY", "2"))
+
+_session: requests.Session | None = None
+_session_lock = threading.Lock()
+
+
+def session() -> requests.Session:
+    """Sesión HTTP compartida (pool de conexiones + reintentos)."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            retry = Retry(
+                total=FETCH_RETRIES,
+                backoff_factor=FETCH_BACKOFF,
+                status_forcelist=RETRY_STATUS,
+                allowed_methods=frozenset({"GET"}),
+                raise_on_status=False,
+            )
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=retry)
+            s = requests.Session()
+            s.mount("http://", adapter)
+            s.mount("https://", adapter)
+            _session = s
+        return _session
+
+
+def fetch_bytes(url: str, etag: str | None = None, last_modified: str | None = None,
+                timeout: float = FETCH_TIMEOUT) -> tuple[bytes | None, dict]:
+    """Descarga ``url``; devuelve ``(None, headers)`` si el servidor responde 304."""
+    if not url.startswith(("http://", "https://")):
+        return Path(url).read_bytes(), {}
+
+    headers = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+    resp = session().get(url, headers=headers, timeout=(CONNECT_TIMEOUT, timeout))
+    if resp.status_code == 304:
+        return None, {"etag": etag, "last_modified": last_modified}
+    resp.raise_for_status()
+    return resp.content, {"etag": resp.headers.get("ETag"), "last_modified": resp.headers.get("Last-Modified")}
+
+
+def fetch_first(attempts: list[tuple[str, str | None, str | None]], timeout: float = FETCH_TIMEOUT,
+                hedge_delay: float = HEDGE_DELAY) -> tuple[str, bytes | None, dict]:
+    """Primera respuesta válida entre URLs equivalentes: ``(url, contenido, headers)``.
+
+    ``attempts`` son ``(url, etag, last_modified)`` en orden de preferencia. La
+    siguiente URL se lanza cuando la anterior falla o tarda más de
+    ``hedge_delay``. Si todas fallan se relanza el primer error.
+    """
+    if len(attempts) == 1:
+        url, etag, last_modified = attempts[0]
+        return (url, *fetch_bytes(url, etag, last_modified, timeout))
+
+    remaining = list(attempts)
+    pending: dict = {}
+    errors: list[Exception] = []
+    pool = ThreadPoolExecutor(max_workers=len(attempts), thread_name_prefix="fetch")
+
+    def launch():
+        url, etag, last_modified = remaining.pop(0)
+        pending[pool.submit(fetch_bytes, url, etag, last_modified, timeout)] = url
+
+    try:
+        while pending or remaining:
+            if not pending:
+                launch()
+            done, _ = wait(pending, timeout=hedge_delay if remaining else None, return_when=FIRST_COMPLETED)
+            if not done:
+                launch()   # la URL en curso tarda: se cubre con la siguiente
+                continue
+            for future in done:
+                url = pending.pop(future)
+                try:
+                    content, headers = future.result()
+                except Exception as e:
+                    errors.append(e)
+                    continue
+                return url, content, headers
+        raise errors[0]
+    finally:
+        # No se espera a la URL perdedora: termina sola (o por timeout) en su hilo.
+        pool.shutdown(wait=False, cancel_futures=True)
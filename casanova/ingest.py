@@ -0,0 +1,98 @@
+"""Ingesta incremental de ventas_bazar.
+
+n8n sólo agrega pedidos al final de la hoja, así que el CSV nuevo empieza con
+exactamente los mismos bytes que el anterior. Se guarda como marca de agua el
+largo en bytes ya ingerido (más la cantidad de filas y el último id_pedido):
+si el prefijo coincide con el hash del snapshot anterior, sólo se parsean y
+tipan las filas nuevas y se agregan al frame ya tipado. Ante cualquier otra
+edición de la hoja se reconstruye completo. El frame se guarda ordenado por
+fecha_pedido para que la app sólo tenga que indexarlo.
+"""
+import hashlib
+import io
+from typing import Callable
+
+import pandas as pd
+
+from casanova.schema import concat_typed
+from casanova.snapshots import SnapshotMeta
+from casanova.transform import read_resumen_csv, read_ventas_csv
+
+INGEST_VERSION = "ventas-4"
+RESUMEN_VERSION = "resumen-1"
+
+
+def _sorted(frame: pd.DataFrame) -> pd.DataFrame:
+    if "fecha_pedido" in frame.columns and not frame["fecha_pedido"].dropna().is_monotonic_increasing:
+        frame = frame.sort_values("fecha_pedido", kind="stable", ignore_index=True)
+    return frame
+
+
+def _watermark(content: bytes, columns: list[str], frame: pd.DataFrame, new: pd.DataFrame,
+               mode: str) -> dict:
+    last_id = None
+    if "id_pedido" in new.columns and len(new):
+        last_id = str(new["id_pedido"].iloc[-1])
+    return {
+        "offset": len(content),
+        "rows": len(frame),
+        "last_id": last_id,
+        "columns": columns,
+        "mode": mode,
+        "delta_rows": len(new),
+    }
+
+
+def _row_boundary(content: bytes, offset: int) -> bool:
+    # El prefijo ingerido tiene que terminar en un fin de línea (o la cola empezar con uno);
+    # si no, lo que sigue es la continuación de la última fila.
+    return content[offset - 1:offset] in (b"\n", b"\r") or content[offset:offset + 1] in (b"\n", b"\r")
+
+
+def _id_key(value: str) -> tuple[int, str]:
+    # Ids como CNB-00000123: más largo es posterior; a igual largo, orden de texto.
+    return len(value), value
+
+
+def _after(new: pd.DataFrame, last_id: str | None) -> bool:
+    """¿La primera fila nueva es posterior al último id_pedido ingerido?"""
+    if last_id is None or "id_pedido" not in new.columns:
+        return True
+    ids = new["id_pedido"].dropna()
+    return not len(ids) or _id_key(str(ids.iloc[0])) > _id_key(str(last_id))
+
+
+def parse_ventas(content: bytes, meta: SnapshotMeta | None,
+                 previous: Callable[[], pd.DataFrame]) -> tuple[pd.DataFrame, dict]:
+    """Parser de ``load_sheet`` para ventas_bazar: devuelve el frame ya tipado."""
+    state = meta.extra if meta is not None else {}
+    offset = state.get("offset")
+
+    if (
+        offset and len(content) > offset
+        and _row_boundary(content, offset)
+        and hashlib.sha256(content[:offset]).hexdigest() == meta.sha256
+    ):
+        columns = state["columns"]
+        new = read_ventas_csv(content[offset:], names=columns)
+        if not _after(new, state.get("last_id")):
+            # La cola no son pedidos nuevos (p. ej. se completó la última celda): rearmado completo.
+            return parse_ventas(content, None, previous)
+        frame = _sorted(concat_typed([previous(), new]))
+        watermark = _watermark(content, columns, frame, new, "incremental")
+        if watermark["last_id"] is None:
+            watermark["last_id"] = state.get("last_id")
+        # Para recalcular sólo los días tocados (resumen local).
+        watermark["base_sha256"] = meta.sha256
+        watermark["days"] = sorted(new["fecha_pedido"].dropna().dt.strftime("%Y-%m-%d").unique().tolist()) if "fecha_pedido" in new.columns else []
+        return frame, watermark
+
+    columns = list(pd.read_csv(io.BytesIO(content), nrows=0).columns)
+    new = read_ventas_csv(content, names=None)
+    return _sorted(new), _watermark(content, columns, new, new, "full")
+
+
+def parse_resumen(content: bytes, meta: SnapshotMeta | None,
+                  previous: Callable[[], pd.DataFrame]) -> tuple[pd.DataFrame, dict]:
+    # resumen_diario tiene una fila por día: se reparsea entera, pero ya tipada.
+    return read_resumen_csv(content), {}
@@ -0,0 +1,119 @@
+"""Motor de KPIs del encabezado: una sola pasada sobre las celdas del cubo.
+
+Las sumas (ventas, cancelados, días de entrega, reseñas) salen de una única
+reducción sobre el bloque de medidas, y los líderes por canal / categoría /
+producto de ``np.bincount`` sobre los códigos categóricos, sin ``groupby``.
+El resultado es un objeto tipado que los tabs reutilizan.
+"""
+import datetime as dt
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+MEASURES = ["ventas_netas", "pedidos", "cancelados", "entrega_sum", "entrega_n", "resena_sum", "resena_n"]
+
+
+@dataclass(frozen=True)
+class KpiResult:
+    total_ventas: float
+    pedidos: int
+    ticket: float
+    cancelados: int
+    pct_cancel: float
+    entrega_avg: float
+    rating_avg: float
+    last_date: dt.date | None
+    # Ventas netas por valor, ordenadas de mayor a menor (sólo valores presentes).
+    by_channel: pd.Series
+    by_category: pd.Series
+    by_product: pd.Series
+
+    @staticmethod
+    def _leader(s: pd.Series) -> str:
+        return s.index[0] if len(s) else "—"
+
+    @property
+    def top_channel(self) -> str:
+        return self._leader(self.by_channel)
+
+    @property
+    def top_category(self) -> str:
+        return self._leader(self.by_category)
+
+    @property
+    def top_product(self) -> str:
+        return self._leader(self.by_product)
+
+    def to_dict(self) -> dict:
+        """Versión serializable a JSON (rankings como ``{valor: ventas}``)."""
+        return {
+            "total_ventas": self.total_ventas,
+            "pedidos": self.pedidos,
+            "ticket": self.ticket,
+            "cancelados": self.cancelados,
+            "pct_cancel": self.pct_cancel,
+            "entrega_avg": self.entrega_avg,
+            "rating_avg": self.rating_avg,
+            "last_date": self.last_date.isoformat() if self.last_date else None,
+            "top_channel": self.top_channel,
+            "top_category": self.top_category,
+            "top_product": self.top_product,
+            "by_channel": {str(k): float(v) for k, v in self.by_channel.items()},
+            "by_category": {str(k): float(v) for k, v in self.by_category.items()},
+            "by_product": {str(k): float(v) for k, v in self.by_product.items()},
+        }
+
+
+def _empty_ranking(col: str) -> pd.Series:
+    # Con el nombre del índice: los gráficos usan reset_index() aunque no haya filas.
+    return pd.Series(dtype="float64", name="ventas_netas", index=pd.Index([], dtype="str", name=col))
+
+
+def _ranking(frame: pd.DataFrame, col: str, weights: np.ndarray) -> pd.Series:
+    if col not in frame.columns or not isinstance(frame[col].dtype, pd.CategoricalDtype):
+        return _empty_ranking(col)
+    codes = frame[col].cat.codes.to_numpy()
+    ok = codes >= 0
+    n = len(frame[col].cat.categories)
+    totals = np.bincount(codes[ok], weights=weights[ok], minlength=n)
+    present = np.bincount(codes[ok], minlength=n) > 0
+    out = pd.Series(totals[present], index=pd.Index(frame[col].cat.categories[present], name=col), name="ventas_netas")
+    return out.sort_values(ascending=False, kind="stable")
+
+
+def compute_kpis(cells: pd.DataFrame, products: pd.DataFrame | None = None,
+                 pedidos: int | None = None) -> KpiResult:
+    """KPIs + rankings a partir de celdas del cubo ya filtradas.
+
+    ``pedidos`` permite pasar el conteo de pedidos distintos cuando no es
+    aditivo entre celdas (estimación HLL del cubo).
+    """
+    block = np.zeros((len(cells), len(MEASURES)))
+    for i, m in enumerate(MEASURES):
+        if m in cells.columns:
+            block[:, i] = cells[m].to_numpy(dtype="float64")
+    ventas_s, pedidos_s, cancelados, entrega_sum, entrega_n, resena_sum, resena_n = block.sum(axis=0)
+
+    total_ventas = float(ventas_s)
+    pedidos = int(pedidos_s) if pedidos is None else int(pedidos)
+    cancelados = int(cancelados)
+    weights = block[:, 0]
+
+    by_product = _empty_ranking("producto")
+    if products is not None and len(products):
+        by_product = _ranking(products, "producto", products["ventas_netas"].to_numpy(dtype="float64"))
+
+    return KpiResult(
+        total_ventas=total_ventas,
+        pedidos=pedidos,
+        ticket=float(total_ventas / pedidos) if pedidos else 0,
+        cancelados=cancelados,
+        pct_cancel=(cancelados / pedidos) if pedidos else 0,
+        entrega_avg=float(entrega_sum / entrega_n) if entrega_n else 0.0,
+        rating_avg=float(resena_sum / resena_n) if resena_n else 0.0,
+        last_date=cells["fecha"].max().date() if len(cells) else None,
+        by_channel=_ranking(cells, "canal", weights),
+        by_category=_ranking(cells, "categoria", weights),
+        by_product=by_product,
+    )
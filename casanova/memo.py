@@ -0,0 +1,179 @@
+"""Memoización compartida entre sesiones (LRU acotado por tamaño).
+
+Las claves incluyen la versión de los datos (hash del snapshot), el rango de
+fechas y la selección de filtros, así que dos personas mirando la misma vista
+comparten frames, agregados y figuras. Si varias sesiones piden la misma clave
+a la vez, sólo una la calcula y el resto espera el resultado.
+"""
+import os
+import sys
+import threading
+from collections import OrderedDict
+from dataclasses import fields, is_dataclass
+
+import numpy as np
+import pandas as pd
+
+MEMO_MAX_BYTES = int(float(os.environ.get("CASANOVA_MEMO_MB", "256")) * 1024 * 1024)
+# Frames base (ventas indexado, resumen, notas, anomalías): presupuesto propio para que las
+# figuras y agregados no los desalojen (y viceversa).
+FRAMES_MAX_BYTES = int(float(os.environ.get("CASANOVA_MEMO_FRAMES_MB", "1024")) * 1024 * 1024)
+
+
+def freeze(filters: dict) -> tuple:
+    """Selección de filtros → tupla hasheable e independiente del orden."""
+    return tuple((col, tuple(sorted(map(str, values)))) for col, values in sorted(filters.items()))
+
+
+def sizeof(value) -> int:
+    """Tamaño aproximado en bytes (superficial para objetos compuestos).
+
+    Las columnas ``object`` se miden con ``deep=True``: sin eso cuentan 8 bytes
+    por puntero y un frame con textos (notas, productos) parece 10 veces menor.
+    """
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, (pd.Series, pd.Index)):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    if isinstance(value, (str, bytes)):
+        return len(value)
+    if is_dataclass(value):
+        return sum(sizeof(getattr(value, f.name)) for f in fields(value))
+    if isinstance(value, (tuple, list)):
+        return sum(sizeof(v) for v in value)
+    if isinstance(value, dict):
+        return sum(sizeof(v) for v in value.values())
+    return sys.getsizeof(value)
+
+
+class _Pending:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class _Pool:
+    """LRU con su propio presupuesto de bytes."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.items: OrderedDict = OrderedDict()   # clave -> (valor, bytes)
+        self.bytes = 0
+
+
+class Memo:
+    """LRU compartido; los namespaces de ``budgets`` tienen presupuesto propio.
+
+    Por defecto "frames" va aparte (``FRAMES_MAX_BYTES``) y el resto comparte
+    ``max_bytes``. Un valor más grande que el presupuesto de su namespace no se
+    guarda: se cuenta en ``stats()`` como "rejected".
+    """
+
+    def __init__(self, max_bytes: int = MEMO_MAX_BYTES, budgets: dict[str, int] | None = None):
+        self._lock = threading.Lock()
+        self._shared = _Pool(max_bytes)
+        self._pools = {ns: _Pool(b) for ns, b in ({"frames": FRAMES_MAX_BYTES} if budgets is None else budgets).items()}
+        self._pending: dict = {}
+        self._counters: dict = {}
+
+    @property
+    def max_bytes(self) -> int:
+        return self._shared.max_bytes + sum(p.max_bytes for p in self._pools.values())
+
+    def _pool(self, namespace: str) -> _Pool:
+        return self._pools.get(namespace, self._shared)
+
+    def _count(self, namespace: str, what: str) -> None:
+        c = self._counters.setdefault(namespace, {"hits": 0, "misses": 0, "evictions": 0, "rejected": 0})
+        c[what] += 1
+
+    def get(self, namespace: str, key, compute):
+        """Devuelve el valor de ``(namespace, key)``, calculándolo con ``compute()`` si falta."""
+        full_key = (namespace, key)
+        items = self._pool(namespace).items
+        with self._lock:
+            if full_key in items:
+                items.move_to_end(full_key)
+                self._count(namespace, "hits")
+                return items[full_key][0]
+            pending = self._pending.get(full_key)
+            owner = pending is None
+            if owner:
+                pending = self._pending[full_key] = _Pending()
+                self._count(namespace, "misses")
+            else:
+                self._count(namespace, "hits")
+
+        if not owner:
+            pending.done.wait()
+            if pending.error is not None:
+                raise pending.error
+            return pending.value
+
+        try:
+            pending.value = compute()
+        except BaseException as e:
+            pending.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._pending[full_key]
+                if pending.error is None:
+                    self._store(namespace, full_key, pending.value)
+            pending.done.set()
+        return pending.value
+
+    def peek(self, namespace: str, key):
+        """Valor de ``(namespace, key)`` si ya está calculado; ``None`` si no (no calcula nada)."""
+        full_key = (namespace, key)
+        items = self._pool(namespace).items
+        with self._lock:
+            if full_key not in items:
+                self._count(namespace, "misses")
+                return None
+            items.move_to_end(full_key)
+            self._count(namespace, "hits")
+            return items[full_key][0]
+
+    def put(self, namespace: str, key, value) -> None:
+        """Guarda un valor calculado por fuera de ``get`` (p. ej. varios en una sola pasada)."""
+        full_key = (namespace, key)
+        pool = self._pool(namespace)
+        with self._lock:
+            if full_key in pool.items:
+                pool.bytes -= pool.items.pop(full_key)[1]
+            self._store(namespace, full_key, value)
+
+    def _store(self, namespace: str, full_key, value) -> None:
+        pool = self._pool(namespace)
+        size = sizeof(value)
+        if size > pool.max_bytes:
+            self._count(namespace, "rejected")
+            return
+        pool.items[full_key] = (value, size)
+        pool.bytes += size
+        while pool.bytes > pool.max_bytes and pool.items:
+            (ns, _), (_, old_size) = pool.items.popitem(last=False)
+            pool.bytes -= old_size
+            self._count(ns, "evictions")
+
+    def clear(self) -> None:
+        with self._lock:
+            for pool in (self._shared, *self._pools.values()):
+                pool.items.clear()
+                pool.bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            pools = (self._shared, *self._pools.values())
+            per_ns = {ns: dict(c) for ns, c in self._counters.items()}
+            for pool in pools:
+                for (ns, _), (_, size) in pool.items.items():
+                    c = per_ns.setdefault(ns, {"hits": 0, "misses": 0, "evictions": 0, "rejected": 0})
+                    c["entries"] = c.get("entries", 0) + 1
+                    c["bytes"] = c.get("bytes", 0) + size
+            return {"bytes": sum(p.bytes for p in pools), "max_bytes": self.max_bytes,
+                    "entries": sum(len(p.items) for p in pools), "namespaces": per_ns}
@@ -0,0 +1,167 @@
+"""Etiquetas y búsqueda sobre ``notas_cliente`` (Voice of Customer), sin servicios externos.
+
+Cada nota distinta se normaliza una sola vez (minúsculas, sin tildes) y se
+parte en palabras; ese vocabulario se guarda junto al snapshot de ventas y,
+tras una ingesta incremental, sólo se tokenizan las notas nuevas. En memoria
+se arma un índice invertido palabra → notas y las etiquetas salen de reglas de
+palabras clave aplicadas al vocabulario (no nota por nota). Filtrar o contar
+filas por etiqueta o término es una búsqueda binaria más una máscara numpy,
+así que escala a millones de notas repetidas.
+"""
+import functools
+import re
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+from casanova.snapshots import SheetSnapshot, SnapshotMeta, SnapshotStore
+from casanova.transform import strip_accents
+
+NOTES_VERSION = "notas-1"   # cambia si cambia la normalización o el tokenizador
+NOTES_COL = "notas_cliente"
+
+# Etiqueta -> prefijos de palabra (ya normalizados: minúsculas, sin tildes).
+TAG_RULES = {
+    "envío": ("envi", "correo", "demor", "sucursal", "entreg", "domicilio", "direccion", "retras", "llego"),
+    "calidad": ("calidad", "color", "roto", "rota", "fall", "defect", "distint", "tamano", "material"),
+    "atención": ("atencion", "consult", "respuesta", "respond", "consejo", "fotos", "stock", "talla"),
+    "pago": ("pago", "rechaz", "factura", "tarjeta", "transferencia", "cuota", "banco"),
+    "regalo": ("regal", "envolv", "cumpleanos"),
+    "cancelación": ("cancel",),
+    "positivo": ("positiv", "recomend", "volvio", "destac", "excelente", "encant", "gracias"),
+}
+_WORD = re.compile(r"[^\W_]+")
+
+
+@functools.lru_cache(maxsize=65536)
+def normalize(word: str) -> str:
+    return strip_accents(word)
+
+
+def tokenize(text: str) -> list[str]:
+    """Palabras de ``text`` en minúsculas y sin tildes (las notas repiten palabras: se cachean)."""
+    return [normalize(w) for w in _WORD.findall(str(text).lower())]
+
+
+def vocabulary(texts) -> pd.DataFrame:
+    """Una fila por nota distinta: ``texto`` y sus palabras separadas por espacio (``tokens``)."""
+    texts = pd.Index(texts, dtype="str").dropna().unique()
+    return pd.DataFrame({"texto": texts, "tokens": [" ".join(tokenize(t)) for t in texts]})
+
+
+def extend_vocabulary(vocab: pd.DataFrame, texts) -> pd.DataFrame:
+    """``vocab`` más las notas de ``texts`` que todavía no tiene (los ids existentes no cambian)."""
+    texts = pd.Index(texts, dtype="str").dropna().unique()
+    new = texts[pd.Index(vocab["texto"]).get_indexer(texts) < 0]
+    if not len(new):
+        return vocab
+    return pd.concat([vocab, vocabulary(new)], ignore_index=True)
+
+
+def notes_vocabulary(ventas_snap: SheetSnapshot, ventas: pd.DataFrame | Callable[[], pd.DataFrame],
+                     store: SnapshotStore | None = None) -> pd.DataFrame:
+    """Vocabulario de notas para la versión de ``ventas_snap``, guardado junto al snapshot.
+
+    Tras una ingesta incremental sobre la versión ya indexada sólo se
+    tokenizan las notas nuevas; si no, se rearma y se descartan las que ya no
+    aparecen.
+    """
+    store = store or SnapshotStore()
+    key = f"{ventas_snap.meta.key}_notas"
+    meta = store.read_meta(key)
+    if meta is not None and meta.parser_version != NOTES_VERSION:
+        meta = None
+    if meta is not None and meta.sha256 == ventas_snap.meta.sha256:
+        return store.read_frame(key)
+
+    ventas = ventas() if callable(ventas) else ventas
+    texts = ventas[NOTES_COL] if NOTES_COL in ventas.columns else pd.Series([], dtype="str")
+    extra = ventas_snap.meta.extra
+    if meta is not None and extra.get("mode") == "incremental" and extra.get("base_sha256") == meta.sha256:
+        vocab = extend_vocabulary(store.read_frame(key), texts)
+        mode = "incremental"
+    else:
+        vocab = vocabulary(texts)
+        mode = "full"
+
+    store.write(vocab, SnapshotMeta(
+        key=key,
+        sha256=ventas_snap.meta.sha256,
+        rows=len(vocab),
+        fetched_at=time.time(),
+        parser_version=NOTES_VERSION,
+        extra={"mode": mode},
+    ))
+    return vocab
+
+
+def _union(arrays: list[np.ndarray]) -> np.ndarray:
+    if not arrays:
+        return np.empty(0, dtype=np.int64)
+    return arrays[0] if len(arrays) == 1 else np.unique(np.concatenate(arrays))
+
+
+@dataclass
+class NoteIndex:
+    texts: pd.Index          # nota distinta por id
+    words: np.ndarray        # palabras del vocabulario, ordenadas
+    postings: list           # por palabra: ids (ordenados) de las notas que la contienen
+    tags: dict               # etiqueta -> ids de notas
+
+    @classmethod
+    def build(cls, vocabs: list[pd.DataFrame], rules: dict = TAG_RULES) -> "NoteIndex":
+        """Índice sobre uno o más vocabularios (p. ej. uno por tienda); las notas repetidas se unifican."""
+        vocab = pd.concat(vocabs, ignore_index=True) if vocabs else vocabulary([])
+        vocab = vocab.drop_duplicates("texto", ignore_index=True)
+        pairs = vocab["tokens"].str.split(" ").explode()
+        pairs = pairs[pairs.notna() & (pairs != "")]
+        # Palabra -> código en orden alfabético; el orden estable deja los ids de cada palabra crecientes.
+        codes, words = pd.factorize(pairs, sort=True)
+        pairs = pd.DataFrame({"word": codes, "id": pairs.index.to_numpy(dtype=np.int64)}).drop_duplicates()
+        pairs = pairs.sort_values("word", kind="stable")
+        starts = np.searchsorted(pairs["word"].to_numpy(), np.arange(1, len(words)))
+        postings = np.split(pairs["id"].to_numpy(), starts) if len(words) else []
+        index = cls(pd.Index(vocab["texto"], dtype="str"), np.asarray(words, dtype=str), postings, {})
+        index.tags = {tag: _union([index.prefix(p) for p in prefixes]) for tag, prefixes in rules.items()}
+        return index
+
+    def prefix(self, prefix: str) -> np.ndarray:
+        """Ids de las notas con alguna palabra que empieza con ``prefix``."""
+        lo = np.searchsorted(self.words, prefix, side="left")
+        hi = np.searchsorted(self.words, prefix + "\uffff", side="left")
+        return _union(self.postings[lo:hi])
+
+    def search(self, query: str) -> np.ndarray | None:
+        """Notas que contienen todas las palabras de ``query`` (como prefijo); ``None`` si no hay términos."""
+        result = None
+        for term in dict.fromkeys(tokenize(query)):
+            ids = self.prefix(term)
+            result = ids if result is None else np.intersect1d(result, ids, assume_unique=True)
+        return result
+
+    def tagged(self, tags) -> np.ndarray:
+        """Notas con al menos una de ``tags``."""
+        return _union([self.tags[t] for t in tags if t in self.tags])
+
+    def ids_of(self, notes: pd.Series) -> np.ndarray:
+        """Id de nota por fila (-1 si está vacía o no está en el índice)."""
+        codes, uniques = pd.factorize(notes)   # se busca cada nota distinta una sola vez
+        ids = self.texts.get_indexer(pd.Index(uniques, dtype="str"))
+        return np.where(codes >= 0, ids[codes], -1) if len(ids) else np.full(len(codes), -1)
+
+    def mask(self, row_ids: np.ndarray, ids: np.ndarray) -> np.ndarray:
+        """Filas (según ``ids_of``) cuya nota está en ``ids``."""
+        lookup = np.zeros(len(self.texts) + 1, dtype=bool)
+        lookup[ids + 1] = True
+        return lookup[row_ids + 1]   # -1 (sin nota) cae en la posición 0: False
+
+    def labels(self, row_ids: np.ndarray) -> np.ndarray:
+        """Etiquetas de cada fila como texto (``"envío, regalo"``)."""
+        out = np.full(len(row_ids), "", dtype=object)
+        for tag, ids in self.tags.items():
+            has = self.mask(row_ids, ids)
+            out[has] = np.where(out[has] == "", tag, out[has] + ", " + tag)
+        return out
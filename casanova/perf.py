@@ -0,0 +1,193 @@
+"""Tiempos y memoria por etapa (descarga, parseo, cubo, consultas, figuras).
+
+Apagado por defecto: ``stage()`` sólo lee una ``ContextVar`` y sigue. Con
+``CASANOVA_PROFILE=1`` (o el toggle de la app) cada corrida junta sus etapas
+con segundos y delta de RSS; con ``CASANOVA_PROFILE=mem`` además mide la
+memoria neta asignada por Python (tracemalloc, más caro). Al cerrar la
+corrida se escribe una línea JSON en el logger ``casanova.perf`` y, si está
+definido, se agrega a ``CASANOVA_PROFILE_LOG`` (JSONL para n8n, Loki, etc.).
+``python -m casanova.perf <log>`` resume ese archivo por etapa.
+
+Las etapas que corren en otros hilos (pestañas descargadas en paralelo) se
+registran si el hilo se lanzó con ``contextvars.copy_context().run``.
+"""
+import argparse
+import contextvars
+import json
+import logging
+import math
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+
+PROFILE = os.environ.get("CASANOVA_PROFILE", "").strip().lower()
+PROFILE_LOG = os.environ.get("CASANOVA_PROFILE_LOG")
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+logger = logging.getLogger("casanova.perf")
+
+_run: contextvars.ContextVar = contextvars.ContextVar("casanova_perf_run", default=None)
+_parent: contextvars.ContextVar = contextvars.ContextVar("casanova_perf_parent", default=None)
+
+
+def rss_bytes() -> int | None:
+    """Memoria residente actual del proceso (Linux); ``None`` si no se puede leer."""
+    try:
+        with open("/proc/self/statm") as fh:
+            return int(fh.read().split()[1]) * PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+@dataclass
+class Stage:
+    name: str
+    parent: str | None        # etapa que la contiene (None = nivel superior)
+    seconds: float
+    rss_delta: int | None     # bytes
+    py_delta: int | None      # bytes netos asignados por Python (sólo modo "mem")
+    thread: str
+
+
+@dataclass
+class Run:
+    name: str
+    memory: bool = False
+    started: float = field(default_factory=time.perf_counter)
+    stages: list = field(default_factory=list)
+    cache_before: dict | None = None
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def add(self, stage: Stage) -> None:
+        with self._lock:
+            self.stages.append(stage)
+
+
+def enabled_by_default() -> bool:
+    return PROFILE not in ("", "0", "false", "no", "off")
+
+
+def begin(name: str, enabled: bool | None = None, memo=None) -> Run | None:
+    """Abre una corrida en el contexto actual; devuelve ``None`` si la medición está apagada."""
+    if not (enabled_by_default() if enabled is None else enabled):
+        _run.set(None)
+        return None
+    memory = PROFILE == "mem"
+    if memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    run = Run(name, memory, cache_before=memo.stats()["namespaces"] if memo is not None else None)
+    _run.set(run)
+    return run
+
+
+@contextmanager
+def stage(name: str):
+    """Mide el bloque como etapa ``name`` de la corrida activa (si la hay)."""
+    run = _run.get()
+    if run is None:
+        yield
+        return
+    token = _parent.set(name)
+    parent = token.old_value if token.old_value is not contextvars.Token.MISSING else None
+    rss0 = rss_bytes()
+    py0 = tracemalloc.get_traced_memory()[0] if run.memory else None
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - t0
+        _parent.reset(token)
+        rss1 = rss_bytes()
+        run.add(Stage(
+            name=name,
+            parent=parent,
+            seconds=seconds,
+            rss_delta=rss1 - rss0 if rss0 is not None and rss1 is not None else None,
+            py_delta=tracemalloc.get_traced_memory()[0] - py0 if py0 is not None else None,
+            thread=threading.current_thread().name,
+        ))
+
+
+def timed(name: str, fn):
+    """``fn`` envuelta en ``stage(name)`` (para cómputos que se pasan como callable)."""
+    def wrapper(*args, **kwargs):
+        with stage(name):
+            return fn(*args, **kwargs)
+    return wrapper
+
+
+def cache_delta(before: dict, after: dict) -> dict:
+    """Aciertos/fallos del memo por namespace durante la corrida (todo el proceso)."""
+    out = {}
+    for ns, c in after.items():
+        b = before.get(ns, {})
+        hits = c.get("hits", 0) - b.get("hits", 0)
+        misses = c.get("misses", 0) - b.get("misses", 0)
+        if hits or misses:
+            out[ns] = {"hits": hits, "misses": misses, "hit_rate": round(hits / (hits + misses), 3)}
+    return out
+
+
+def end(run: Run | None, memo=None, **extra) -> dict | None:
+    """Cierra la corrida, la registra como JSON y la devuelve como dict."""
+    if run is None:
+        return None
+    _run.set(None)
+    record = {
+        "run": run.name,
+        "ts": round(time.time(), 3),
+        "seconds": round(time.perf_counter() - run.started, 6),
+        "rss_bytes": rss_bytes(),
+        **extra,
+        "stages": [asdict(s) | {"seconds": round(s.seconds, 6)} for s in run.stages],
+        "cache": cache_delta(run.cache_before, memo.stats()["namespaces"]) if memo is not None and run.cache_before is not None else {},
+    }
+    line = json.dumps(record, ensure_ascii=False, default=str)
+    logger.info(line)
+    if PROFILE_LOG:
+        with open(PROFILE_LOG, "a", encoding="utf-8") as fh:
+            fh.write(line + "\n")
+    return record
+
+
+def summarize(records: list[dict]) -> list[dict]:
+    """Por etapa: corridas, mediana, p95 y máximo en milisegundos (de mayor a menor p95)."""
+    by_stage: dict[str, list[float]] = {}
+    for r in records:
+        by_stage.setdefault(f"[{r.get('run', '?')}]", []).append(r["seconds"])
+        for s in r.get("stages", []):
+            by_stage.setdefault(s["name"], []).append(s["seconds"])
+    out = []
+    for name, values in by_stage.items():
+        values.sort()
+        pick = lambda q: values[max(0, math.ceil(q * len(values)) - 1)] * 1000  # noqa: E731  (nearest-rank)
+        out.append({"stage": name, "n": len(values), "p50_ms": round(pick(0.5), 1),
+                    "p95_ms": round(pick(0.95), 1), "max_ms": round(values[-1] * 1000, 1)})
+    return sorted(out, key=lambda row: row["p95_ms"], reverse=True)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Resume un log JSONL de casanova.perf por etapa.")
+    parser.add_argument("log", nargs="?", default=PROFILE_LOG, help="archivo JSONL (por defecto, CASANOVA_PROFILE_LOG)")
+    parser.add_argument("--last", type=int, help="sólo las últimas N corridas")
+    args = parser.parse_args(argv)
+    if not args.log:
+        parser.error("falta el archivo de log (o CASANOVA_PROFILE_LOG)")
+    with open(args.log, encoding="utf-8") as fh:
+        records = [json.loads(line) for line in fh if line.strip()]
+    if args.last:
+        records = records[-args.last:]
+    rows = summarize(records)
+    width = max((len(r["stage"]) for r in rows), default=5)
+    print(f"{'etapa':<{width}}  {'n':>5}  {'p50 ms':>9}  {'p95 ms':>9}  {'max ms':>9}")
+    for r in rows:
+        print(f"{r['stage']:<{width}}  {r['n']:>5}  {r['p50_ms']:>9.1f}  {r['p95_ms']:>9.1f}  {r['max_ms']:>9.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
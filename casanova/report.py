@@ -0,0 +1,279 @@
+"""Reporte pre-renderizado para corridas programadas (n8n / cron).
+
+Uso::
+
+    python -m casanova.report                       # rango completo, vista por defecto
+    python -m casanova.report --start 2024-09-01 --end 2024-09-30 --workers 4
+
+Genera en ``<out>/<inicio>_<fin>/`` un ``report.html`` autocontenido (figuras
+como JSON de Plotly), ``kpis.json`` y ``figures.json``, y apunta
+``<out>/latest.json`` a la última corrida. Las figuras se arman en paralelo en
+un pool de procesos. La app usa ``figures.json`` tal cual cuando la vista
+pedida coincide con la del reporte (misma versión de datos, rango y filtros).
+"""
+import argparse
+import datetime as dt
+import html
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import plotly.offline
+
+from casanova import perf
+from casanova.analytics import SNAPSHOT_MAX_AGE, Analytics, View, build_dataset, load_snapshots
+from casanova.charts import CHARTS, anomaly_rows, chart_spec, money_fmt, pct_fmt, render_json
+from casanova.columnar import BACKEND, BACKENDS
+from casanova.compare import COMPARISONS
+from casanova.downsample import RESOLUTIONS
+from casanova.snapshots import CACHE_DIR
+from casanova.sources import load_sources
+
+REPORT_DIR = Path(os.environ.get("CASANOVA_REPORT_DIR", CACHE_DIR / "reports"))
+REPORT_VERSION = "report-1"
+
+
+@dataclass
+class Report:
+    meta: dict                      # versiones de datos, vista y opciones con las que se generó
+    kpis: dict
+    alerts: list = field(default_factory=list)
+    figures: dict = field(default_factory=dict)   # nombre -> JSON de Plotly
+    anomalies: list = field(default_factory=list)  # filas de ``anomaly_rows``
+
+    @property
+    def view(self) -> View:
+        v = self.meta["view"]
+        filters = tuple((col, tuple(values)) for col, values in v["filters"])
+        return View(dt.date.fromisoformat(v["start"]), dt.date.fromisoformat(v["end"]), filters)
+
+    def matches(self, an: Analytics, view: View, use_resumen: bool, resolution: str = "auto",
+                compare: str = "none") -> bool:
+        """¿Sirve para ``view`` sobre los datos de ``an``? (todo igual o nada)."""
+        m = self.meta
+        return (
+            m.get("report_version") == REPORT_VERSION
+            and m.get("version") == an.data.version
+            and m.get("resumen_version") == an.data.resumen_version
+            and m.get("use_resumen") == use_resumen
+            and m.get("resolution", "auto") == resolution
+            and m.get("compare", "none") == compare
+            and self.view == view
+        )
+
+
+def render_figures(specs: dict, workers: int | None = None) -> dict:
+    """``{nombre: JSON}``; con ``workers`` > 1 cada figura se arma en otro proceso."""
+    if workers is not None and workers <= 1:
+        return {name: render_json(spec) for name, spec in specs.items()}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return dict(zip(specs, pool.map(render_json, specs.values())))
+
+
+def build_report(an: Analytics, view: View, use_resumen: bool = True, workers: int | None = None,
+                 resolution: str = "auto", compare: str = "none") -> Report:
+    specs = {name: spec for name in CHARTS
+             if (spec := chart_spec(name, an, view, use_resumen, resolution, compare)) is not None}
+    alerts = []
+    if an.has_resumen and "observaciones" in an.data.resumen_columns:
+        alerts = [
+            {"fecha": row.fecha_analizada.date().isoformat(), "observaciones": str(row.observaciones)}
+            for row in an.alerts(view).itertuples(index=False)
+        ]
+    meta = {
+        "report_version": REPORT_VERSION,
+        "generated_at": time.time(),
+        "version": an.data.version,
+        "resumen_version": an.data.resumen_version,
+        "resumen_local": an.data.resumen_local,
+        "use_resumen": use_resumen,
+        "resolution": resolution,
+        "compare": compare,
+        "view": {
+            "start": view.start.isoformat(),
+            "end": view.end.isoformat(),
+            "filters": [[col, list(values)] for col, values in view.filters],
+        },
+    }
+    return Report(meta, an.kpis(view).to_dict(), alerts, render_figures(specs, workers),
+                  anomaly_rows(an.anomalies(view)))
+
+
+def _script_json(text: str) -> str:
+    # Evita que un "</script>" dentro de los datos cierre el bloque.
+    return text.replace("</", "<\\/")
+
+
+def render_html(report: Report, inline_js: bool = False) -> str:
+    """HTML estático: KPIs, alertas, anomalías y figuras; abrirlo no recalcula nada."""
+    k = report.kpis
+    v = report.meta["view"]
+    if inline_js:
+        plotly_js = f"<script>{plotly.offline.get_plotlyjs()}</script>"
+    else:
+        plotly_js = f'<script src="https://cdn.plot.ly/plotly-{plotly.offline.get_plotlyjs_version()}.min.js"></script>'
+    cards = [
+        ("Ventas netas", money_fmt(k["total_ventas"])),
+        ("Pedidos", f"{k['pedidos']}"),
+        ("Ticket promedio", money_fmt(k["ticket"])),
+        ("% Cancelados", pct_fmt(k["pct_cancel"])),
+        ("Entrega prom.", f"{k['entrega_avg']:.1f} días" if k["entrega_avg"] else "—"),
+        ("Rating prom.", f"{k['rating_avg']:.2f}" if k["rating_avg"] else "—"),
+    ]
+    cards_html = "".join(
+        f"<div class='card'><span>{html.escape(label)}</span><strong>{html.escape(value)}</strong></div>"
+        for label, value in cards
+    )
+    if report.alerts:
+        rows = "".join(
+            f"<tr><td>{html.escape(a['fecha'])}</td><td>{html.escape(a['observaciones'])}</td></tr>"
+            for a in report.alerts
+        )
+        alerts_html = f"<table><tr><th>Fecha</th><th>Observaciones</th></tr>{rows}</table>"
+    else:
+        alerts_html = "<p>Sin alertas en el rango seleccionado.</p>"
+    if report.anomalies:
+        columns = list(report.anomalies[0])
+        header = "".join(f"<th>{html.escape(c.capitalize())}</th>" for c in columns)
+        rows = "".join(
+            "<tr>" + "".join(f"<td>{html.escape(str(a[c]))}</td>" for c in columns) + "</tr>"
+            for a in report.anomalies
+        )
+        anomalies_html = f"<table><tr>{header}</tr>{rows}</table>"
+    else:
+        anomalies_html = "<p>Sin anomalías en el rango seleccionado.</p>"
+    figures_html = "".join(f"<div class='fig' id='fig-{name}'></div>" for name in report.figures)
+    figures_js = ",".join(f'"{name}":{_script_json(fig)}' for name, fig in report.figures.items())
+    generated = dt.datetime.fromtimestamp(report.meta["generated_at"]).strftime("%d/%m/%Y %H:%M")
+
+    return f"""<!DOCTYPE html>
+<html lang="es">
+<head>
+<meta charset="utf-8">
+<title>CasaNova Bazar | Reporte {html.escape(v['start'])} – {html.escape(v['end'])}</title>
+{plotly_js}
+<style>
+body {{ font-family: Montserrat, system-ui, sans-serif; color: #1F1C1A; background: #F5F0E8; margin: 0 auto; max-width: 1400px; padding: 24px; }}
+h1, h2 {{ font-family: 'Playfair Display', Georgia, serif; }}
+.cards {{ display: grid; grid-template-columns: repeat(6, 1fr); gap: 12px; }}
+.card {{ background: #fff; border: 1px solid rgba(31,28,26,0.10); border-radius: 18px; padding: 14px; }}
+.card span {{ display: block; font-size: 0.8rem; letter-spacing: 0.9px; text-transform: uppercase; opacity: 0.78; }}
+.card strong {{ font-size: 1.6rem; font-weight: 500; }}
+.fig {{ background: #fff; border-radius: 14px; margin: 18px 0; }}
+table {{ border-collapse: collapse; background: #fff; }}
+td, th {{ border-bottom: 1px solid rgba(31,28,26,0.12); padding: 6px 12px; text-align: left; }}
+</style>
+</head>
+<body>
+<h1>CasaNova Bazar</h1>
+<p>Reporte del {html.escape(v['start'])} al {html.escape(v['end'])} · generado el {generated} ·
+líder: {html.escape(k['top_channel'])} / {html.escape(k['top_category'])} / {html.escape(k['top_product'])}</p>
+<div class="cards">{cards_html}</div>
+<h2>⚠️ Alertas</h2>
+{alerts_html}
+<h2>🔎 Anomalías</h2>
+{anomalies_html}
+<h2>Gráficos</h2>
+{figures_html}
+<script>
+const FIGURES = {{{figures_js}}};
+for (const [name, fig] of Object.entries(FIGURES)) {{
+  Plotly.newPlot("fig-" + name, fig.data, fig.layout, {{responsive: true}});
+}}
+</script>
+</body>
+</html>
+"""
+
+
+def write_report(report: Report, out_dir: str | Path = REPORT_DIR, inline_js: bool = False) -> Path:
+    """Escribe el reporte en ``out_dir/<inicio>_<fin>/`` y actualiza ``latest.json``."""
+    out_dir = Path(out_dir)
+    v = report.meta["view"]
+    folder = out_dir / f"{v['start']}_{v['end']}"
+    folder.mkdir(parents=True, exist_ok=True)
+    files = {
+        "report.html": render_html(report, inline_js),
+        "kpis.json": json.dumps({"meta": report.meta, "kpis": report.kpis, "alerts": report.alerts,
+                                 "anomalies": report.anomalies},
+                                ensure_ascii=False, indent=2),
+        "figures.json": json.dumps({"meta": report.meta, "figures": report.figures}, ensure_ascii=False),
+    }
+    for name, text in files.items():
+        tmp = folder / f"{name}.tmp"
+        tmp.write_text(text, encoding="utf-8")
+        os.replace(tmp, folder / name)
+    latest = out_dir / "latest.json.tmp"
+    latest.write_text(json.dumps({"path": folder.name}), encoding="utf-8")
+    os.replace(latest, out_dir / "latest.json")
+    return folder
+
+
+def read_latest(out_dir: str | Path = REPORT_DIR) -> Report | None:
+    """Último reporte escrito (sin HTML) o ``None`` si no hay ninguno legible."""
+    out_dir = Path(out_dir)
+    try:
+        folder = out_dir / json.loads((out_dir / "latest.json").read_text(encoding="utf-8"))["path"]
+        kpis = json.loads((folder / "kpis.json").read_text(encoding="utf-8"))
+        figures = json.loads((folder / "figures.json").read_text(encoding="utf-8"))
+    except (OSError, ValueError, KeyError):
+        return None
+    return Report(figures["meta"], kpis["kpis"], kpis["alerts"], figures["figures"], kpis.get("anomalies", []))
+
+
+def _date(text: str) -> dt.date:
+    for fmt in ("%Y-%m-%d", "%d/%m/%Y"):
+        try:
+            return dt.datetime.strptime(text, fmt).date()
+        except ValueError:
+            pass
+    raise argparse.ArgumentTypeError(f"fecha inválida: {text} (usar aaaa-mm-dd o dd/mm/aaaa)")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Genera el reporte estático del dashboard.")
+    parser.add_argument("--start", type=_date, help="inicio del rango (por defecto, primer pedido)")
+    parser.add_argument("--end", type=_date, help="fin del rango (por defecto, último pedido)")
+    parser.add_argument("--out", default=str(REPORT_DIR), help="directorio de reportes")
+    parser.add_argument("--workers", type=int, help="procesos para armar figuras (1 = sin pool)")
+    parser.add_argument("--resumen-local", action="store_true", help="calcular resumen_diario en Python")
+    parser.add_argument("--no-resumen", action="store_true", help="tendencia recalculada desde ventas_bazar")
+    parser.add_argument("--resolution", choices=list(RESOLUTIONS), default="auto",
+                        help="resolución de tendencias (auto: según el largo del rango)")
+    parser.add_argument("--compare", choices=list(COMPARISONS), default="none",
+                        help="superponer en las tendencias el período anterior o el del año anterior")
+    parser.add_argument("--backend", choices=list(BACKENDS), default=BACKEND,
+                        help="motor de consultas: cubo en memoria o Parquet + pyarrow (CASANOVA_BACKEND)")
+    parser.add_argument("--inline-js", action="store_true", help="embeber plotly.js (reporte offline)")
+    parser.add_argument("--refresh", action="store_true", help="consultar Google aunque el snapshot sea reciente")
+    parser.add_argument("--sources", help="registro de fuentes JSON (por defecto, CASANOVA_SOURCES / sources.json)")
+    parser.add_argument("--profile", action="store_true", help="medir etapas (JSON en stderr, ver casanova.perf)")
+    args = parser.parse_args(argv)
+
+    if args.profile:
+        logging.basicConfig(level=logging.INFO, format="%(message)s")
+    run = perf.begin("report", args.profile or None)
+    with perf.stage("load"):
+        snapshots = load_snapshots(load_sources(args.sources), max_age=0 if args.refresh else SNAPSHOT_MAX_AGE,
+                                   lazy=args.backend == "arrow")
+    with perf.stage("dataset"):
+        data = build_dataset(snapshots, resumen_local=args.resumen_local, backend=args.backend)
+    an = Analytics(data)
+    view = an.default_view(args.start, args.end)
+    with perf.stage("build_report"):
+        report = build_report(an, view, use_resumen=not args.no_resumen, workers=args.workers,
+                              resolution=args.resolution, compare=args.compare)
+    with perf.stage("write"):
+        folder = write_report(report, args.out, inline_js=args.inline_js)
+    perf.end(run)
+    print(folder)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,224 @@
+"""Port en Python del nodo Code de n8n que escribe resumen_diario.
+
+Reproduce las métricas por día (pedidos, ventas netas, ticket, canal y
+categoría top con su desglose JSON, cancelaciones, entrega y rating promedio)
+y las reglas de ``observaciones``. Con la ingesta incremental sólo se
+recalculan los días que recibieron pedidos nuevos; el resultado se guarda en
+el mismo directorio de snapshots.
+"""
+import json
+import time
+from typing import Callable
+
+import pandas as pd
+
+from casanova.cube import is_cancelado
+from casanova.schema import RESUMEN_SCHEMA, coerce_frame
+from casanova.snapshots import SheetSnapshot, SnapshotMeta, SnapshotStore
+from casanova.transform import date_slice
+
+ENGINE_VERSION = "resumen-local-1"
+
+# Reglas de alertas del workflow de n8n.
+UMBRAL_CANCELACION = 0.2   # pct_cancelados_dia
+UMBRAL_ENTREGA = 5.0       # entrega_promedio_dias (días)
+UMBRAL_RATING = 3.5        # rating_promedio (sólo si hubo reseñas)
+
+
+def observaciones(pct_cancel: float, entrega: float, rating: float) -> str:
+    notas = []
+    if pct_cancel >= UMBRAL_CANCELACION:
+        notas.append("Alerta: tasa de cancelación alta.")
+    if entrega >= UMBRAL_ENTREGA:
+        notas.append("Alerta: entrega promedio lenta.")
+    if 0 < rating < UMBRAL_RATING:
+        notas.append("Atención: rating promedio bajo.")
+    return " ".join(notas) if notas else "OK"
+
+
+def _json_number(x: float):
+    return int(x) if float(x).is_integer() else round(float(x), 2)
+
+
+def _desglose(day_totals: pd.Series) -> tuple[str, float, str]:
+    """(top, ventas del top, JSON) respetando el orden de aparición, como el JS."""
+    if day_totals.empty:
+        return "", 0.0, "{}"
+    top = day_totals.idxmax()   # ante empates gana el primero que aparece
+    data = {str(k): _json_number(v) for k, v in day_totals.items()}
+    return str(top), float(day_totals[top]), json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+
+def compute_days(rows: pd.DataFrame) -> pd.DataFrame:
+    """Una fila de resumen_diario por fecha presente en ``rows`` (ventas tipado)."""
+    columns = list(RESUMEN_SCHEMA)
+    if rows.empty:
+        return pd.DataFrame(columns=columns)
+
+    day = rows["fecha_pedido"].dt.normalize().rename("fecha_analizada")
+    ids = rows["id_pedido"] if "id_pedido" in rows.columns else pd.Series(range(len(rows)), index=rows.index)
+    aux = pd.DataFrame({
+        "fecha_analizada": day,
+        "id_pedido": ids,
+        "ventas_netas": rows["ventas_netas"].astype("float64"),
+        "cancelado": is_cancelado(rows["estado_pedido"]).astype("int64") if "estado_pedido" in rows.columns else 0,
+        "entrega": rows["dias_entrega"].astype("float64").where(rows["dias_entrega"] > 0) if "dias_entrega" in rows.columns else float("nan"),
+        "rating": rows["resena"].astype("float64").where(rows["resena"] > 0) if "resena" in rows.columns else float("nan"),
+    })
+    out = aux.groupby("fecha_analizada").agg(
+        pedidos_dia=("id_pedido", "nunique"),
+        ventas_netas_dia=("ventas_netas", "sum"),
+        cancelados_dia=("cancelado", "sum"),
+        entrega_promedio_dias=("entrega", "mean"),
+        rating_promedio=("rating", "mean"),
+    )
+    out[["entrega_promedio_dias", "rating_promedio"]] = out[["entrega_promedio_dias", "rating_promedio"]].fillna(0.0).round(2)
+    out["ticket_promedio_dia"] = (out["ventas_netas_dia"] / out["pedidos_dia"]).where(out["pedidos_dia"] > 0, 0.0).round(2)
+    out["pct_cancelados_dia"] = (out["cancelados_dia"] / out["pedidos_dia"]).where(out["pedidos_dia"] > 0, 0.0).round(4)
+
+    for dim, prefix in (("canal", "canal"), ("categoria", "categoria")):
+        if dim not in rows.columns:
+            continue
+        # sort=False conserva el orden de aparición de cada valor dentro del día.
+        totals = aux["ventas_netas"].groupby([day, rows[dim].astype("str")], sort=False).sum()
+        desglose = {d: _desglose(s.droplevel(0)) for d, s in totals.groupby(level=0, sort=False)}
+        out[f"{prefix}_top"] = [desglose[d][0] for d in out.index]
+        out[f"ventas_{prefix}_top"] = [desglose[d][1] for d in out.index]
+        out[f"desglose_{prefix}_json"] = [desglose[d][2] for d in out.index]
+
+    out["observaciones"] = [
+        observaciones(p, e, r)
+        for p, e, r in zip(out["pct_cancelados_dia"], out["entrega_promedio_dias"], out["rating_promedio"])
+    ]
+    out = out.reset_index()
+    return coerce_frame(out[[c for c in columns if c in out.columns]], RESUMEN_SCHEMA)
+
+
+def compute_resumen(ventas: pd.DataFrame) -> pd.DataFrame:
+    return compute_days(ventas)
+
+
+def _merge_desglose(values) -> pd.Series:
+    merged: dict = {}
+    for text in values:
+        try:
+            items = json.loads(text).items() if isinstance(text, str) and text else ()
+        except ValueError:
+            items = ()
+        for k, v in items:
+            merged[k] = merged.get(k, 0) + float(v)
+    return pd.Series(merged, dtype="float64")
+
+
+def combine_resumen(frames: list[pd.DataFrame]) -> pd.DataFrame:
+    """resumen_diario de varias tiendas en una fila por día.
+
+    Pedidos, ventas y cancelados se suman; ticket y % de cancelación se
+    recalculan; entrega y rating se promedian ponderando por los pedidos de
+    cada tienda (cada hoja sólo publica promedios). Canal/categoría top salen
+    de sumar los desgloses JSON y las observaciones se vuelven a evaluar.
+    """
+    columns = list(RESUMEN_SCHEMA)
+    frames = [f for f in frames if len(f)]
+    if not frames:
+        return pd.DataFrame(columns=columns)
+    base = pd.concat(frames, ignore_index=True)
+    day = base["fecha_analizada"]
+    weight = base["pedidos_dia"].astype("float64") if "pedidos_dia" in base.columns else pd.Series(1.0, index=base.index)
+
+    aux = pd.DataFrame({"fecha_analizada": day})
+    for col in ("pedidos_dia", "ventas_netas_dia", "cancelados_dia"):
+        if col in base.columns:
+            aux[col] = base[col].astype("float64")
+    for col in ("entrega_promedio_dias", "rating_promedio"):
+        if col in base.columns:
+            values = base[col].astype("float64")
+            has = values > 0   # 0 = la tienda no tuvo datos ese día
+            aux[f"{col}__sum"] = (values * weight).where(has, 0.0)
+            aux[f"{col}__n"] = weight.where(has, 0.0)
+    g = aux.groupby("fecha_analizada").sum()
+
+    out = pd.DataFrame(index=g.index)
+    for col in ("pedidos_dia", "ventas_netas_dia", "cancelados_dia"):
+        if col in g.columns:
+            out[col] = g[col]
+    pedidos = out["pedidos_dia"] if "pedidos_dia" in out.columns else None
+    if pedidos is not None and "ventas_netas_dia" in out.columns:
+        out["ticket_promedio_dia"] = (out["ventas_netas_dia"] / pedidos).where(pedidos > 0, 0.0).round(2)
+    if pedidos is not None and "cancelados_dia" in out.columns:
+        out["pct_cancelados_dia"] = (out["cancelados_dia"] / pedidos).where(pedidos > 0, 0.0).round(4)
+    for col in ("entrega_promedio_dias", "rating_promedio"):
+        if f"{col}__n" in g.columns:
+            n = g[f"{col}__n"]
+            out[col] = (g[f"{col}__sum"] / n).where(n > 0, 0.0).round(2)
+
+    for prefix in ("canal", "categoria"):
+        col = f"desglose_{prefix}_json"
+        if col not in base.columns:
+            continue
+        desglose = {d: _desglose(_merge_desglose(s)) for d, s in base[col].groupby(day, sort=False)}
+        out[f"{prefix}_top"] = [desglose[d][0] for d in out.index]
+        out[f"ventas_{prefix}_top"] = [desglose[d][1] for d in out.index]
+        out[col] = [desglose[d][2] for d in out.index]
+
+    if "observaciones" in base.columns:
+        zero = pd.Series(0.0, index=out.index)
+        out["observaciones"] = [
+            observaciones(p, e, r)
+            for p, e, r in zip(out.get("pct_cancelados_dia", zero), out.get("entrega_promedio_dias", zero),
+                               out.get("rating_promedio", zero))
+        ]
+    out = out.reset_index()
+    return coerce_frame(out[[c for c in columns if c in out.columns]], RESUMEN_SCHEMA)
+
+
+def update_resumen(resumen: pd.DataFrame, ventas: pd.DataFrame, days: list) -> pd.DataFrame:
+    """Recalcula sólo ``days`` a partir de ``ventas`` (indexado por fecha) y los reemplaza."""
+    days = sorted(pd.Timestamp(d) for d in days)
+    if not days:
+        return resumen
+    parts = [date_slice(ventas, d, d) for d in days]
+    fresh = compute_days(pd.concat(parts) if parts else ventas.iloc[:0])
+    keep = resumen[~resumen["fecha_analizada"].isin(days)]
+    out = pd.concat([keep, fresh], ignore_index=True).sort_values("fecha_analizada", kind="stable", ignore_index=True)
+    return coerce_frame(out, RESUMEN_SCHEMA)
+
+
+def local_resumen(ventas_snap: SheetSnapshot, ventas: pd.DataFrame | Callable[[], pd.DataFrame],
+                  store: SnapshotStore | None = None) -> pd.DataFrame:
+    """resumen_diario calculado en Python para la versión de ``ventas_snap``.
+
+    Si el snapshot de ventas vino de una ingesta incremental sobre la versión
+    que ya tiene resumen calculado, sólo se actualizan los días afectados.
+    """
+    store = store or SnapshotStore()
+    key = f"{ventas_snap.meta.key}_resumen_local"
+    meta = store.read_meta(key)
+    if meta is not None and meta.parser_version != ENGINE_VERSION:
+        meta = None
+    if meta is not None and meta.sha256 == ventas_snap.meta.sha256:
+        return store.read_frame(key)
+
+    ventas = ventas() if callable(ventas) else ventas
+    extra = ventas_snap.meta.extra
+    if (
+        meta is not None
+        and extra.get("mode") == "incremental"
+        and extra.get("base_sha256") == meta.sha256
+        and extra.get("days") is not None
+    ):
+        frame = update_resumen(store.read_frame(key), ventas, extra["days"])
+        mode = "incremental"
+    else:
+        frame = compute_resumen(ventas)
+        mode = "full"
+
+    store.write(frame, SnapshotMeta(
+        key=key,
+        sha256=ventas_snap.meta.sha256,
+        rows=len(frame),
+        fetched_at=time.time(),
+        parser_version=ENGINE_VERSION,
+        extra={"mode": mode},
+    ))
+    return frame
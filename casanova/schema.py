@@ -0,0 +1,155 @@
+"""Esquema declarado de ventas_bazar y resumen_diario.
+
+Los tipos se aplican en una sola pasada: las dimensiones y textos se pasan
+directo a ``pd.read_csv`` (``category`` / ``str``); las columnas numéricas
+que el lector no pudo parsear por la coma decimal se convierten todas juntas
+con un único ``str.replace`` + ``pd.to_numeric``; las fechas usan un formato
+explícito y se parsean una sola vez por valor distinto (hay muchos pedidos por
+día); sólo los valores que no calzan pasan por la inferencia ``dayfirst``.
+
+Las dimensiones quedan codificadas como diccionario una sola vez al cargar
+(códigos enteros + valores recortados y ordenados): filtros y agrupaciones
+trabajan sobre los códigos, no sobre strings.
+"""
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+DECIMAL = ","               # separador decimal de la planilla (es-AR)
+DATE_FORMAT = "%d/%m/%Y"    # formato de fecha de la exportación CSV
+
+VENTAS_SCHEMA = {
+    "id_pedido": "str",
+    "fecha_pedido": "date",
+    "canal": "category",
+    "sku": "str",
+    "producto": "category",
+    "categoria": "category",
+    "subcategoria": "str",
+    "unidades": "int32",
+    "precio_unitario": "float32",
+    "descuento_pct": "float32",
+    "importe_total": "float32",
+    "costo_envio": "float32",
+    "metodo_pago": "category",
+    "provincia_envio": "category",
+    "ciudad_envio": "str",
+    "tipo_cliente": "category",
+    "estado_pedido": "category",
+    "dias_entrega": "float32",
+    "resena": "float32",
+    "notas_cliente": "str",
+}
+
+RESUMEN_SCHEMA = {
+    "fecha_analizada": "date",
+    "pedidos_dia": "int32",
+    "ventas_netas_dia": "float32",
+    "ticket_promedio_dia": "float32",
+    "canal_top": "str",
+    "ventas_canal_top": "float32",
+    "categoria_top": "str",
+    "ventas_categoria_top": "float32",
+    "cancelados_dia": "int32",
+    "pct_cancelados_dia": "float32",
+    "entrega_promedio_dias": "float32",
+    "rating_promedio": "float32",
+    "desglose_canal_json": "str",
+    "desglose_categoria_json": "str",
+    "observaciones": "str",
+}
+
+NUMERIC_KINDS = ("float32", "int32")
+
+
+def reader_dtype(kind: str) -> str | None:
+    if kind == "date":
+        return "category"
+    return kind if kind in ("category", "str") else None
+
+
+def _cast_numeric(values: pd.Series, kind: str) -> pd.Series:
+    if kind == "int32":
+        return values.round().astype("Int32")
+    return values.astype("float32")
+
+
+def parse_dates(s: pd.Series) -> pd.Series:
+    if pd.api.types.is_datetime64_any_dtype(s):
+        return s
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        codes, uniques = s.cat.codes.to_numpy(), pd.Series(s.cat.categories)
+    else:
+        codes, uniques = pd.factorize(s)
+        uniques = pd.Series(uniques)
+    parsed = pd.to_datetime(uniques, format=DATE_FORMAT, errors="coerce")
+    # Valores con otro formato (p. ej. ISO desde gviz o xlsx): inferencia sólo sobre ellos,
+    # ISO primero (con dayfirst, pandas lee "2024-01-05" como 1 de mayo).
+    for options in ({"format": "ISO8601"}, {"dayfirst": True}):
+        pending = parsed.isna() & uniques.notna()
+        if not pending.any():
+            break
+        parsed.loc[pending] = pd.to_datetime(uniques[pending].astype("str"), errors="coerce", **options)
+    values = parsed.to_numpy()
+    # NaT con la unidad de las fechas parseadas (sin unidad, np.where falla si no hay ninguna fecha).
+    nat = np.datetime64("NaT", np.datetime_data(values.dtype)[0] if values.dtype.kind == "M" else "us")
+    out = np.where(codes >= 0, values[np.maximum(codes, 0)] if len(values) else nat, nat)
+    return pd.Series(out, index=s.index, name=s.name)
+
+
+def encode(s: pd.Series) -> pd.Series:
+    """Dimensión como ``category`` con valores sin espacios sobrantes, vacíos como nulo y orden alfabético."""
+    if not isinstance(s.dtype, pd.CategoricalDtype):
+        s = s.astype("category")
+    categories = s.cat.categories
+    clean = categories.astype("str").str.strip()
+    if clean.equals(categories) and categories.is_monotonic_increasing and not (clean == "").any():
+        return s
+    values = clean.where(clean != "")
+    encoded = pd.Index(values.dropna().unique()).sort_values()
+    # Código viejo -> nuevo; el -1 extra al final mantiene los nulos (código -1) como nulos.
+    remap = np.append(encoded.get_indexer(values), -1)
+    return pd.Series(pd.Categorical.from_codes(remap[s.cat.codes.to_numpy()], encoded), index=s.index, name=s.name)
+
+
+def coerce_frame(df: pd.DataFrame, schema: dict) -> pd.DataFrame:
+    """Aplica ``schema`` sobre un frame con columnas ya normalizadas (in place)."""
+    dirty = []
+    for col, kind in schema.items():
+        if col not in df.columns:
+            continue
+        s = df[col]
+        if kind in NUMERIC_KINDS:
+            if pd.api.types.is_numeric_dtype(s):
+                df[col] = _cast_numeric(s, kind)
+            else:
+                dirty.append(col)
+        elif kind == "date":
+            df[col] = parse_dates(s)
+        elif kind == "category":
+            df[col] = encode(s)
+
+    # Todas las columnas numéricas con coma decimal en un único pase vectorizado.
+    if dirty:
+        n = len(df)
+        stacked = pd.concat([df[c].astype("str") for c in dirty], ignore_index=True)
+        parsed = pd.to_numeric(stacked.str.replace(DECIMAL, ".", regex=False).str.strip(), errors="coerce")
+        block = parsed.to_numpy(dtype="float64", na_value=np.nan).reshape(len(dirty), n)
+        for i, col in enumerate(dirty):
+            df[col] = _cast_numeric(pd.Series(block[i], index=df.index), schema[col])
+    return df
+
+
+def concat_typed(frames: list[pd.DataFrame]) -> pd.DataFrame:
+    """``pd.concat`` que conserva las columnas ``category`` (une los diccionarios y los deja ordenados)."""
+    frames = [f for f in frames if len(f)] or frames[:1]
+    if len(frames) == 1:
+        return frames[0]
+    cats = {
+        c for c in frames[0].columns
+        if all(c in f.columns and isinstance(f[c].dtype, pd.CategoricalDtype) for f in frames)
+    }
+    out = pd.concat(frames, ignore_index=True)
+    for c in cats:
+        out[c] = encode(pd.Series(union_categoricals([f[c] for f in frames], ignore_order=True), name=c))
+    return out
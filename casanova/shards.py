@@ -0,0 +1,179 @@
+"""Cubo particionado por tienda y mes.
+
+Las filas de cada fuente se cortan por mes (búsqueda binaria sobre el índice
+de fechas) y cada partición tiene su propio ``Cube``. La partición se cachea
+por una huella de sus filas, así que al refrescar sólo se rearman los meses que
+cambiaron. Una consulta toca sólo las particiones que se solapan con el rango y
+las tiendas elegidas; los resultados se combinan sumando celdas y series ya
+agregadas, nunca filas crudas.
+
+Pedidos distintos: un pedido tiene una sola fecha y una sola tienda, así que
+cae en una única partición y los conteos de cada una se suman.
+"""
+import hashlib
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from casanova.cube import DIMS, Cube, CubeSlice, build_cube, select
+from casanova.kpis import KpiResult, compute_kpis
+from casanova.schema import concat_typed
+
+TIENDA = "tienda"   # dimensión extra del filtro cuando hay más de una fuente
+FINGERPRINT_COLS = ["fecha_pedido", "id_pedido", *DIMS, "producto", "ventas_netas", "dias_entrega", "resena"]
+
+
+def month_parts(ventas: pd.DataFrame) -> list[tuple[pd.Timestamp, pd.DataFrame]]:
+    """``(primer día del mes, filas del mes)`` de ``ventas`` indexado por fecha (vistas, sin copia)."""
+    if ventas.empty:
+        return []
+    index = ventas.index
+    months = pd.date_range(index[0].normalize().replace(day=1), index[-1], freq="MS")
+    bounds = [*index.searchsorted(months, side="left"), len(ventas)]
+    return [(m, ventas.iloc[i:j]) for m, i, j in zip(months, bounds[:-1], bounds[1:]) if j > i]
+
+
+def fingerprint(rows: pd.DataFrame) -> str:
+    """Huella de las columnas que usa el cubo: cambia si cambia cualquier fila del mes."""
+    cols = [c for c in FINGERPRINT_COLS if c in rows.columns]
+    h = hashlib.blake2b(",".join(cols).encode(), digest_size=16)
+    h.update(pd.util.hash_pandas_object(rows[cols], index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+@dataclass
+class Shard:
+    source: str            # label de la fuente (valor del filtro "tienda")
+    start: pd.Timestamp    # primer día del mes
+    end: pd.Timestamp      # último día del mes
+    cube: Cube
+
+    def overlaps(self, start, end) -> bool:
+        return self.start <= pd.Timestamp(end) and self.end >= pd.Timestamp(start)
+
+
+def _empty(cube: Cube) -> Cube:
+    return Cube(cube.cells.iloc[:0], cube.products.iloc[:0], cube.entrega.iloc[:0], cube.resena.iloc[:0],
+                cube.dims, orders_additive=True)
+
+
+def split_cube(cube: Cube, months: list[pd.Timestamp]) -> dict[pd.Timestamp, Cube]:
+    """Un cubo por mes a partir de uno armado sobre varios meses (sus tablas ya están ordenadas por fecha)."""
+    tables = {name: dict(month_parts(getattr(cube, name))) for name in ("cells", "products", "entrega", "resena")}
+    empty = _empty(cube)
+    out = {}
+    for month in months:
+        part = {name: by_month.get(month, getattr(empty, name)) for name, by_month in tables.items()}
+        sketches = None
+        if cube.sketches is not None:
+            # Los sketches se indexan por número de celda: se renumeran dentro del mes.
+            sketches = cube.sketches[part["cells"]["cell"].to_numpy()]
+            part["cells"] = part["cells"].assign(cell=np.arange(len(part["cells"])))
+        out[month] = Cube(part["cells"], part["products"], part["entrega"], part["resena"],
+                          cube.dims, cube.orders_additive, sketches)
+    return out
+
+
+def build_shards(source: str, ventas: pd.DataFrame, cached: dict | None = None) -> list[Shard]:
+    """Una partición por mes de ``ventas``.
+
+    Los meses presentes en ``cached`` (``{mes: Cube}``) reutilizan su cubo; el
+    resto se agrega en una sola pasada y se corta por mes.
+    """
+    cached = cached or {}
+    parts = month_parts(ventas)
+    missing = [(m, rows) for m, rows in parts if m not in cached]
+    cubes = dict(cached)
+    if missing:
+        rows = ventas if len(missing) == len(parts) else pd.concat([r for _, r in missing])
+        cubes.update(split_cube(build_cube(rows), [m for m, _ in missing]))
+    return [Shard(source, m, m + pd.offsets.MonthEnd(0), cubes[m]) for m, _ in parts]
+
+
+def _combine(parts: list[pd.Series]) -> pd.Series:
+    parts = [p for p in parts if len(p)] or parts[:1]
+    if len(parts) == 1:
+        return parts[0]
+    return pd.concat(parts).groupby(level=0).sum()
+
+
+@dataclass
+class ShardedSlice:
+    slices: list[CubeSlice]   # una por partición elegida (al menos una, aunque sea vacía)
+
+    @property
+    def exact(self) -> bool:
+        return all(s.exact for s in self.slices)
+
+    def pedidos(self) -> int:
+        return sum(s.pedidos() for s in self.slices)
+
+    def kpis(self, pedidos: int | None = None) -> KpiResult:
+        if len(self.slices) == 1:
+            return self.slices[0].kpis(pedidos)
+        cells = concat_typed([s.cells for s in self.slices])
+        return compute_kpis(cells, self.products(), pedidos=self.pedidos() if pedidos is None else pedidos)
+
+    def by(self, col: str, measure: str = "ventas_netas") -> pd.Series:
+        return _combine([s.by(col, measure) for s in self.slices]).sort_values(ascending=False)
+
+    def daily(self) -> pd.Series:
+        return _combine([s.daily() for s in self.slices]).sort_index()
+
+    def daily_totals(self) -> pd.DataFrame:
+        parts = [d for s in self.slices if len(d := s.daily_totals())]
+        if len(parts) <= 1:
+            return parts[0] if parts else self.slices[0].daily_totals()
+        return pd.concat(parts).groupby(level=0).sum().sort_index()
+
+    def by_weekday(self) -> pd.Series:
+        return _combine([s.by_weekday() for s in self.slices])
+
+    def products(self) -> pd.DataFrame:
+        return concat_typed([s.products() for s in self.slices])
+
+    def distribution(self, col: str) -> pd.DataFrame:
+        parts = [d for s in self.slices if len(d := s.distribution(col))]
+        if len(parts) <= 1:
+            return parts[0] if parts else self.slices[0].distribution(col)
+        return pd.concat(parts, ignore_index=True).groupby(col, as_index=False)["conteo"].sum()
+
+
+@dataclass
+class ShardedCube:
+    shards: list[Shard]
+    sources: list[str]                            # labels, en el orden del registro
+    dims: list[str] = field(init=False)
+
+    def __post_init__(self):
+        present = [d for d in DIMS if any(d in s.cube.dims for s in self.shards)]
+        self.dims = ([TIENDA] if len(self.sources) > 1 else []) + present
+
+    @property
+    def n_cells(self) -> int:
+        return sum(len(s.cube.cells) for s in self.shards)
+
+    def _pick(self, start, end, filters: dict) -> tuple[list[Shard], dict]:
+        tiendas = filters.get(TIENDA)
+        rest = {col: values for col, values in filters.items() if col != TIENDA}
+        shards = [s for s in self.shards if s.overlaps(start, end) and (tiendas is None or s.source in tiendas)]
+        return shards, rest
+
+    def options(self, col: str, start, end, filters: dict) -> list:
+        """Valores de ``col`` con los filtros aplicados, mirando sólo las particiones del rango."""
+        shards, rest = self._pick(start, end, filters)
+        if col == TIENDA:
+            present = {s.source for s in shards if len(select(s.cube.cells, start, end, rest))}
+            return [src for src in self.sources if src in present]
+        values = set()
+        for s in shards:
+            if col in s.cube.dims:
+                values.update(s.cube.options(col, start, end, rest))
+        return sorted(values)
+
+    def select(self, start, end, filters: dict) -> ShardedSlice:
+        shards, rest = self._pick(start, end, filters)
+        if not shards:
+            return ShardedSlice([_empty(self.shards[0].cube).select(start, end, rest)])
+        return ShardedSlice([s.cube.select(start, end, rest) for s in shards])
@@ -0,0 +1,210 @@
+"""Snapshots locales (Parquet) de las pestañas de Google Sheets.
+
+Cada pestaña se guarda en disco como ``<sheet_id>_<gid>.parquet`` más un
+``.json`` con el hash del CSV descargado y los validadores HTTP (ETag /
+Last-Modified). Al refrescar se hace un GET condicional: si el servidor
+responde 304 o el contenido tiene el mismo hash, se reutiliza el snapshot
+sin volver a parsear el CSV. Si la exportación falla, se sirve el último
+snapshot disponible. La descarga (sesión compartida, reintentos y cobertura
+entre URLs) está en ``casanova.fetch``; ``load_sheets`` trae varias pestañas
+en paralelo.
+"""
+import contextvars
+import hashlib
+import io
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Callable
+
+import pandas as pd
+
+from casanova.fetch import FETCH_TIMEOUT, HEDGE_DELAY, fetch_first
+from casanova.perf import stage
+
+# Base de las URLs de exportación. Puede apuntar a un servidor HTTP local o a
+# un directorio con ``<sheet_id>/<gid>.csv`` para trabajar sin docs.google.com.
+SHEETS_BASE_URL = os.environ.get("CASANOVA_SHEETS_BASE_URL", "https://docs.google.com/spreadsheets/d")
+CACHE_DIR = Path(os.environ.get("CASANOVA_CACHE_DIR", Path(__file__).resolve().parent.parent / ".cache"))
+
+
+@dataclass
+class SnapshotMeta:
+    key: str
+    sha256: str
+    rows: int
+    fetched_at: float
+    source_url: str = ""
+    etag: str | None = None
+    last_modified: str | None = None
+    parser_version: str = ""
+    # Estado propio del parser (p. ej. la marca de agua de la ingesta incremental).
+    extra: dict = field(default_factory=dict)
+
+
+# parser(contenido, meta anterior, cargar frame anterior) -> (frame, extra)
+Parser = Callable[[bytes, "SnapshotMeta | None", Callable[[], pd.DataFrame]], tuple[pd.DataFrame, dict]]
+
+
+@dataclass
+class SheetSnapshot:
+    data: pd.DataFrame | None   # None con ``lazy``: ``frame`` lo lee de ``store`` cuando hace falta
+    meta: SnapshotMeta
+    # "fresh": CSV nuevo | "unchanged": mismo contenido | "cached": no se consultó la red
+    # "stale": la descarga falló y se sirve el snapshot anterior
+    status: str
+    error: str | None = None
+    store: "SnapshotStore | None" = None
+
+    @property
+    def frame(self) -> pd.DataFrame:
+        """Frame del snapshot; si no se cargó, se lee del disco sin quedar retenido acá."""
+        return self.data if self.data is not None else self.store.read_frame(self.meta.key)
+
+
+def snapshot_key(sheet_id: str, gid: str, name: str | None = None) -> str:
+    return f"{sheet_id}_{gid}_{name}" if name else f"{sheet_id}_{gid}"
+
+
+def parse_csv(content: bytes, meta: SnapshotMeta | None, previous: Callable[[], pd.DataFrame]) -> tuple[pd.DataFrame, dict]:
+    return pd.read_csv(io.BytesIO(content)), {}
+
+
+def sheet_urls(sheet_id: str, gid: str, base_url: str | None = None) -> list[str]:
+    base = (base_url or SHEETS_BASE_URL).rstrip("/")
+    if not base.startswith(("http://", "https://")):
+        return [str(Path(base) / sheet_id / f"{gid}.csv")]
+    return [
+        f"{base}/{sheet_id}/export?format=csv&gid={gid}",
+        f"{base}/{sheet_id}/gviz/tq?tqx=out:csv&gid={gid}",
+    ]
+
+
+class SnapshotStore:
+    """Directorio de snapshots Parquet + metadatos JSON."""
+
+    def __init__(self, root: str | Path | None = None):
+        self.root = Path(root) if root is not None else CACHE_DIR
+
+    def _paths(self, key: str) -> tuple[Path, Path]:
+        return self.root / f"{key}.parquet", self.root / f"{key}.json"
+
+    def read_meta(self, key: str) -> SnapshotMeta | None:
+        data_path, meta_path = self._paths(key)
+        if not (data_path.exists() and meta_path.exists()):
+            return None
+        try:
+            return SnapshotMeta(**json.loads(meta_path.read_text(encoding="utf-8")))
+        except (ValueError, TypeError):
+            return None
+
+    def read_frame(self, key: str) -> pd.DataFrame:
+        return pd.read_parquet(self._paths(key)[0])
+
+    def write_meta(self, meta: SnapshotMeta) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        _, meta_path = self._paths(meta.key)
+        tmp = meta_path.with_suffix(".json.tmp")
+        tmp.write_text(json.dumps(asdict(meta)), encoding="utf-8")
+        os.replace(tmp, meta_path)
+
+    def write(self, df: pd.DataFrame, meta: SnapshotMeta) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        data_path, _ = self._paths(meta.key)
+        tmp = data_path.with_suffix(".parquet.tmp")
+        df.to_parquet(tmp, index=False)
+        os.replace(tmp, data_path)
+        # El JSON se escribe al final: sin meta, el parquet no se considera válido.
+        self.write_meta(meta)
+
+
+def load_sheet(sheet_id: str, gid: str, *, store: SnapshotStore | None = None,
+               base_url: str | None = None, max_age: float = 0,
+               timeout: float = FETCH_TIMEOUT, hedge_delay: float = HEDGE_DELAY,
+               name: str | None = None, parser: Parser = parse_csv,
+               parser_version: str = "", lazy: bool = False) -> SheetSnapshot:
+    """Devuelve la pestaña ``gid`` usando el snapshot local cuando es posible.
+
+    ``max_age`` (segundos) permite servir el snapshot sin tocar la red si es
+    suficientemente reciente; con ``max_age=0`` siempre se hace el GET
+    condicional. ``parser`` convierte el CSV descargado en el frame que se
+    guarda; un snapshot escrito con otro ``parser_version`` se descarta. Con
+    ``lazy`` el snapshot no trae el frame (se lee del disco al usar ``frame``).
+    """
+    store = store or SnapshotStore()
+    key = snapshot_key(sheet_id, gid, name)
+    meta = store.read_meta(key)
+    if meta is not None and meta.parser_version != parser_version:
+        meta = None
+
+    def stored(status: str, error: str | None = None) -> SheetSnapshot:
+        if lazy:
+            return SheetSnapshot(None, meta, status, error, store)
+        with stage(f"read:{key}"):
+            return SheetSnapshot(store.read_frame(key), meta, status, error, store)
+
+    if meta is not None and max_age and time.time() - meta.fetched_at < max_age:
+        return stored("cached")
+
+    # Primero la URL que respondió la última vez (con GET condicional), después la otra.
+    urls = sheet_urls(sheet_id, gid, base_url)
+    if meta is not None and meta.source_url in urls:
+        urls.sort(key=lambda u: u != meta.source_url)
+    attempts = [
+        (u, meta.etag, meta.last_modified) if meta is not None and meta.source_url == u else (u, None, None)
+        for u in urls
+    ]
+    try:
+        with stage(f"fetch:{key}"):
+            url, content, headers = fetch_first(attempts, timeout=timeout, hedge_delay=hedge_delay)
+    except Exception as e:
+        if meta is None:
+            raise
+        return stored("stale", str(e))
+
+    if content is None:
+        meta.fetched_at = time.time()
+        store.write_meta(meta)
+        return stored("unchanged")
+
+    sha = hashlib.sha256(content).hexdigest()
+    if meta is not None and meta.sha256 == sha:
+        meta.fetched_at = time.time()
+        meta.source_url = url
+        meta.etag = headers.get("etag")
+        meta.last_modified = headers.get("last_modified")
+        store.write_meta(meta)
+        return stored("unchanged")
+
+    with stage(f"parse:{key}"):
+        df, extra = parser(content, meta, lambda: store.read_frame(key))
+    new_meta = SnapshotMeta(
+        key=key,
+        sha256=sha,
+        rows=len(df),
+        fetched_at=time.time(),
+        source_url=url,
+        etag=headers.get("etag"),
+        last_modified=headers.get("last_modified"),
+        parser_version=parser_version,
+        extra=extra,
+    )
+    with stage(f"write:{key}"):
+        store.write(df, new_meta)
+    return SheetSnapshot(None if lazy else df, new_meta, "fresh", store=store)
+
+
+def load_sheets(jobs: dict[str, dict], max_workers: int | None = None) -> dict[str, SheetSnapshot]:
+    """Varias pestañas en paralelo: ``{nombre: kwargs de load_sheet}`` → ``{nombre: snapshot}``.
+
+    Si alguna falla sin snapshot previo, se relanza su error.
+    """
+    if not jobs:
+        return {}
+    with ThreadPoolExecutor(max_workers=max_workers or len(jobs), thread_name_prefix="sheet") as pool:
+        # Cada hilo hereda el contexto (p. ej. la corrida de casanova.perf que mide las etapas).
+        futures = {name: pool.submit(contextvars.copy_context().run, load_sheet, **kwargs) for name, kwargs in jobs.items()}
+        return {name: future.result() for name, future in futures.items()}
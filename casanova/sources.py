@@ -0,0 +1,77 @@
+"""Registro de fuentes: una entrada por tienda o planilla de archivo anual.
+
+Cada fuente es una planilla con su pestaña ventas_bazar y, opcionalmente,
+resumen_diario. Por defecto hay una sola (la planilla de CasaNova Bazar); para
+sumar tiendas o archivos se declara un JSON (``CASANOVA_SOURCES`` o
+``sources.json`` en la raíz del repo)::
+
+    [
+      {"key": "bazar", "label": "CasaNova Bazar", "sheet_id": "1klK…", "gid_ventas": "0",
+       "gid_resumen": "281676852"},
+      {"key": "bazar-2023", "label": "Archivo 2023", "sheet_id": "1abc…", "gid_ventas": "0"}
+    ]
+
+Una fuente con ``workbook`` (ruta a un .xlsx, relativa al JSON) se lee del
+libro local en vez de Google Sheets. ``CASANOVA_OFFLINE=1`` deja sólo las
+fuentes con ``workbook``; si no hay ninguna (o no hay JSON), usa el libro que
+trae el repo (``data/CasaNova Bazar.xlsx``) como única fuente.
+"""
+import json
+import os
+from dataclasses import dataclass, replace
+from pathlib import Path
+
+SHEET_ID = "1klKOjOawuBF8lBAFUwg3b6WjZ1fjuXUld2_xtbNjgTQ"
+GID_VENTAS = "0"           # ventas_bazar
+GID_RESUMEN = "281676852"  # resumen_diario
+SOURCES_FILE = Path(os.environ.get("CASANOVA_SOURCES", Path(__file__).resolve().parent.parent / "sources.json"))
+WORKBOOK = Path(__file__).resolve().parent.parent / "data" / "CasaNova Bazar.xlsx"
+OFFLINE = os.environ.get("CASANOVA_OFFLINE", "").strip().lower() not in ("", "0", "false", "no", "off")
+
+
+@dataclass(frozen=True)
+class Source:
+    key: str                         # identificador estable (claves de caché)
+    label: str                       # lo que se ve en el filtro "Tienda"
+    sheet_id: str = ""               # vacío si la fuente es un libro local
+    gid_ventas: str = GID_VENTAS
+    gid_resumen: str | None = None   # sin resumen_diario: sólo resumen local
+    base_url: str | None = None      # otro origen (CASANOVA_SHEETS_BASE_URL por fuente)
+    workbook: str | None = None      # .xlsx local (hojas ventas_bazar / resumen_diario) en vez de la planilla
+
+
+DEFAULT_SOURCES = (Source("casanova", "CasaNova Bazar", SHEET_ID, GID_VENTAS, GID_RESUMEN),)
+OFFLINE_SOURCES = (Source("casanova", "CasaNova Bazar", workbook=str(WORKBOOK)),)
+
+
+def load_sources(path: str | Path | None = None) -> tuple[Source, ...]:
+    """Fuentes declaradas en ``path`` (o ``SOURCES_FILE``); sin archivo, la planilla por defecto.
+
+    Con ``CASANOVA_OFFLINE`` quedan sólo las fuentes con libro local (o el
+    libro del repo si ninguna lo tiene).
+
+    Lanza ``ValueError`` si el JSON no es una lista de fuentes válidas o si
+    repite ``key`` o ``label``.
+    """
+    path = Path(path) if path is not None else SOURCES_FILE
+    if not path.exists():
+        return OFFLINE_SOURCES if OFFLINE else DEFAULT_SOURCES
+    try:
+        items = json.loads(path.read_text(encoding="utf-8"))
+        sources = tuple(Source(**item) for item in items)
+        sources = tuple(
+            replace(s, workbook=str(path.parent / s.workbook)) if s.workbook and not Path(s.workbook).is_absolute() else s
+            for s in sources
+        )
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"{path}: registro de fuentes inválido ({e})") from e
+    if not sources:
+        raise ValueError(f"{path}: el registro de fuentes está vacío")
+    for attr in ("key", "label"):
+        values = [getattr(s, attr) for s in sources]
+        if len(set(values)) != len(values):
+            raise ValueError(f"{path}: hay fuentes con el mismo {attr}")
+    if OFFLINE:
+        # Sin red: las planillas de Google no se pueden leer.
+        return tuple(s for s in sources if s.workbook) or OFFLINE_SOURCES
+    return sources
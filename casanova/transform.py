@@ -0,0 +1,116 @@
+"""Normalización y tipado de las pestañas ventas_bazar / resumen_diario."""
+import io
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+from casanova.schema import RESUMEN_SCHEMA, VENTAS_SCHEMA, coerce_frame, reader_dtype
+
+
+def strip_accents(text: str) -> str:
+    if not isinstance(text, str):
+        text = str(text)
+    return "".join(c for c in unicodedata.normalize("NFD", text) if unicodedata.category(c) != "Mn")
+
+
+def column_name(raw: str) -> str:
+    return strip_accents(raw).strip().lower().replace(" ", "_")
+
+
+def normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
+    df = df.copy()
+    df.columns = [column_name(c) for c in df.columns]
+    return df
+
+
+def read_csv_typed(source, schema: dict, names: list[str] | None = None) -> pd.DataFrame:
+    """Lee un CSV (bytes o ruta) pasando al lector los dtypes del esquema.
+
+    Con ``names`` se asume que el contenido no trae encabezado (lotes
+    incrementales).
+    """
+    def buffer():
+        return io.BytesIO(source) if isinstance(source, bytes) else source
+
+    header = None if names is not None else 0
+    if names is None:
+        names = list(pd.read_csv(buffer(), nrows=0).columns)
+    normalized = [column_name(c) for c in names]
+    dtype = {
+        raw: reader_dtype(schema[col])
+        for raw, col in zip(names, normalized)
+        if col in schema and reader_dtype(schema[col])
+    }
+    df = pd.read_csv(buffer(), header=header, names=names, dtype=dtype)
+    df.columns = normalized
+    return coerce_frame(df, schema)
+
+
+def finish_ventas(ventas: pd.DataFrame) -> pd.DataFrame:
+    if "reseña" in ventas.columns and "resena" not in ventas.columns:
+        ventas["resena"] = ventas["reseña"]
+
+    # Ventas netas por fila: importe_total cuando viene cargado, si no unidades × precio − descuento.
+    # Se resuelve fila a fila para que un lote incremental dé lo mismo que la hoja completa.
+    # Se guarda en float64: es la columna que se suma en todos los KPIs.
+    def col(name):
+        if name not in ventas.columns:
+            return 0.0
+        return np.nan_to_num(ventas[name].to_numpy(dtype="float64", na_value=np.nan))
+
+    calculado = (col("unidades") * col("precio_unitario")) * (1 - col("descuento_pct") / 100)
+    if "importe_total" in ventas.columns:
+        importe = ventas["importe_total"].to_numpy(dtype="float64", na_value=np.nan)
+        ventas["ventas_netas"] = np.where(np.isnan(importe), calculado, importe)
+    else:
+        ventas["ventas_netas"] = calculado
+    return ventas
+
+
+def finish_resumen(resumen: pd.DataFrame) -> pd.DataFrame:
+    # Compat nombres alternativos
+    if "canal_superior" in resumen.columns and "canal_top" not in resumen.columns:
+        resumen["canal_top"] = resumen["canal_superior"]
+    if "categoria_superior" in resumen.columns and "categoria_top" not in resumen.columns:
+        resumen["categoria_top"] = resumen["categoria_superior"]
+    return resumen
+
+
+def prepare_ventas(raw: pd.DataFrame) -> pd.DataFrame:
+    """ventas_bazar ya leído → columnas normalizadas, tipos del esquema y ventas_netas."""
+    return finish_ventas(coerce_frame(normalize_columns(raw), VENTAS_SCHEMA))
+
+
+def prepare_resumen(raw: pd.DataFrame) -> pd.DataFrame:
+    return finish_resumen(coerce_frame(normalize_columns(raw), RESUMEN_SCHEMA))
+
+
+def read_ventas_csv(source, names: list[str] | None = None) -> pd.DataFrame:
+    return finish_ventas(read_csv_typed(source, VENTAS_SCHEMA, names))
+
+
+def read_resumen_csv(source, names: list[str] | None = None) -> pd.DataFrame:
+    return finish_resumen(read_csv_typed(source, RESUMEN_SCHEMA, names))
+
+
+def index_by_date(frame: pd.DataFrame, col: str) -> pd.DataFrame:
+    """Descarta fechas vacías y deja ``frame`` ordenado con índice datetime64 sobre ``col``.
+
+    La columna se conserva; el índice queda sin nombre para no chocar con ella.
+    """
+    frame = frame.dropna(subset=[col])
+    if not frame[col].is_monotonic_increasing:
+        frame = frame.sort_values(col, kind="stable")
+    return frame.set_index(pd.DatetimeIndex(frame[col]).rename(None))
+
+
+def date_slice(frame: pd.DataFrame, start, end) -> pd.DataFrame:
+    """Filas con fecha en ``[start, end]`` (días completos) por búsqueda binaria.
+
+    ``frame`` debe venir de ``index_by_date``; devuelve una vista (sin copia).
+    """
+    index = frame.index
+    i = index.searchsorted(pd.Timestamp(start), side="left")
+    j = index.searchsorted(pd.Timestamp(end) + pd.Timedelta(days=1), side="left")
+    return frame.iloc[i:j]
@@ -0,0 +1,168 @@
+"""Fuente local: el libro ``data/CasaNova Bazar.xlsx``, sin Google Sheets.
+
+La primera vez se leen las hojas ventas_bazar y resumen_diario (openpyxl en
+modo sólo lectura), se tipan con el mismo esquema que el CSV y se guardan en
+Arrow IPC sin comprimir. Mientras el archivo no cambie (mismo mtime y tamaño,
+o mismo hash si sólo lo tocaron) los arranques siguientes abren esas tablas
+con memory-map en milisegundos. Sirve para desarrollo offline y como línea de
+base reproducible de los benchmarks.
+"""
+import hashlib
+import re
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from casanova.ingest import INGEST_VERSION, RESUMEN_VERSION
+from casanova.snapshots import CACHE_DIR, SheetSnapshot, SnapshotMeta, SnapshotStore
+from casanova.sources import WORKBOOK
+from casanova.transform import prepare_resumen, prepare_ventas
+
+SHEET_VENTAS = "ventas_bazar"
+SHEET_RESUMEN = "resumen_diario"
+WORKBOOK_VERSION = "xlsx-2"   # cambia si cambia la lectura del libro (invalida las tablas Arrow)
+
+
+class ArrowStore(SnapshotStore):
+    """``SnapshotStore`` en Arrow IPC (Feather v2) sin comprimir: se lee con memory-map."""
+
+    def __init__(self, root: str | Path | None = None):
+        super().__init__(root if root is not None else CACHE_DIR / "xlsx")
+
+    def _paths(self, key: str) -> tuple[Path, Path]:
+        return self.root / f"{key}.arrow", self.root / f"{key}.json"
+
+    def read_frame(self, key: str) -> pd.DataFrame:
+        from pyarrow import feather
+
+        return feather.read_table(self._paths(key)[0], memory_map=True).to_pandas(split_blocks=True)
+
+    def write(self, df: pd.DataFrame, meta: SnapshotMeta) -> None:
+        from pyarrow import feather
+
+        self.root.mkdir(parents=True, exist_ok=True)
+        data_path, _ = self._paths(meta.key)
+        tmp = data_path.with_suffix(".arrow.tmp")
+        feather.write_feather(df.reset_index(drop=True), tmp, compression="uncompressed")
+        tmp.replace(data_path)
+        self.write_meta(meta)
+
+
+def file_sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def read_sheets(path: Path, sheets: list[str]) -> dict[str, pd.DataFrame]:
+    """Hojas ``sheets`` del libro como frames crudos (primera fila = encabezado); omite las que no existen."""
+    import openpyxl
+
+    wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        out = {}
+        for sheet in sheets:
+            if sheet not in wb.sheetnames:
+                continue
+            rows = wb[sheet].iter_rows(values_only=True)
+            header = list(next(rows, None) or ())
+            while header and header[-1] is None:   # celdas con formato pero sin encabezado
+                header.pop()
+            columns = [str(c) if c is not None else f"col_{i}" for i, c in enumerate(header)]
+            n = len(columns)
+            frame = pd.DataFrame.from_records([r[:n] for r in rows], columns=columns)
+            # Celdas con sólo espacios: vacías, como en la exportación CSV.
+            frame = frame.replace(r"^\s*$", None, regex=True)
+            out[sheet] = frame.dropna(how="all")
+        return out
+    finally:
+        wb.close()
+
+
+def _prepare_ventas(raw: pd.DataFrame) -> pd.DataFrame:
+    # Mismo frame que deja parse_ventas: tipado y ordenado por fecha.
+    frame = prepare_ventas(raw)
+    if "fecha_pedido" in frame.columns and not frame["fecha_pedido"].dropna().is_monotonic_increasing:
+        frame = frame.sort_values("fecha_pedido", kind="stable", ignore_index=True)
+    return frame
+
+
+# nombre -> (hoja, preparación, versión del parser: la misma que el snapshot de la planilla)
+SHEETS = {
+    "ventas": (SHEET_VENTAS, _prepare_ventas, INGEST_VERSION),
+    "resumen": (SHEET_RESUMEN, prepare_resumen, RESUMEN_VERSION),
+}
+
+
+def workbook_key(path: Path, name: str) -> str:
+    # El nombre se lee mejor en .cache/; el hash de la ruta separa libros homónimos en otras carpetas.
+    stem = re.sub(r'[^0-9A-Za-z]+', '-', path.stem).strip('-').lower()
+    where = hashlib.blake2b(str(path.resolve()).encode(), digest_size=4).hexdigest()
+    return f"xlsx_{stem}-{where}_{name}"
+
+
+def load_workbook(path: str | Path = WORKBOOK, *, store: SnapshotStore | None = None,
+                  lazy: bool = False) -> dict[str, SheetSnapshot]:
+    """Snapshots ``{"ventas", "resumen"}`` del libro (``resumen`` sólo si la hoja existe).
+
+    El libro se abre sólo si alguna hoja no tiene tabla cacheada para este
+    contenido y esta versión de parser. Con ``lazy`` las tablas se leen al usar
+    ``frame`` (como en ``load_sheet``).
+    """
+    path = Path(path)
+    store = store or ArrowStore()
+    stat = path.stat()
+    stamp = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+
+    def stored(meta: SnapshotMeta, status: str) -> SheetSnapshot:
+        return SheetSnapshot(None if lazy else store.read_frame(meta.key), meta, status, store=store)
+
+    metas = {}
+    for name, (_, _, version) in SHEETS.items():
+        meta = store.read_meta(workbook_key(path, name))
+        valid = meta is not None and meta.parser_version == version and meta.extra.get("reader") == WORKBOOK_VERSION
+        metas[name] = meta if valid else None
+    # Hojas que tenía el libro la última vez (``extra["sheets"]`` de ventas): un libro sin
+    # resumen_diario no obliga a abrirlo en cada arranque.
+    names = metas["ventas"].extra["sheets"] if metas["ventas"] is not None else list(SHEETS)
+
+    # Mismo mtime y tamaño: ni siquiera se hashea el archivo.
+    if all(metas[n] is not None and {k: metas[n].extra.get(k) for k in stamp} == stamp for n in names):
+        return {name: stored(metas[name], "cached") for name in names}
+
+    digest = file_sha256(path)
+    if metas["ventas"] is None or metas["ventas"].sha256 != digest:
+        names = list(SHEETS)   # otro contenido: puede haber ganado o perdido hojas
+    out, pending = {}, []
+    for name, meta in ((n, metas[n]) for n in names):
+        if meta is not None and meta.sha256 == digest:
+            meta.extra.update(stamp)
+            store.write_meta(meta)
+            out[name] = stored(meta, "unchanged")
+        else:
+            pending.append(name)
+    if pending:
+        raw = read_sheets(path, [SHEETS[name][0] for name in pending])
+        present = [n for n in names if n not in pending or SHEETS[n][0] in raw]
+        for name in pending:
+            sheet, prepare, version = SHEETS[name]
+            if sheet not in raw:
+                continue
+            frame = prepare(raw[sheet])
+            meta = SnapshotMeta(
+                key=workbook_key(path, name),
+                sha256=digest,
+                rows=len(frame),
+                fetched_at=time.time(),
+                source_url=str(path),
+                parser_version=version,
+                extra={"sheet": sheet, "reader": WORKBOOK_VERSION, "sheets": present, **stamp},
+            )
+            store.write(frame, meta)
+            out[name] = SheetSnapshot(None if lazy else frame, meta, "fresh", store=store)
+    if "ventas" not in out:
+        raise ValueError(f"{path}: no tiene la hoja {SHEET_VENTAS}")
+    return out
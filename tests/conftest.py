@@ -0,0 +1,53 @@
+import os
+import tempfile
+
+# Antes de importar casanova: snapshots, Parquet y cachés van a un directorio descartable.
+os.environ["CASANOVA_CACHE_DIR"] = tempfile.mkdtemp(prefix="casanova-tests-")
+
+import pytest  # noqa: E402
+
+from benchmarks.generate import write_standin  # noqa: E402
+from benchmarks.sheets_server import serve  # noqa: E402
+from casanova.analytics import load_snapshots  # noqa: E402
+from casanova.snapshots import SnapshotStore  # noqa: E402
+from casanova.sources import Source  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def standin(tmp_path_factory) -> str:
+    """Dos planillas sintéticas chicas (``tienda-a``, ``tienda-b``) en formato de exportación CSV."""
+    root = tmp_path_factory.mktemp("sheets")
+    for seed, sheet_id in enumerate(("tienda-a", "tienda-b")):
+        write_standin(str(root), sheet_id, "0", "1", n_rows=4000, seed=seed)
+    return str(root)
+
+
+@pytest.fixture(scope="session")
+def sources(standin) -> list[Source]:
+    return [Source(sheet_id, f"Tienda {sheet_id[-1].upper()}", sheet_id, "0", "1", base_url=standin)
+            for sheet_id in ("tienda-a", "tienda-b")]
+
+
+@pytest.fixture()
+def store(tmp_path) -> SnapshotStore:
+    return SnapshotStore(tmp_path / "snapshots")
+
+
+@pytest.fixture()
+def snapshots(sources, store):
+    return load_snapshots(sources, max_age=0, store=store)
+
+
+@pytest.fixture()
+def sheets_server(standin):
+    """Arranca ``benchmarks.sheets_server`` sobre ``standin`` con las opciones dadas."""
+    servers = []
+
+    def start(**kwargs):
+        servers.append(serve(standin, **kwargs))
+        return servers[-1]
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
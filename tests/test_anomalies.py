@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from casanova.anomalies import DAILY_COLUMNS, MIN_HISTORY, THRESHOLD, TOTAL, WINDOW, daily_measures, detect, update_anomalies
+from casanova.transform import index_by_date
+
+
+def serie(ventas) -> pd.DataFrame:
+    """Medidas diarias del total con ``ventas`` por día (20 pedidos, sin cancelados ni reseñas)."""
+    n = len(ventas)
+    return pd.DataFrame({
+        "fecha": pd.date_range("2024-01-01", periods=n, freq="D"),
+        "dimension": TOTAL, "valor": "",
+        "pedidos": 20.0, "ventas_netas": np.asarray(ventas, dtype="float64"), "cancelados": 0.0,
+        "entrega_sum": 0.0, "entrega_n": 0.0, "resena_sum": 0.0, "resena_n": 0.0,
+    })[DAILY_COLUMNS]
+
+
+def ventas_anomalas(daily: pd.DataFrame) -> list[int]:
+    out = detect(daily)
+    out = out[out["kpi"] == "ventas"]
+    return ((out["fecha"] - daily["fecha"].min()).dt.days).tolist()
+
+
+def test_mad_cero_usa_el_piso_relativo():
+    # Historia constante: MAD = 0, la escala es el 10 % de la mediana (100).
+    values = [1000.0] * 40
+    values[35] = 1000 + 100 * THRESHOLD        # justo en el umbral: no es anomalía
+    values[36] = 1000 + 100 * THRESHOLD + 1
+    values[37] = 1000 - 100 * THRESHOLD - 1
+    assert ventas_anomalas(serie(values)) == [36, 37]
+
+
+def test_sin_historia_suficiente_no_evalua():
+    values = [1000.0] * 40
+    values[MIN_HISTORY - 1] = 10_000           # 13 días previos: todavía no se evalúa
+    values[MIN_HISTORY] = 10_000
+    assert ventas_anomalas(serie(values)) == [MIN_HISTORY]
+
+
+def test_la_ventana_solo_mira_los_dias_previos():
+    # Valores altos que salen de la ventana no mueven la mediana.
+    values = [5000.0] * 20 + [1000.0] * WINDOW + [1500.0]
+    flagged = ventas_anomalas(serie(values))
+    # El primer día bajo se compara con la ventana alta (caída); el último, sólo con días de 1000.
+    assert flagged[0] == 20
+    assert flagged[-1] == len(values) - 1
+    assert len(values) - 2 not in flagged
+
+
+def test_incremental_igual_a_detectar_todo():
+    rng = np.random.default_rng(0)
+    n = 3000
+    rows = pd.DataFrame({
+        "id_pedido": [f"P-{i}" for i in range(n)],
+        "fecha_pedido": pd.to_datetime("2024-01-01") + pd.to_timedelta(np.sort(rng.integers(0, 90, n)), unit="D"),
+        "canal": rng.choice(["TiendaNube", "Instagram Shop"], n),
+        "ventas_netas": rng.gamma(2.0, 5000.0, n),
+        "estado_pedido": rng.choice(["Entregado", "Cancelado"], n, p=[0.9, 0.1]),
+    })
+    rows.loc[rows["fecha_pedido"] == "2024-03-25", "ventas_netas"] *= 8
+    ventas = index_by_date(rows, "fecha_pedido")
+    before = ventas[ventas.index < "2024-03-20"]
+    daily = daily_measures(before)
+    days = sorted(ventas.index[ventas.index >= "2024-03-20"].normalize().unique())
+    _, incremental = update_anomalies(daily, detect(daily), ventas, days)
+    expected = detect(daily_measures(ventas))
+    pd.testing.assert_frame_equal(incremental.reset_index(drop=True), expected, check_dtype=False)
+    assert (expected["fecha"] == "2024-03-25").any()
@@ -0,0 +1,80 @@
+import pandas as pd
+import pytest
+
+from benchmarks.run import same_kpis
+from casanova.analytics import Analytics, View, build_dataset, load_snapshots
+from casanova.shards import TIENDA
+
+
+def _frame(a: pd.DataFrame | pd.Series) -> pd.DataFrame:
+    # Mismo contenido sin importar categorías ni unidad de las fechas.
+    a = a.reset_index() if isinstance(a, pd.Series) else a.reset_index(drop=True)
+    for col in a.columns:
+        if isinstance(a[col].dtype, pd.CategoricalDtype):
+            a[col] = a[col].astype(str)
+        elif a[col].dtype.kind == "M":
+            a[col] = a[col].astype("datetime64[ns]")
+    return a
+
+
+def assert_same(a, b):
+    pd.testing.assert_frame_equal(_frame(a), _frame(b), check_dtype=False, rtol=1e-9)
+
+
+@pytest.fixture()
+def backends(snapshots):
+    return (Analytics(build_dataset(snapshots, backend="pandas")),
+            Analytics(build_dataset(snapshots, backend="arrow")))
+
+
+def views(an: Analytics) -> list[View]:
+    full = an.default_view()
+    filters = full.filter_dict
+    month = View.of(an.data.min_date + pd.Timedelta(days=40), an.data.min_date + pd.Timedelta(days=70),
+                    {**filters, "canal": filters["canal"][:2]})
+    return [
+        full,
+        month,
+        View.of(full.start, full.end, {**filters, "canal": []}),        # multiselect vaciado
+        View.of(full.start, full.end, {**filters, "categoria": []}),
+        View.of(full.start, full.end, {**filters, TIENDA: []}),
+        View.of(full.start, full.end, {**filters, TIENDA: filters[TIENDA][:1]}),
+    ]
+
+
+def test_backends_dan_lo_mismo(backends):
+    pandas_an, arrow_an = backends
+    for view in views(pandas_an):
+        assert same_kpis(pandas_an.kpis(view), arrow_an.kpis(view)), view
+        for col in pandas_an.data.cube.dims:
+            assert pandas_an.options(col, view) == arrow_an.options(col, view)
+        assert_same(pandas_an.daily_sales(view), arrow_an.daily_sales(view))
+        assert_same(pandas_an.order_states(view), arrow_an.order_states(view))
+        assert_same(pandas_an.distribution("dias_entrega", view), arrow_an.distribution("dias_entrega", view))
+        assert_same(pandas_an.rows(view), arrow_an.rows(view))
+        assert pandas_an.comparison(view, "previous") == pytest.approx(arrow_an.comparison(view, "previous"))
+
+
+def test_seleccion_vacia_da_ceros(backends):
+    _, arrow_an = backends
+    full = arrow_an.default_view()
+    kpis = arrow_an.kpis(View.of(full.start, full.end, {**full.filter_dict, "canal": []}))
+    assert kpis.pedidos == 0 and kpis.total_ventas == 0
+
+
+def test_recarga_lazy_no_lee_ventas(sources, store, monkeypatch):
+    pandas_an = Analytics(build_dataset(load_snapshots(sources, max_age=0, store=store), backend="pandas"))
+    # Primera carga: escribe particiones, manifiesto y tablas derivadas.
+    build_dataset(load_snapshots(sources, store=store, lazy=True), store=store, backend="arrow")
+
+    snapshots = load_snapshots(sources, store=store, lazy=True)
+    assert all(s.ventas.data is None for s in snapshots)
+    ventas_keys, read = {s.ventas.meta.key for s in snapshots}, store.read_frame
+    monkeypatch.setattr(store, "read_frame", lambda key: pytest.fail(f"leyó {key}") if key in ventas_keys else read(key))
+    arrow_an = Analytics(build_dataset(snapshots, store=store, backend="arrow"))
+    assert all(len(p.ventas) == 0 for p in arrow_an.data.parts)
+    # Las particiones quedan junto a los snapshots del store, no en la caché global.
+    assert all(f.is_relative_to(store.root / "columnar") for p in arrow_an.data.parts for f in p.columnar.files)
+    for view in views(pandas_an):
+        assert same_kpis(pandas_an.kpis(view), arrow_an.kpis(view)), view
+        assert_same(pandas_an.rows(view), arrow_an.rows(view))
@@ -0,0 +1,47 @@
+import datetime as dt
+import hashlib
+
+import numpy as np
+
+from casanova.analytics import Analytics, SourceSnapshots, View, build_dataset
+from casanova.ingest import INGEST_VERSION, parse_ventas
+from casanova.snapshots import SheetSnapshot, SnapshotMeta
+from casanova.sources import Source
+
+CANALES = ["TiendaNube", "Instagram Shop", "Mercado Libre"]
+
+
+def _pedidos_repartidos(n: int = 3000) -> Analytics:
+    # Cada pedido tiene dos líneas en canales distintos: los pedidos no se suman entre celdas.
+    rng = np.random.default_rng(0)
+    lines = ["id_pedido,fecha_pedido,canal,categoria,importe_total,costo_envio,estado_pedido"]
+    for i in range(n):
+        day, canal = 1 + i % 28, int(rng.integers(3))
+        for k in range(2):
+            lines.append(f"P-{i:06d},{day:02d}/02/2024,{CANALES[(canal + k) % 3]},Cocina,1000,0,Entregado")
+    content = "\n".join(lines).encode()
+    frame, state = parse_ventas(content, None, lambda: None)
+    meta = SnapshotMeta("ventas", hashlib.sha256(content).hexdigest(), len(frame), 0.0,
+                        parser_version=INGEST_VERSION, extra=state)
+    snaps = SourceSnapshots(Source("t", "T", "t"), SheetSnapshot(frame, meta, "fresh"), None)
+    return Analytics(build_dataset([snaps], backend="pandas"))
+
+
+def test_pedidos_del_encabezado_son_exactos():
+    an = _pedidos_repartidos()
+    view = an.default_view()
+    assert not an.selection(view).exact
+    assert an.kpis(view).pedidos == 3000
+
+    one = View.of(view.start, view.end, {**view.filter_dict, "canal": CANALES[:1]})
+    pedidos = an.rows(one)["id_pedido"].nunique()
+    kpis = an.kpis(one)
+    assert kpis.pedidos == pedidos and kpis.ticket == kpis.total_ventas / pedidos
+
+
+def test_comparacion_con_el_mismo_conteo_que_el_encabezado():
+    an = _pedidos_repartidos()
+    filters = an.default_view().filter_dict
+    other = an.comparison(View.of(dt.date(2024, 2, 15), dt.date(2024, 2, 28), filters), "previous")
+    assert other["pedidos"] > 0
+    assert other["pedidos"] == an.kpis(View.of(other["start"], other["end"], filters)).pedidos
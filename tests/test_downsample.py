@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from casanova.downsample import MAX_POINTS, lttb, pick_resolution, prepare_series, resample
+
+
+@pytest.mark.parametrize("n, n_out", [(10_000, 1500), (1000, 3), (101, 100), (5000, 777)])
+def test_lttb_conserva_extremos_y_cantidad(n, n_out):
+    rng = np.random.default_rng(n)
+    x = np.arange(n, dtype="float64")
+    y = rng.normal(size=n).cumsum()
+    idx = lttb(x, y, n_out)
+    assert len(idx) == n_out
+    assert idx[0] == 0 and idx[-1] == n - 1
+    assert (np.diff(idx) > 0).all()
+
+
+def test_lttb_conserva_picos():
+    x = np.arange(10_000, dtype="float64")
+    y = np.zeros(10_000)
+    y[[1234, 6789]] = [100.0, -100.0]
+    idx = lttb(x, y, 200)
+    assert {1234, 6789} <= set(idx)
+
+
+def test_lttb_sin_reducir():
+    x = np.arange(50, dtype="float64")
+    assert (lttb(x, x, 50) == np.arange(50)).all()
+    assert (lttb(x, x, 2) == np.arange(50)).all()
+
+
+@pytest.mark.parametrize("days, expected", [(0, None), (3, None), (4, "D"), (400, "D"), (401, "W"), (1500, "W"), (1501, "M")])
+def test_pick_resolution(days, expected):
+    times = pd.Series(pd.Timestamp("2020-01-01") + pd.to_timedelta([0, days], unit="D"))
+    assert pick_resolution(times) == expected
+    assert pick_resolution(times.iloc[:0]) is None
+
+
+def test_resample_semanal_suma_y_recalcula_cocientes():
+    days = pd.date_range("2024-01-01", periods=28, freq="D")   # lunes
+    frame = pd.DataFrame({"fecha": days, "ventas_netas_dia": 100.0, "pedidos_dia": np.arange(1, 29, dtype="float64")})
+    frame["ticket_promedio_dia"] = frame["ventas_netas_dia"] / frame["pedidos_dia"]
+    weekly = resample(frame, "fecha", "ventas_netas_dia", "W")
+    assert weekly["fecha"].tolist() == list(days[::7]) and (weekly["ventas_netas_dia"] == 700).all()
+    ticket = resample(frame, "fecha", "ticket_promedio_dia", "W")
+    np.testing.assert_allclose(ticket["ticket_promedio_dia"], [700 / sum(range(w * 7 + 1, w * 7 + 8)) for w in range(4)])
+
+
+def test_prepare_series_respeta_el_maximo():
+    times = pd.date_range("2024-01-01", periods=3 * 24 * 60, freq="min")   # 3 días: sin agregar
+    frame = pd.DataFrame({"fecha": times, "ventas_netas": np.random.default_rng(0).random(len(times))})
+    out, res = prepare_series(frame, "fecha", "ventas_netas")
+    assert res is None and len(out) == MAX_POINTS
+    assert out["fecha"].iloc[0] == times[0] and out["fecha"].iloc[-1] == times[-1]
@@ -0,0 +1,33 @@
+import gzip
+import io
+
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+from streamlit.runtime.download_data_util import convert_data_to_bytes_and_infer_mime
+
+from casanova.export import EXPORT_FORMATS, write_export
+
+FRAME = pd.DataFrame({
+    "id_pedido": [f"P-{i}" for i in range(250)],
+    "canal": pd.Categorical(["TiendaNube", "Instagram Shop"] * 125),
+    "importe_total": [1000.5] * 250,
+})
+
+
+def _read(data: bytes, fmt: str) -> pd.DataFrame:
+    if fmt == "Parquet":
+        return pq.read_table(io.BytesIO(data)).to_pandas()
+    if fmt == "CSV (gzip)":
+        data = gzip.decompress(data)
+    return pd.read_csv(io.BytesIO(data))
+
+
+@pytest.mark.parametrize("fmt", list(EXPORT_FORMATS))
+def test_la_descarga_acepta_la_exportacion(fmt):
+    # Lo mismo que hace st.download_button con el callable al hacer clic.
+    data, _ = convert_data_to_bytes_and_infer_mime(write_export(FRAME, fmt, chunk_rows=100), TypeError("unsupported type"))
+    out = _read(data, fmt)
+    assert len(out) == len(FRAME)
+    assert out["id_pedido"].tolist() == FRAME["id_pedido"].tolist()
+    assert out["canal"].astype(str).tolist() == FRAME["canal"].astype(str).tolist()
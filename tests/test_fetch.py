@@ -0,0 +1,37 @@
+import time
+
+import pytest
+import requests
+
+from casanova.fetch import fetch_first
+from casanova.snapshots import sheet_urls
+
+
+def _attempts(server):
+    return [(url, None, None) for url in sheet_urls("tienda-a", "0", server.base_url)]
+
+
+def test_gana_la_respuesta_rapida(sheets_server):
+    server = sheets_server(delay={"export": 3})
+    attempts = _attempts(server)
+    started = time.perf_counter()
+    url, content, _ = fetch_first(attempts, hedge_delay=0.2)
+    # No se espera a la URL lenta: su respuesta se descarta en su hilo.
+    assert time.perf_counter() - started < 2
+    assert url == attempts[1][0] and content.startswith(b"id_pedido,")
+    assert server.hits == {"export": 1, "gviz": 1}
+
+
+def test_sin_demora_no_lanza_la_segunda(sheets_server):
+    server = sheets_server()
+    attempts = _attempts(server)
+    url, _, _ = fetch_first(attempts, hedge_delay=2)
+    time.sleep(0.2)
+    assert url == attempts[0][0]
+    assert server.hits == {"export": 1}
+
+
+def test_si_fallan_las_dos_propaga_el_error(sheets_server):
+    server = sheets_server(fail={"export", "gviz"})
+    with pytest.raises(requests.HTTPError, match="503"):
+        fetch_first(_attempts(server), timeout=2, hedge_delay=0.2)
@@ -0,0 +1,41 @@
+import hashlib
+
+from casanova.ingest import parse_ventas
+from casanova.snapshots import SnapshotMeta
+
+HEADER = b"id_pedido,fecha_pedido,canal,importe_total,costo_envio,estado_pedido,notas_cliente\r\n"
+ROW_1 = b"CNB-00000001,03/01/2024,TiendaNube,1000,0,Entregado,"
+ROW_2 = b"CNB-00000002,04/01/2024,Instagram Shop,2000,0,Entregado,"
+
+
+def ingest(content: bytes, before: bytes | None = None):
+    """Parsea ``content`` como siguiente versión de ``before`` (o como primera carga)."""
+    if before is None:
+        return parse_ventas(content, None, lambda: None)
+    frame, state = parse_ventas(before, None, lambda: None)
+    meta = SnapshotMeta("ventas", hashlib.sha256(before).hexdigest(), len(frame), 0.0, extra=state)
+    return parse_ventas(content, meta, lambda: frame)
+
+
+def test_agregar_filas_es_incremental():
+    before = HEADER + ROW_1
+    frame, state = ingest(before + b"\r\n" + ROW_2, before)
+    assert state["mode"] == "incremental"
+    assert frame["id_pedido"].tolist() == ["CNB-00000001", "CNB-00000002"]
+    assert state["days"] == ["2024-01-04"]
+
+
+def test_completar_ultima_celda_rearma():
+    # La exportación no termina en salto de línea: completar la nota extiende la última fila.
+    before = HEADER + ROW_1
+    frame, state = ingest(before + b"Para regalo", before)
+    assert state["mode"] == "full"
+    assert len(frame) == 1
+    assert frame["notas_cliente"].tolist() == ["Para regalo"]
+
+
+def test_id_no_posterior_rearma():
+    before = HEADER + ROW_2 + b"\r\n"
+    frame, state = ingest(before + ROW_1 + b"\r\n", before)
+    assert state["mode"] == "full"
+    assert len(frame) == 2
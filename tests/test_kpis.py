@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+
+from casanova.kpis import _ranking, compute_kpis
+
+
+def celdas(n: int = 5000, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    canales = ["TiendaNube", "Instagram Shop", "Mercado Libre", "WhatsApp", "Sin uso"]
+    canal = pd.Categorical(rng.choice(canales[:-1], n), categories=canales)
+    canal[rng.random(n) < 0.02] = np.nan   # celdas sin canal no suman a ningún valor
+    return pd.DataFrame({
+        "fecha": pd.to_datetime("2024-01-01") + pd.to_timedelta(rng.integers(0, 60, n), unit="D"),
+        "canal": canal,
+        "categoria": pd.Categorical(rng.choice([f"Cat {i}" for i in range(30)], n)),
+        "ventas_netas": rng.gamma(2.0, 5000.0, n),
+        "pedidos": rng.integers(1, 4, n).astype("float64"),
+        "cancelados": rng.integers(0, 2, n).astype("float64"),
+    })
+
+
+def test_ranking_igual_a_groupby():
+    cells = celdas()
+    for col in ("canal", "categoria"):
+        got = _ranking(cells, col, cells["ventas_netas"].to_numpy())
+        expected = cells.groupby(col, observed=True)["ventas_netas"].sum()
+        expected = expected.nlargest(len(expected))
+        assert list(got.index) == list(expected.index)
+        np.testing.assert_allclose(got.to_numpy(), expected.to_numpy())
+        assert got.index.name == col
+    assert "Sin uso" not in _ranking(cells, "canal", cells["ventas_netas"].to_numpy()).index
+
+
+def test_ranking_vacio_sin_categoricas():
+    cells = celdas().astype({"canal": "str"})
+    got = _ranking(cells, "canal", cells["ventas_netas"].to_numpy())
+    assert got.empty and got.index.name == "canal"
+
+
+def test_kpis_igual_a_sumas_directas():
+    cells = celdas()
+    k = compute_kpis(cells)
+    assert np.isclose(k.total_ventas, cells["ventas_netas"].sum())
+    assert k.pedidos == int(cells["pedidos"].sum())
+    assert k.cancelados == int(cells["cancelados"].sum())
+    assert k.top_category == cells.groupby("categoria", observed=True)["ventas_netas"].sum().idxmax()
+    assert compute_kpis(cells, pedidos=7).pedidos == 7
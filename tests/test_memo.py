@@ -0,0 +1,27 @@
+import numpy as np
+import pandas as pd
+
+from casanova.memo import Memo, sizeof
+
+
+def test_figuras_no_desalojan_frames():
+    memo = Memo(max_bytes=1000, budgets={"frames": 10_000})
+    memo.get("frames", "ventas", lambda: np.zeros(1000, dtype=np.uint8))
+    for i in range(20):
+        memo.get("fig", i, lambda: np.zeros(400, dtype=np.uint8))
+    assert memo.peek("frames", "ventas") is not None
+    stats = memo.stats()["namespaces"]
+    assert stats["frames"]["evictions"] == 0 and stats["fig"]["evictions"] > 0
+
+
+def test_valor_demasiado_grande_se_cuenta():
+    memo = Memo(max_bytes=100, budgets={})
+    memo.get("agg", "grande", lambda: np.zeros(1000, dtype=np.uint8))
+    assert memo.peek("agg", "grande") is None
+    assert memo.stats()["namespaces"]["agg"]["rejected"] == 1
+
+
+def test_sizeof_cuenta_los_textos():
+    notas = pd.Series(["Para regalo, entregar por la tarde sin falta"] * 1000, dtype=object)
+    assert sizeof(notas) > 40 * 1000
+    assert sizeof(pd.DataFrame({"notas_cliente": notas})) > 40 * 1000
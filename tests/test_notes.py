@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from casanova.notes import NoteIndex, extend_vocabulary, tokenize, vocabulary
+from casanova.transform import strip_accents
+
+NOTAS = [
+    "Es para regalo, envolver por favor",
+    "El envío llegó tarde",
+    "Quiero CANCELAR el pedido",
+    "Excelente atención, gracias",
+    "Pagué con tarjeta y la rechazaron",
+    "Enviar a la sucursal del correo",
+    "Llegó roto",
+]
+
+
+@pytest.fixture(scope="module")
+def index() -> NoteIndex:
+    return NoteIndex.build([vocabulary(NOTAS)])
+
+
+def notes(index: NoteIndex, ids) -> set:
+    return set(index.texts[ids])
+
+
+def test_tokenize_sin_tildes_ni_mayusculas():
+    assert tokenize("Envío RÁPIDO, ¡gracias!") == ["envio", "rapido", "gracias"]
+
+
+def test_busqueda_por_prefijo(index):
+    assert notes(index, index.search("envi")) == {NOTAS[1], NOTAS[5]}
+    assert notes(index, index.search("ENVÍO")) == {NOTAS[1]}
+    assert notes(index, index.search("llegó tarde")) == {NOTAS[1]}   # todas las palabras
+    assert len(index.search("inexistente")) == 0
+    assert index.search("¿?") is None                                # sin términos
+
+
+def test_reglas_de_etiquetas(index):
+    assert notes(index, index.tags["regalo"]) == {NOTAS[0]}
+    assert notes(index, index.tags["cancelación"]) == {NOTAS[2]}
+    assert notes(index, index.tags["pago"]) == {NOTAS[4]}
+    assert NOTAS[1] in notes(index, index.tags["envío"]) and NOTAS[5] in notes(index, index.tags["envío"])
+    assert notes(index, index.tagged(["regalo", "pago"])) == {NOTAS[0], NOTAS[4]}
+
+
+def test_mascara_igual_a_str_contains(index):
+    rng = np.random.default_rng(0)
+    rows = pd.Series(rng.choice(NOTAS + [None], 500))
+    ids = index.ids_of(rows)
+    plain = rows.map(lambda t: strip_accents(t.lower()), na_action="ignore")
+    for query in ("envi", "lleg", "regalo envolver", "gracias", "rot", "x"):
+        expected = pd.Series(True, index=rows.index)
+        for term in tokenize(query):
+            expected &= plain.str.contains(rf"\b{term}", regex=True, na=False)
+        found = index.search(query)
+        assert (index.mask(ids, found) == expected.to_numpy()).all(), query
+
+
+def test_extender_vocabulario_conserva_ids():
+    vocab = vocabulary(NOTAS[:3])
+    extended = extend_vocabulary(vocab, NOTAS[1:5])
+    assert extended["texto"].tolist() == NOTAS[:5]
+    assert extend_vocabulary(extended, NOTAS[:2]) is extended
@@ -0,0 +1,40 @@
+import dataclasses
+import json
+
+from casanova.analytics import Analytics, View, build_dataset
+from casanova.report import build_report, read_latest, render_html, write_report
+
+
+def test_reporte_sirve_solo_para_su_vista(snapshots, store, tmp_path):
+    an = Analytics(build_dataset(snapshots, store=store, backend="pandas"))
+    view = an.default_view()
+    write_report(build_report(an, view, workers=1), tmp_path)
+    report = read_latest(tmp_path)
+    assert report is not None and report.view == view
+
+    assert report.matches(an, view, use_resumen=True)
+    # Misma selección armada en otro orden: sigue siendo la misma vista.
+    same = View.of(view.start, view.end, dict(reversed(list(view.filter_dict.items()))))
+    assert report.matches(an, same, use_resumen=True)
+
+    filters = view.filter_dict
+    filters["canal"] = filters["canal"][:1]
+    assert not report.matches(an, View.of(view.start, view.end, filters), use_resumen=True)
+    assert not report.matches(an, dataclasses.replace(view, start=view.end), use_resumen=True)
+    assert not report.matches(an, view, use_resumen=False)
+    assert not report.matches(an, view, use_resumen=True, resolution="W")
+    assert not report.matches(an, view, use_resumen=True, compare="previous")
+    # Otros datos (una sola tienda): otra versión.
+    other = Analytics(build_dataset(snapshots[:1], store=store, backend="pandas"))
+    assert not report.matches(other, other.default_view(), use_resumen=True)
+
+
+def test_reporte_guarda_kpis_y_figuras(snapshots, store, tmp_path):
+    an = Analytics(build_dataset(snapshots, store=store, backend="pandas"))
+    view = an.default_view()
+    report = build_report(an, view, workers=1)
+    assert report.kpis == json.loads(json.dumps(an.kpis(view).to_dict()))
+    assert report.figures and all(json.loads(fig)["data"] is not None for fig in report.figures.values())
+    folder = write_report(report, tmp_path)
+    assert {p.name for p in folder.iterdir()} == {"report.html", "kpis.json", "figures.json"}
+    assert render_html(read_latest(tmp_path)).count("class='card'") == 6
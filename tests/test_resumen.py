@@ -0,0 +1,42 @@
+import hashlib
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+import casanova.resumen as resumen
+from casanova.ingest import parse_ventas
+from casanova.resumen import compute_resumen, local_resumen
+from casanova.snapshots import SheetSnapshot, SnapshotMeta, SnapshotStore
+from casanova.transform import index_by_date
+from casanova.workbook import ArrowStore, load_workbook
+
+WORKBOOK = Path(__file__).resolve().parent.parent / "data" / "CasaNova Bazar.xlsx"
+
+
+def test_resumen_local_igual_al_del_libro(tmp_path):
+    sheets = load_workbook(WORKBOOK, store=ArrowStore(tmp_path))
+    expected = sheets["resumen"].frame
+    got = compute_resumen(sheets["ventas"].frame)
+    pd.testing.assert_frame_equal(got[list(expected.columns)], expected, check_dtype=False)
+
+
+def _ingest(content: bytes, before: SheetSnapshot | None = None) -> SheetSnapshot:
+    frame, state = parse_ventas(content, before and before.meta, lambda: before.frame)
+    meta = SnapshotMeta("ventas", hashlib.sha256(content).hexdigest(), len(frame), 0.0, extra=state)
+    return SheetSnapshot(frame, meta, "fresh")
+
+
+def test_resumen_incremental_igual_al_completo(standin, tmp_path, monkeypatch):
+    lines = (Path(standin) / "tienda-a" / "0.csv").read_bytes().splitlines(keepends=True)
+    store = SnapshotStore(tmp_path)
+    before = _ingest(b"".join(lines[:3000]))
+    local_resumen(before, index_by_date(before.frame, "fecha_pedido"), store)
+
+    after = _ingest(b"".join(lines), before)
+    assert after.meta.extra["mode"] == "incremental"
+    ventas = index_by_date(after.frame, "fecha_pedido")
+    expected = compute_resumen(ventas)
+    # Con la versión anterior ya resumida no hace falta recalcular todo.
+    monkeypatch.setattr(resumen, "compute_resumen", lambda v: pytest.fail("recalculó todo"))
+    pd.testing.assert_frame_equal(local_resumen(after, ventas, store), expected)
@@ -0,0 +1,46 @@
+import hashlib
+
+import pandas as pd
+import pytest
+
+from casanova.ingest import parse_ventas
+from casanova.schema import parse_dates
+from casanova.snapshots import SnapshotMeta
+from casanova.transform import read_resumen_csv
+
+HEADER = "id_pedido,fecha_pedido,canal,categoria,importe_total,costo_envio,estado_pedido\n"
+
+
+@pytest.mark.parametrize("s", [
+    pd.Series([], dtype="object"),
+    pd.Series([None, None]),
+    pd.Series(["", ""]),
+    pd.Series([None, None], dtype="category"),
+])
+def test_parse_dates_sin_fechas(s):
+    out = parse_dates(s)
+    assert pd.api.types.is_datetime64_any_dtype(out)
+    assert len(out) == len(s) and out.isna().all()
+
+
+def test_parse_dates_mezcla_formatos():
+    out = parse_dates(pd.Series(["03/01/2024", None, "2024-01-05"]))
+    assert out.tolist()[0] == pd.Timestamp("2024-01-03")
+    assert pd.isna(out.iloc[1])
+    assert out.iloc[2] == pd.Timestamp("2024-01-05")
+
+
+def test_resumen_solo_encabezado():
+    frame = read_resumen_csv(b"fecha_analizada,pedidos_dia,ventas_netas_dia,observaciones\n")
+    assert frame.empty
+    assert pd.api.types.is_datetime64_any_dtype(frame["fecha_analizada"])
+
+
+def test_delta_incremental_sin_fecha():
+    base = (HEADER + "A-1,03/01/2024,TiendaNube,Cocina,1000,0,Entregado\n").encode()
+    frame, state = parse_ventas(base, None, lambda: None)
+    meta = SnapshotMeta("ventas", hashlib.sha256(base).hexdigest(), len(frame), 0.0, extra=state)
+    content = base + b"A-2,,TiendaNube,Cocina,500,0,Entregado\n"
+    frame, state = parse_ventas(content, meta, lambda: frame)
+    assert state["mode"] == "incremental"
+    assert len(frame) == 2 and frame["fecha_pedido"].isna().sum() == 1
@@ -0,0 +1,83 @@
+from pathlib import Path
+
+import pytest
+
+from benchmarks.sheets_server import serve
+from casanova.snapshots import load_sheet, snapshot_key
+
+
+def _load(server, store, **kwargs):
+    return load_sheet("tienda-a", "0", store=store, base_url=server.base_url, hedge_delay=5, **kwargs)
+
+
+def _no_writes(store, monkeypatch):
+    monkeypatch.setattr(store, "write", lambda *a, **k: pytest.fail("reescribió el snapshot"))
+
+
+def test_304_reusa_el_snapshot(sheets_server, store, monkeypatch):
+    server = sheets_server()
+    first = _load(server, store)
+    assert first.status == "fresh" and first.meta.etag
+
+    _no_writes(store, monkeypatch)
+    again = _load(server, store)
+    assert again.status == "unchanged"
+    assert again.meta.sha256 == first.meta.sha256
+    assert again.frame.equals(first.frame)
+    assert server.hits == {"export": 2}
+
+
+def test_error_de_red_sirve_el_snapshot_viejo(sheets_server, store):
+    server = sheets_server()
+    first = _load(server, store)
+    server.fail = {"export", "gviz"}
+
+    stale = _load(server, store, timeout=2)
+    assert stale.status == "stale" and "503" in stale.error
+    assert stale.meta.sha256 == first.meta.sha256
+    assert stale.frame.equals(first.frame)
+
+
+def test_sin_snapshot_el_error_se_propaga(sheets_server, store):
+    server = sheets_server(fail={"export", "gviz"})
+    with pytest.raises(Exception, match="503"):
+        _load(server, store, timeout=2)
+
+
+def test_mismo_hash_no_reescribe(sheets_server, store, monkeypatch):
+    server = sheets_server()
+    first = _load(server, store)
+    # Sin ETag guardado el GET no es condicional: vuelve el CSV completo (200) con el mismo contenido.
+    meta = store.read_meta(snapshot_key("tienda-a", "0"))
+    meta.etag = meta.last_modified = None
+    store.write_meta(meta)
+
+    _no_writes(store, monkeypatch)
+    again = _load(server, store)
+    assert again.status == "unchanged"
+    assert again.meta.etag == first.meta.etag
+    assert store.read_meta(snapshot_key("tienda-a", "0")).etag == first.meta.etag
+
+
+def test_max_age_no_consulta_la_red(sheets_server, store):
+    server = sheets_server()
+    _load(server, store)
+    cached = _load(server, store, max_age=3600)
+    assert cached.status == "cached" and server.hits == {"export": 1}
+
+
+def test_contenido_nuevo_reescribe(standin, store, tmp_path):
+    lines = (Path(standin) / "tienda-a" / "0.csv").read_bytes().splitlines(keepends=True)
+    sheet = tmp_path / "sheets" / "tienda-a" / "0.csv"
+    sheet.parent.mkdir(parents=True)
+    sheet.write_bytes(b"".join(lines[:100]))
+    server = serve(str(tmp_path / "sheets"))
+    try:
+        first = _load(server, store)
+        sheet.write_bytes(b"".join(lines[:101]))
+        again = _load(server, store)
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert again.status == "fresh" and again.meta.sha256 != first.meta.sha256
+    assert len(again.frame) == len(first.frame) + 1
@@ -0,0 +1,36 @@
+import json
+
+import pytest
+
+import casanova.sources as sources
+from casanova.sources import OFFLINE_SOURCES, load_sources
+
+REGISTRO = [
+    {"key": "bazar", "label": "CasaNova Bazar", "sheet_id": "1klK", "gid_ventas": "0"},
+    {"key": "archivo", "label": "Archivo 2023", "workbook": "libros/2023.xlsx"},
+]
+
+
+@pytest.fixture()
+def registro(tmp_path):
+    path = tmp_path / "sources.json"
+    path.write_text(json.dumps(REGISTRO), encoding="utf-8")
+    return path
+
+
+def test_offline_deja_solo_libros(registro, monkeypatch):
+    monkeypatch.setattr(sources, "OFFLINE", True)
+    (archivo,) = load_sources(registro)
+    assert archivo.key == "archivo"
+    assert archivo.workbook == str(registro.parent / "libros" / "2023.xlsx")
+
+
+def test_offline_sin_libros_usa_el_del_repo(registro, monkeypatch):
+    registro.write_text(json.dumps(REGISTRO[:1]), encoding="utf-8")
+    monkeypatch.setattr(sources, "OFFLINE", True)
+    assert load_sources(registro) == OFFLINE_SOURCES
+
+
+def test_online_usa_el_registro(registro, monkeypatch):
+    monkeypatch.setattr(sources, "OFFLINE", False)
+    assert [s.key for s in load_sources(registro)] == ["bazar", "archivo"]
@@ -0,0 +1,43 @@
+from pathlib import Path
+
+import openpyxl
+import pytest
+
+import casanova.workbook as workbook
+from casanova.workbook import SHEET_RESUMEN, ArrowStore, load_workbook
+
+WORKBOOK = Path(__file__).resolve().parent.parent / "data" / "CasaNova Bazar.xlsx"
+
+
+@pytest.fixture()
+def sin_resumen(tmp_path) -> Path:
+    wb = openpyxl.load_workbook(WORKBOOK)
+    del wb[SHEET_RESUMEN]
+    path = tmp_path / "libro.xlsx"
+    wb.save(path)
+    return path
+
+
+def test_libro_sin_resumen_no_se_reabre(sin_resumen, tmp_path, monkeypatch):
+    store = ArrowStore(tmp_path / "xlsx")
+    first = load_workbook(sin_resumen, store=store)
+    assert set(first) == {"ventas"} and first["ventas"].status == "fresh"
+
+    monkeypatch.setattr(workbook, "read_sheets", lambda *a: pytest.fail("volvió a abrir el libro"))
+    again = load_workbook(sin_resumen, store=store)
+    assert set(again) == {"ventas"} and again["ventas"].status == "cached"
+    assert again["ventas"].frame.equals(first["ventas"].frame)
+
+
+def test_libros_homonimos_no_comparten_tablas(sin_resumen, tmp_path):
+    otro = tmp_path / "otra" / WORKBOOK.name
+    otro.parent.mkdir()
+    otro.write_bytes(WORKBOOK.read_bytes())
+    mismo = tmp_path / WORKBOOK.name
+    mismo.write_bytes(sin_resumen.read_bytes())
+
+    store = ArrowStore(tmp_path / "xlsx")
+    load_workbook(mismo, store=store)
+    assert set(load_workbook(otro, store=store)) == {"ventas", "resumen"}
+    again = load_workbook(mismo, store=store)
+    assert set(again) == {"ventas"} and again["ventas"].status == "cached"